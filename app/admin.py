@@ -1,40 +1,44 @@
 import streamlit as st
-import sqlite3
+from db.conexion import conectar
+from db.consultas import FiltroCotizaciones, pagina_en_sesion, valores_distintos
 import pandas as pd
 from utils.email_utils import enviar_email_cotizacion
-from pdf_generator import generar_pdf_cotizacion
+from pdf_generator import generar_pdf_cotizacion, pdf_cotizacion_bytes
 import os
+import functools
 from datetime import datetime
+from pdfs.lote import contar_cotizaciones, exportar_zip
+from descargas.servidor import Descarga, servidor_activo
+from db.exportacion import FORMATOS, MARCA_FINANZAS, contar_ofertas, exportar_ofertas, guardar_marca, leer_marca
+from metricas.pagina import mostrar_performance
+from metricas.registro import medicion_actual
 
 def vista_admin(usuario_admin):
     st.subheader(f"🛠️ Panel del Administrador - {usuario_admin}")
-    opcion = st.selectbox("Selecciona una opción:", ["Ver cotizaciones", "Ver ofertas", "Asignar proveedor"])
+    opcion = st.selectbox("Selecciona una opción:", ["Ver cotizaciones", "Ver ofertas", "Asignar proveedor", "Performance"])
+    medicion = medicion_actual()
+    if medicion is not None:
+        medicion.pagina = f"admin / {opcion}"
 
-    conn = sqlite3.connect("eon.db")
+    conn = conectar()
     cursor = conn.cursor()
 
     if opcion == "Ver cotizaciones":
         st.markdown("### 📦 Cotizaciones registradas")
 
-        # Filtros
-        df = pd.read_sql_query("SELECT * FROM cotizaciones ORDER BY fecha DESC", conn)
-        df['fecha'] = pd.to_datetime(df['fecha'])
-
+        # Filtros (se aplican en SQL; solo se carga la página visible)
         with st.expander("🔍 Filtros"):
             fechas = st.date_input("Rango de fechas", [])
-            tipo_unidad = st.multiselect("Tipo de unidad", df["tipo_unidad"].unique())
+            tipo_unidad = st.multiselect("Tipo de unidad", valores_distintos(conn, "tipo_unidad"))
             cliente = st.text_input("Filtrar por cliente")
 
-        # Aplicar filtros
-        if fechas:
-            if len(fechas) == 2:
-                df = df[(df["fecha"] >= pd.to_datetime(fechas[0])) & (df["fecha"] <= pd.to_datetime(fechas[1]))]
+        filtro = FiltroCotizaciones(cliente_contiene=cliente or None, tipos_unidad=tipo_unidad)
+        if fechas and len(fechas) == 2:
+            filtro.desde, filtro.hasta = fechas[0], fechas[1]
 
-        if tipo_unidad:
-            df = df[df["tipo_unidad"].isin(tipo_unidad)]
+        exportar_pdfs_zip(conn, filtro)
 
-        if cliente:
-            df = df[df["cliente"].str.contains(cliente, case=False)]
+        df = pagina_en_sesion("pag_admin_cotizaciones", conn, "*", filtro)
 
         for idx, row in df.iterrows():
             with st.expander(f"Cotización {row['id']} - {row['cliente']} ({row['origen']} → {row['destino']})"):
@@ -56,6 +60,8 @@ def vista_admin(usuario_admin):
     elif opcion == "Ver ofertas":
         st.markdown("### 💼 Ofertas enviadas por proveedores")
 
+        exportar_ofertas_archivo(conn)
+
         df = pd.read_sql_query("""
             SELECT o.id_cotizacion, o.proveedor, o.precio_ofertado, o.mensaje, o.fecha AS fecha_oferta,
                    c.origen, c.destino, c.tipo_unidad, c.descripcion_paquete, c.cliente
@@ -85,30 +91,26 @@ def vista_admin(usuario_admin):
     elif opcion == "Asignar proveedor":
         st.markdown("### 🧾 Asignar proveedor a una cotización")
 
-        cursor.execute("""
-            SELECT c.id, c.origen, c.destino, c.tipo_unidad, c.descripcion_paquete, c.cliente
-            FROM cotizaciones c
-            WHERE proveedor_asignado IS NULL
-        """)
-        cotizaciones_disponibles = cursor.fetchall()
-
-        if cotizaciones_disponibles:
-            df_cotizaciones = pd.DataFrame(cotizaciones_disponibles, columns=["id", "origen", "destino", "tipo_unidad", "descripcion_paquete", "cliente"])
-
+        if conn.execute(
+            "SELECT 1 FROM cotizaciones WHERE proveedor_asignado IS NULL OR proveedor_asignado = '' LIMIT 1"
+        ).fetchone():
             with st.expander("🔍 Filtros"):
                 cliente_filtro = st.text_input("Filtrar por cliente")
                 origen_filtro = st.text_input("Filtrar por origen")
                 destino_filtro = st.text_input("Filtrar por destino")
-                tipo_unidad_filtro = st.multiselect("Tipo de unidad", df_cotizaciones["tipo_unidad"].unique())
-
-                if cliente_filtro:
-                    df_cotizaciones = df_cotizaciones[df_cotizaciones["cliente"].str.contains(cliente_filtro, case=False)]
-                if origen_filtro:
-                    df_cotizaciones = df_cotizaciones[df_cotizaciones["origen"].str.contains(origen_filtro, case=False)]
-                if destino_filtro:
-                    df_cotizaciones = df_cotizaciones[df_cotizaciones["destino"].str.contains(destino_filtro, case=False)]
-                if tipo_unidad_filtro:
-                    df_cotizaciones = df_cotizaciones[df_cotizaciones["tipo_unidad"].isin(tipo_unidad_filtro)]
+                tipo_unidad_filtro = st.multiselect("Tipo de unidad", valores_distintos(conn, "tipo_unidad"))
+
+            filtro = FiltroCotizaciones(
+                sin_proveedor=True,
+                cliente_contiene=cliente_filtro or None,
+                origen_contiene=origen_filtro or None,
+                destino_contiene=destino_filtro or None,
+                tipos_unidad=tipo_unidad_filtro,
+            )
+            df_cotizaciones = pagina_en_sesion(
+                "pag_admin_asignar", conn,
+                "id, origen, destino, tipo_unidad, descripcion_paquete, cliente, fecha", filtro,
+            )
 
             if df_cotizaciones.empty:
                 st.info("🔎 No hay cotizaciones pendientes con los filtros seleccionados.")
@@ -143,9 +145,10 @@ def vista_admin(usuario_admin):
                             enviar_email_cotizacion(
                                 destinatario=correo_proveedor,
                                 asunto="🚚 Nueva asignación de envío",
-                                cuerpo=f"Hola {proveedor_elegido},\n\nSe te ha asignado un nuevo envío (Cotización ID: {id_cotizacion}).\n\nRevisa el sistema.\n\nGracias,\nEon Logistics"
+                                cuerpo=f"Hola {proveedor_elegido},\n\nSe te ha asignado un nuevo envío (Cotización ID: {id_cotizacion}).\n\nRevisa el sistema.\n\nGracias,\nEon Logistics",
+                                id_cotizacion=id_cotizacion,
                             )
-                            st.info(f"📧 Correo enviado a {correo_proveedor}.")
+                            st.info(f"📧 Correo en cola para {correo_proveedor}.")
                         else:
                             st.warning("⚠️ No se encontró el correo del proveedor.")
 
@@ -166,6 +169,8 @@ def vista_admin(usuario_admin):
                             conn.commit()
                         except Exception as e:
                             st.error(f"❌ Error al generar el PDF: {e}")
+                            cursor.close()
+                            conn.close()
                             return
 
                         # Email al cliente
@@ -175,18 +180,106 @@ def vista_admin(usuario_admin):
                             correo_cliente = resultado_cliente[0]
                             enviado = enviar_email_cotizacion(
                                 destinatario=correo_cliente,
-                                archivo_pdf=archivo_pdf,
+                                adjunto=pdf_cotizacion_bytes(datos),
+                                nombre_adjunto=os.path.basename(archivo_pdf),
                                 asunto="📦 Cotización asignada - Eon Logistics",
-                                cuerpo="Tu cotización ha sido procesada y ya está siendo atendida por Eon Logistics.\n\nAdjunto encontrarás el PDF con los detalles.\n\nGracias por confiar en nosotros."
+                                cuerpo="Tu cotización ha sido procesada y ya está siendo atendida por Eon Logistics.\n\nAdjunto encontrarás el PDF con los detalles.\n\nGracias por confiar en nosotros.",
+                                id_cotizacion=id_cotizacion,
                             )
                             if enviado:
-                                st.success("📩 Correo con PDF enviado al cliente.")
+                                st.success("📩 Correo con PDF en cola para el cliente.")
                             else:
-                                st.warning("⚠️ No se pudo enviar el PDF al cliente.")
+                                st.warning("⚠️ No se pudo encolar el PDF al cliente.")
                 else:
                     st.warning("⚠️ No hay ofertas disponibles para esta cotización.")
         else:
             st.info("No hay cotizaciones pendientes por asignar.")
 
+    elif opcion == "Performance":
+        mostrar_performance()
+
     cursor.close()
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+def exportar_pdfs_zip(conn, filtro):
+    # PDF de todas las cotizaciones del filtro (no solo la página visible), en paralelo, a un ZIP en disco
+    # que se descarga por descargas/servidor.py (en trozos, sin pasar por la memoria de Streamlit)
+    if st.button("📦 Exportar PDFs del filtro a ZIP"):
+        total = contar_cotizaciones(conn, filtro)
+        if total == 0:
+            st.info("No hay cotizaciones con este filtro.")
+        else:
+            anterior = st.session_state.pop("zip_pdfs", None)
+            if anterior:
+                anterior.retirar()
+            descarga = Descarga("cotizaciones_", ".zip", f"cotizaciones_{datetime.now():%Y%m%d_%H%M}.zip", "application/zip")
+            barra = st.progress(0.0, text="Generando PDFs...")
+            try:
+                resultado = exportar_zip(conn, filtro, descarga.ruta,
+                                         al_avanzar=lambda n: barra.progress(min(n / total, 1.0), text=f"{n}/{total} PDFs"))
+            except Exception:
+                descarga.retirar()
+                raise
+            st.session_state.zip_pdfs = descarga
+            st.success(f"✅ {resultado['pdfs']} PDFs en {resultado['segundos']} s"
+                       + (f" · {resultado['errores']} con error (ver errores.txt)" if resultado["errores"] else ""))
+
+    descarga = st.session_state.get("zip_pdfs")
+    if descarga:
+        boton_descarga(descarga, "⬇️ Descargar ZIP")
+
+
+def boton_descarga(descarga, etiqueta):
+    if descarga.vencida():
+        st.caption("La descarga venció; vuelve a generarla.")
+    elif not servidor_activo():
+        st.warning("Servidor de descargas apagado (DESCARGAS_PUERTO / DESCARGAS_URL); usa la exportación por línea de comandos.")
+    elif descarga.url() is None:
+        st.warning("La app va por https: configura DESCARGAS_URL con el proxy del servidor de descargas.")
+    else:
+        st.link_button(f"{etiqueta} ({os.path.getsize(descarga.ruta) / 1e6:,.1f} MB)", descarga.url())
+
+def exportar_ofertas_archivo(conn):
+    # Ofertas con su cotización a CSV/Parquet por lotes en disco, servidas por descargas/servidor.py;
+    # la marca incremental avanza cuando el archivo se descarga completo
+    with st.expander("⬇️ Exportar ofertas para Finanzas (CSV / Parquet)"):
+        formato = st.radio("Formato", list(FORMATOS), horizontal=True, key="exportar_ofertas_formato")
+        ultimo_id, ultima_fecha, actualizado_en = leer_marca(conn, MARCA_FINANZAS)
+        incremental = st.checkbox("Solo ofertas nuevas desde la última exportación incremental", value=True)
+        if ultimo_id:
+            st.caption(f"Última exportación incremental: hasta la oferta {ultimo_id} ({ultima_fecha}), descargada {actualizado_en}")
+        desde_id = ultimo_id if incremental else 0
+
+        if st.button("Generar archivo de ofertas"):
+            total = contar_ofertas(conn, desde_id)
+            if total == 0:
+                st.info("No hay ofertas nuevas que exportar.")
+            else:
+                anterior = st.session_state.pop("export_ofertas", None)
+                if anterior:
+                    anterior.retirar()
+                mime, sufijo = FORMATOS[formato]
+                descarga = Descarga("ofertas_", sufijo, f"ofertas_{datetime.now():%Y%m%d_%H%M}{sufijo}", mime)
+                barra = st.progress(0.0, text="Exportando ofertas...")
+                try:
+                    resultado = exportar_ofertas(conn, descarga.ruta, formato, desde_id,
+                                                 al_avanzar=lambda n: barra.progress(min(n / total, 1.0), text=f"{n}/{total} ofertas"))
+                except Exception:
+                    descarga.retirar()
+                    raise
+                if incremental:
+                    descarga.al_completar = functools.partial(_avanzar_marca, resultado)
+                st.session_state.export_ofertas = descarga
+                st.success(f"✅ {resultado['filas']} ofertas en {resultado['segundos']} s")
+
+        descarga = st.session_state.get("export_ofertas")
+        if descarga:
+            boton_descarga(descarga, f"⬇️ Descargar {descarga.nombre}")
+
+
+def _avanzar_marca(resultado):
+    conn = conectar()
+    try:
+        guardar_marca(conn, MARCA_FINANZAS, resultado)
+    finally:
+        conn.close()
@@ -1,12 +1,15 @@
 import streamlit as st
 from cotizar_envio import cotizar_envio
-import sqlite3
+from db.conexion import conectar
+from db.consultas import FiltroCotizaciones, pagina_en_sesion
+from pdf_generator import pdf_cotizacion_bytes
+from pdfs.servicio import SERVICIO_PDF
 import pandas as pd
 
 def ver_ofertas_cliente(usuario_cliente):
     st.subheader("📬 Ofertas recibidas de proveedores")
 
-    conn = sqlite3.connect("eon.db")
+    conn = conectar()
 
     query = """
         SELECT o.id AS id_oferta, o.id_cotizacion, o.proveedor, o.precio_ofertado, o.mensaje, o.fecha,
@@ -28,17 +31,13 @@ def ver_ofertas_cliente(usuario_cliente):
 def ver_estado_cotizaciones(usuario_cliente):
     st.subheader("📦 Mis Cotizaciones")
 
-    conn = sqlite3.connect("eon.db")
-
-    query = """
-        SELECT id, origen, destino, distancia_km, peso_kg, tipo_unidad, descripcion_paquete, 
-               precio_total, fecha, proveedor_asignado
-        FROM cotizaciones
-        WHERE cliente = ?
-        ORDER BY fecha DESC
-    """
-
-    df = pd.read_sql_query(query, conn, params=(usuario_cliente,))
+    conn = conectar()
+    df = pagina_en_sesion(
+        "pag_mis_cotizaciones", conn,
+        "id, origen, destino, distancia_km, peso_kg, tipo_unidad, descripcion_paquete, precio_total, fecha, proveedor_asignado",
+        FiltroCotizaciones(cliente=usuario_cliente),
+        tamano=20,
+    )
     conn.close()
 
     if df.empty:
@@ -55,32 +54,38 @@ def ver_estado_cotizaciones(usuario_cliente):
 
                 if row["proveedor_asignado"]:
                     st.success("✅ Cotización en proceso por Eon Logistics")
-                    
-                    # Botón para descargar PDF
-                    from pdf_generator import generar_pdf_cotizacion
-                    datos_pdf = {
-                        "fecha": row["fecha"],
-                        "origen": row["origen"],
-                        "destino": row["destino"],
-                        "distancia": row["distancia_km"],
-                        "peso": row["peso_kg"],
-                        "descripcion_paquete": row["descripcion_paquete"],
-                        "tipo_unidad": row["tipo_unidad"],
-                        "precio_total": row["precio_total"],
-                        "cliente": usuario_cliente
-                    }
-                    archivo_pdf = generar_pdf_cotizacion(datos_pdf, f"cotizacion_{usuario_cliente}_{row['id']}.pdf")
-
-                    with open(archivo_pdf, "rb") as f:
-                        st.download_button(
-                            label="📄 Descargar PDF de cotización",
-                            data=f,
-                            file_name=archivo_pdf.split("/")[-1],
-                            mime="application/pdf"
-                        )
+                    boton_pdf_cotizacion(usuario_cliente, row)
                 else:
                     st.warning("⏳ Cotización aún sin asignar.")
 
+def boton_pdf_cotizacion(usuario_cliente, row):
+    # El PDF solo se genera al pedirlo; si ya está en la caché se descarga directo
+    datos_pdf = {
+        "fecha": row["fecha"],
+        "origen": row["origen"],
+        "destino": row["destino"],
+        "distancia": row["distancia_km"],
+        "peso": row["peso_kg"],
+        "descripcion_paquete": row["descripcion_paquete"],
+        "tipo_unidad": row["tipo_unidad"],
+        "precio_total": row["precio_total"],
+        "cliente": usuario_cliente
+    }
+    contenido = SERVICIO_PDF.en_cache("app", datos_pdf)
+    if contenido is None:
+        if not st.button("🧾 Generar PDF de cotización", key=f"pdf_cot_{row['id']}"):
+            return
+        with st.spinner("Generando PDF..."):
+            contenido = pdf_cotizacion_bytes(datos_pdf)
+
+    st.download_button(
+        label="📄 Descargar PDF de cotización",
+        data=contenido,
+        file_name=f"cotizacion_{usuario_cliente}_{row['id']}.pdf",
+        mime="application/pdf",
+        key=f"descargar_cot_{row['id']}"
+    )
+
 def vista_cliente(usuario_cliente):
     st.subheader(f"👤 Bienvenido, {usuario_cliente}")
     opcion = st.selectbox(
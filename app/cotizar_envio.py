@@ -1,8 +1,9 @@
 import streamlit as st
-import sqlite3
+from db.conexion import DB_PATH, conectar
 from datetime import date
-from pdf_generator import generar_pdf_cotizacion
+from pdf_generator import pdf_cotizacion_bytes
 import uuid
+from pricing.engine import PrecioNoDisponible, obtener_motor
 
 def cotizar_envio(usuario):
     st.subheader("📦 Cotización de Envío")
@@ -31,9 +32,10 @@ def cotizar_envio(usuario):
     )
 
     if st.button("Calcular cotización"):
-        precio_total = obtener_precio_con_margen(origen, destino, usuario, tipo_unidad)
-        if precio_total is not None:
-            st.success(f"✅ Cotización sugerida: ${precio_total:,.2f} MXN")
+        precio_total = obtener_precio_con_margen(origen, destino, usuario, tipo_unidad, peso)
+        if precio_total is None:
+            return
+        st.success(f"✅ Cotización sugerida: ${precio_total:,.2f} MXN")
 
         cotizacion_id = str(uuid.uuid4())[:8]
         estatus_url = f"https://eonlogisticgroup.com/estatus/{cotizacion_id}"
@@ -52,28 +54,9 @@ def cotizar_envio(usuario):
             "estatus_url": estatus_url
         }
 
-        conn = sqlite3.connect("eon.db")
+        conn = conectar()
         cursor = conn.cursor()
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS cotizaciones (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cotizacion_id TEXT,
-                cliente TEXT,
-                origen TEXT,
-                destino TEXT,
-                distancia_km REAL,
-                peso_kg REAL,
-                descripcion_paquete TEXT,
-                tipo_unidad TEXT,
-                precio_total REAL,
-                fecha TEXT,
-                estatus_url TEXT,
-                archivo_pdf TEXT,
-                proveedor_asignado TEXT
-            )
-        """)
-
         cursor.execute("""
             INSERT INTO cotizaciones (
                 cotizacion_id, cliente, origen, destino, distancia_km, peso_kg,
@@ -90,50 +73,17 @@ def cotizar_envio(usuario):
 
         st.success(f"✅ Cotización generada: ${precio_total:,.2f} MXN")
 
-        archivo = generar_pdf_cotizacion(datos, f"cotizacion_{usuario}.pdf")
         st.download_button(
             label="📄 Descargar cotización PDF",
-            data=open(archivo, "rb"),
-            file_name=archivo.split("/")[-1],
+            data=pdf_cotizacion_bytes(datos),
+            file_name=f"cotizacion_{usuario}.pdf",
             mime="application/pdf"
         )
 
-import os
-
-def obtener_precio_con_margen(origen, destino, cliente, unidad):
-    DB_PATH = os.path.abspath("eon.db")
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # 1. Obtener tarifa base
-    cursor.execute("SELECT tarifa_base FROM tarifas WHERE origen = ? AND destino = ?", (origen, destino))
-    resultado = cursor.fetchone()
-    if not resultado:
-        st.error("⚠️ No existe una tarifa base para esta ruta.")
-        conn.close()
+def obtener_precio_con_margen(origen, destino, cliente, unidad, peso):
+    # Misma fórmula que el portal (pricing/engine.py): margen cliente > unidad > general
+    try:
+        return obtener_motor(DB_PATH).cotizar(origen, destino, unidad, peso, cliente=cliente)
+    except PrecioNoDisponible as e:
+        st.error(f"⚠️ {e}")
         return None
-    tarifa_base = resultado[0]
-
-    # 2. Buscar margen (cliente > unidad > general)
-    margen = 0
-    cursor.execute("SELECT margen_porcentaje FROM margenes WHERE criterio = 'cliente' AND valor = ?", (cliente,))
-    res_cliente = cursor.fetchone()
-
-    if res_cliente:
-        margen = res_cliente[0]
-    else:
-        cursor.execute("SELECT margen_porcentaje FROM margenes WHERE criterio = 'unidad' AND valor = ?", (unidad,))
-        res_unidad = cursor.fetchone()
-        if res_unidad:
-            margen = res_unidad[0]
-        else:
-            cursor.execute("SELECT margen_porcentaje FROM margenes WHERE criterio = 'general' AND valor = 'General'")
-            res_general = cursor.fetchone()
-            if res_general:
-                margen = res_general[0]
-
-    conn.close()
-
-    # 3. Calcular precio final
-    precio_final = tarifa_base * (1 + margen / 100)
-    return precio_final
\ No newline at end of file
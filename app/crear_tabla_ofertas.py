@@ -1,20 +1,12 @@
-import sqlite3
+import os
+import sys
 
-conn = sqlite3.connect("eon.db")
-cursor = conn.cursor()
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS ofertas (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    id_cotizacion INTEGER,
-    proveedor TEXT,
-    precio_ofertado REAL,
-    mensaje TEXT,
-    fecha TEXT DEFAULT (DATE('now')),
-    FOREIGN KEY (id_cotizacion) REFERENCES cotizaciones(id)
-)
-""")
+from db.migraciones import asegurar_esquema
 
-conn.commit()
-conn.close()
+# La tabla 'ofertas' forma parte del esquema versionado (db/esquema.py)
+asegurar_esquema()
 print("✅ Tabla 'ofertas' creada correctamente.")
\ No newline at end of file
@@ -1,18 +1,5 @@
-import sqlite3
+from db.migraciones import asegurar_esquema
 
 def crear_tablas():
-    conn = sqlite3.connect("eon.db")
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT NOT NULL,
-            correo TEXT UNIQUE NOT NULL,
-            contraseña TEXT NOT NULL,
-            rol TEXT CHECK(rol IN ('admin', 'cliente', 'proveedor')) NOT NULL
-        )
-    ''')
-
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    # El esquema completo (usuarios incluido) vive en db/esquema.py
+    asegurar_esquema()
\ No newline at end of file
@@ -1,7 +1,15 @@
+import os
 import sqlite3
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db.conexion import conectar
 
 # Conectarse a la base de datos principal
-conn = sqlite3.connect("eon.db")
+conn = conectar()
 cursor = conn.cursor()
 
 usuarios = [
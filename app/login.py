@@ -1,6 +1,7 @@
 import streamlit as st
-import sqlite3
+from db.conexion import conectar
 from cotizar_envio import cotizar_envio
+from metricas.registro import medir_pagina
 
 def mostrar_login():
     if "usuario" not in st.session_state:
@@ -9,7 +10,7 @@ def mostrar_login():
         contraseña = st.text_input("Contraseña", type="password")
 
         if st.button("Ingresar"):
-            conn = sqlite3.connect("eon.db")
+            conn = conectar()
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM usuarios WHERE correo = ? AND contraseña = ?", (correo, contraseña))
             usuario = cursor.fetchone()
@@ -25,17 +26,18 @@ def mostrar_login():
     else:
         st.success(f"👋 Bienvenido, {st.session_state.usuario}")
 
-        if st.session_state.rol == "cliente":
-            from cliente import vista_cliente
-            vista_cliente(st.session_state.usuario)
+        with medir_pagina("app", st.session_state.rol):
+            if st.session_state.rol == "cliente":
+                from cliente import vista_cliente
+                vista_cliente(st.session_state.usuario)
 
-        elif st.session_state.rol == "admin":
-            from admin import vista_admin
-            vista_admin(st.session_state.usuario)
+            elif st.session_state.rol == "admin":
+                from admin import vista_admin
+                vista_admin(st.session_state.usuario)
 
-        elif st.session_state.rol == "proveedor":
-            from proveedor import vista_proveedor
-            vista_proveedor(st.session_state.usuario)
+            elif st.session_state.rol == "proveedor":
+                from proveedor import vista_proveedor
+                vista_proveedor(st.session_state.usuario)
 
         if st.button("Cerrar sesión"):
             st.session_state.clear()
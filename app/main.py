@@ -1,9 +1,26 @@
+import os
+import sys
 import streamlit as st
+
+# Raíz del repo en sys.path para los paquetes compartidos (db, pricing)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db.migraciones import asegurar_esquema
+from correo.outbox import iniciar_enviador
+from descargas.servidor import iniciar_servidor_descargas
+from metricas.registro import iniciar_servidor, instalar_pandas
 from login import mostrar_login
 
 st.set_page_config(page_title="Broker Eon", page_icon="📦", layout="centered")
 
 def main():
+    asegurar_esquema()
+    iniciar_enviador()
+    instalar_pandas()
+    iniciar_servidor()
+    iniciar_servidor_descargas()
     st.title("📦 Sistema de Cotizaciones - Eon Logistics")
     mostrar_login()
 
@@ -1,12 +1,12 @@
 import streamlit as st
-import sqlite3
+from db.conexion import conectar
 import pandas as pd
 from datetime import date
 
 def ofertar(usuario_proveedor):
     st.subheader("📢 Ofertar sobre cotizaciones disponibles")
 
-    conn = sqlite3.connect("eon.db")
+    conn = conectar()
     cursor = conn.cursor()
 
     # Consulta cotizaciones aún no ofertadas por este proveedor
@@ -38,6 +38,7 @@ def ofertar(usuario_proveedor):
         """, (id_cotizacion, usuario_proveedor, precio_ofertado, mensaje, str(date.today())))
         conn.commit()
         st.success("✅ Oferta enviada con éxito.")
+        conn.close()
         st.rerun()
 
     conn.close()
@@ -1,33 +1,19 @@
-import os
-import smtplib
-from email.message import EmailMessage
-from dotenv import load_dotenv
+from correo.outbox import encolar
 
-load_dotenv()
+ASUNTO = "📦 Tu cotización ha sido asignada - Eon Logistics"
+CUERPO = (
+    "Tu cotización ha sido procesada y ya está siendo atendida por Eon Logistics.\n\n"
+    "Adjunto encontrarás el PDF con los detalles.\n\n"
+    "Gracias por confiar en nosotros."
+)
 
-EMAIL = os.getenv("EMAIL")
-PASSWORD = os.getenv("PASSWORD")
-
-def enviar_email_cotizacion(destinatario, archivo_pdf):
+def enviar_email_cotizacion(destinatario, archivo_pdf=None, asunto=ASUNTO, cuerpo=CUERPO, id_cotizacion=None,
+                            adjunto=None, nombre_adjunto=None):
+    """Encola el correo; el enviador de fondo (correo/outbox.py) lo manda con reintentos."""
     try:
-        mensaje = EmailMessage()
-        mensaje["Subject"] = "📦 Tu cotización ha sido asignada - Eon Logistics"
-        mensaje["From"] = EMAIL
-        mensaje["To"] = destinatario
-        mensaje.set_content(
-            "Tu cotización ha sido procesada y ya está siendo atendida por Eon Logistics.\n\n"
-            "Adjunto encontrarás el PDF con los detalles.\n\n"
-            "Gracias por confiar en nosotros."
-        )
-
-        with open(archivo_pdf, "rb") as f:
-            mensaje.add_attachment(f.read(), maintype="application", subtype="pdf", filename=archivo_pdf)
-
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
-            smtp.login(EMAIL, PASSWORD)
-            smtp.send_message(mensaje)
-
+        encolar(destinatario, asunto, cuerpo, archivo_pdf, id_cotizacion=id_cotizacion,
+                adjunto=adjunto, nombre_adjunto=nombre_adjunto)
         return True
     except Exception as e:
-        print("❌ Error al enviar correo:", e)
-        return False
\ No newline at end of file
+        print("❌ Error al encolar correo:", e)
+        return False
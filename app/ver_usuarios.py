@@ -1,7 +1,14 @@
-import sqlite3
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db.conexion import conectar
 
 # Conectarse a la base de datos
-conn = sqlite3.connect("eon.db")
+conn = conectar()
 cursor = conn.cursor()
 
 # Obtener todos los usuarios
@@ -0,0 +1,216 @@
+# benchmarks/datos_sinteticos.py
+"""
+Genera un eon.db sintético con la forma de producción a la escala que se pida:
+usuarios (admin, clientes, proveedores), tarifas entre ciudades, margenes por
+cliente/unidad/general, bandas contiguas de margenes_peso, rutas por proveedor,
+cotizaciones repartidas en el tiempo con sus estatus y ofertas de proveedores
+que cubren la ruta. Misma semilla y escala -> mismo archivo.
+
+    python -m benchmarks.datos_sinteticos --salida /tmp/eon.db --escala mediana [--cotizaciones 500000]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import date, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db.conexion import conectar
+from db.migraciones import asegurar_esquema
+
+CIUDADES = [
+    "Monterrey", "CDMX", "Guadalajara", "Querétaro", "Puebla", "Tijuana", "Mérida", "León",
+    "Saltillo", "Chihuahua", "Hermosillo", "Veracruz", "San Luis Potosí", "Aguascalientes",
+    "Toluca", "Culiacán", "Cancún", "Morelia", "Torreón", "Reynosa", "Nuevo Laredo", "Mexicali",
+    "Oaxaca", "Tampico", "Durango", "Zacatecas", "Villahermosa", "Irapuato", "Celaya", "Manzanillo",
+]
+# Los mismos nombres que ofrece el selectbox de "Nueva Cotización (Manual)"
+UNIDADES = ["Camioneta", "Camión 3.5t", "Tráiler", "Caja Seca", "Caja Refrigerada"]
+DESCRIPCIONES = [
+    "Tarimas con mercancía general", "Refacciones automotrices", "Electrodomésticos",
+    "Producto perecedero", "Material de construcción", "Cajas de e-commerce",
+]
+# Estatus de las cotizaciones con proveedor; el resto queda "Pendiente por asignar"
+ESTATUS_ASIGNADAS = [("Asignado", 0.25), ("En tránsito", 0.25), ("Entregado", 0.5)]
+
+LOTE_INSERT = 5000
+
+
+@dataclass(frozen=True)
+class Escala:
+    clientes: int = 50
+    proveedores: int = 20
+    ciudades: int = 10                   # tarifas = ciudades × (ciudades - 1)
+    rutas_por_proveedor: int = 15        # (origen, destino, unidad) que cubre cada proveedor
+    bandas_peso: int = 8
+    cotizaciones: int = 5000
+    ofertas_por_cotizacion: float = 3.0  # promedio, entre los proveedores que cubren la ruta
+    pendientes: float = 0.3              # fracción sin proveedor asignado
+    dias: int = 365                      # historia hacia atrás desde `hasta`
+
+
+ESCALAS = {
+    "chica": Escala(clientes=20, proveedores=10, ciudades=8, cotizaciones=2000),
+    "mediana": Escala(),
+    "grande": Escala(clientes=500, proveedores=120, ciudades=30, rutas_por_proveedor=60,
+                     cotizaciones=200_000, dias=730),
+}
+
+
+def _bandas(n: int) -> list[tuple]:
+    # Contiguas, sin traslape: [0, 10], (10, 25], ... con margen decreciente
+    limites = [0.0] + [round(10 * 2.5 ** i, 2) for i in range(n)]
+    return [(lo if i == 0 else lo + 0.01, hi, round(12 - 10 * i / max(n - 1, 1), 2))
+            for i, (lo, hi) in enumerate(zip(limites, limites[1:]))]
+
+
+def _margen_banda(bandas, peso):
+    for lo, hi, m in bandas:
+        if lo <= peso <= hi:
+            return m
+    return bandas[-1][2]
+
+
+def generar_db(ruta: str, escala: Escala = ESCALAS["mediana"], semilla: int = 7,
+               hasta: date | None = None) -> dict:
+    """Crea `ruta` desde cero (la borra si existe) y devuelve cuántas filas tiene cada tabla."""
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+    asegurar_esquema(ruta)
+    rnd = random.Random(semilla)
+    hasta = hasta or date(2025, 1, 1)
+    ciudades = CIUDADES[:escala.ciudades]
+    clientes = [f"Cliente {i:04d}" for i in range(escala.clientes)]
+    proveedores = [f"Proveedor {i:03d}" for i in range(escala.proveedores)]
+
+    conn = conectar(ruta)
+    try:
+        conn.executemany(
+            "INSERT INTO usuarios (nombre, correo, contraseña, rol) VALUES (?, ?, ?, ?)",
+            [("Admin", "admin@eon.com", "admin", "admin")]
+            + [(c, f"cliente{i}@correo.com", "x", "cliente") for i, c in enumerate(clientes)]
+            + [(p, f"proveedor{i}@correo.com", "x", "proveedor") for i, p in enumerate(proveedores)],
+        )
+
+        tarifas = {(o, d): round(rnd.uniform(2.5, 18.0), 2) for o in ciudades for d in ciudades if o != d}
+        conn.executemany("INSERT INTO tarifas (origen, destino, tarifa_base) VALUES (?, ?, ?)",
+                         [(o, d, t) for (o, d), t in tarifas.items()])
+
+        margenes = {("general", "General"): 15.0}
+        margenes.update({("unidad", u): round(rnd.uniform(8, 25), 1) for u in UNIDADES})
+        # Una décima parte de los clientes con margen negociado
+        margenes.update({("cliente", c): round(rnd.uniform(5, 12), 1) for c in clientes[::10]})
+        conn.executemany("INSERT INTO margenes (criterio, valor, margen_porcentaje) VALUES (?, ?, ?)",
+                         [(cr, v, m) for (cr, v), m in margenes.items()])
+
+        bandas = _bandas(escala.bandas_peso)
+        conn.executemany("INSERT INTO margenes_peso (rango_min, rango_max, margen_porcentaje) VALUES (?, ?, ?)", bandas)
+
+        # Rutas y clientes con distribución sesgada (unas pocas concentran el volumen);
+        # los proveedores cubren sobre todo las rutas con más movimiento
+        rutas = list(tarifas)
+        peso_ruta = [1 / (i + 1) for i in range(len(rutas))]
+        peso_cliente = [1 / math.sqrt(i + 1) for i in range(len(clientes))]
+        cobertura: dict[tuple, list] = {}
+        filas_rutas = []
+        for p in proveedores:
+            for _ in range(escala.rutas_por_proveedor):
+                o, d = rnd.choices(rutas, peso_ruta)[0]
+                u = rnd.choice(UNIDADES)
+                factor = round(rnd.uniform(0.75, 0.98), 3)
+                if any(prov == p for prov, _ in cobertura.get((o, d, u), [])):
+                    continue
+                filas_rutas.append((p, o, d, u, factor))
+                cobertura.setdefault((o, d, u), []).append((p, factor))
+        conn.executemany(
+            "INSERT INTO proveedores_rutas (proveedor, origen, destino, tipo_unidad, factor_precio) VALUES (?, ?, ?, ?, ?)",
+            filas_rutas,
+        )
+        conn.commit()
+
+        n_ofertas = 0
+        for inicio in range(0, escala.cotizaciones, LOTE_INSERT):
+            # Base nueva: los id de cotizaciones son 1..n en orden de inserción
+            cotizaciones, ofertas = [], []
+            for i in range(inicio, min(inicio + LOTE_INSERT, escala.cotizaciones)):
+                o, d = rnd.choices(rutas, peso_ruta)[0]
+                u = rnd.choice(UNIDADES)
+                cliente = rnd.choices(clientes, peso_cliente)[0]
+                peso = round(min(rnd.lognormvariate(4.5, 1.2), bandas[-1][1]), 1)
+                margen = margenes.get(("cliente", cliente), margenes[("unidad", u)])
+                precio = round(tarifas[(o, d)] * peso * (1 + margen / 100) * (1 + _margen_banda(bandas, peso) / 100), 2)
+                fecha = str(hasta - timedelta(days=int(escala.dias * rnd.random() ** 1.5)))
+                candidatos = cobertura.get((o, d, u), [])
+
+                proveedor, estatus = None, "Pendiente por asignar"
+                if rnd.random() >= escala.pendientes:
+                    proveedor = rnd.choice(candidatos)[0] if candidatos else rnd.choice(proveedores)
+                    estatus = rnd.choices([e for e, _ in ESTATUS_ASIGNADAS], [w for _, w in ESTATUS_ASIGNADAS])[0]
+                cotizacion_id = f"{rnd.getrandbits(32):08x}"
+                cotizaciones.append((
+                    cotizacion_id, cliente, o, d, rnd.randint(50, 2200), peso, rnd.choice(DESCRIPCIONES), u,
+                    precio, fecha, f"https://eonlogisticgroup.com/estatus/{cotizacion_id}", proveedor, estatus,
+                ))
+
+                if candidatos:
+                    k = min(len(candidatos), int(rnd.expovariate(1 / escala.ofertas_por_cotizacion) + 0.5))
+                    for p, factor in rnd.sample(candidatos, k):
+                        ofertas.append((i + 1, p, round(precio * factor * rnd.uniform(0.95, 1.05), 2),
+                                        "Oferta automática", fecha))
+
+            conn.executemany("""
+                INSERT INTO cotizaciones (cotizacion_id, cliente, origen, destino, distancia_km, peso_kg,
+                                          descripcion_paquete, tipo_unidad, precio_total, fecha, estatus_url,
+                                          proveedor_asignado, estatus)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, cotizaciones)
+            conn.executemany(
+                "INSERT INTO ofertas (id_cotizacion, proveedor, precio_ofertado, mensaje, fecha) VALUES (?, ?, ?, ?, ?)",
+                ofertas,
+            )
+            n_ofertas += len(ofertas)
+            conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    return {
+        "usuarios": 1 + len(clientes) + len(proveedores),
+        "tarifas": len(tarifas),
+        "margenes": len(margenes),
+        "margenes_peso": len(bandas),
+        "proveedores_rutas": len(filas_rutas),
+        "cotizaciones": escala.cotizaciones,
+        "ofertas": n_ofertas,
+    }
+
+
+def escala_desde_args(args) -> Escala:
+    """Preset de --escala con los campos que se hayan pasado explícitamente encima."""
+    cambios = {campo: getattr(args, campo) for campo in asdict(ESCALAS["mediana"]) if getattr(args, campo, None) is not None}
+    return replace(ESCALAS[args.escala], **cambios)
+
+
+def agregar_args_escala(ap: argparse.ArgumentParser):
+    ap.add_argument("--escala", choices=list(ESCALAS), default="mediana")
+    ap.add_argument("--semilla", type=int, default=7)
+    for campo, valor in asdict(ESCALAS["mediana"]).items():
+        ap.add_argument(f"--{campo.replace('_', '-')}", dest=campo, type=type(valor), default=None)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Genera un eon.db sintético")
+    ap.add_argument("--salida", required=True)
+    agregar_args_escala(ap)
+    args = ap.parse_args()
+    escala = escala_desde_args(args)
+    t0 = time.perf_counter()
+    filas = generar_db(args.salida, escala, args.semilla)
+    print(f"{args.salida} en {time.perf_counter() - t0:.1f} s: {filas}")
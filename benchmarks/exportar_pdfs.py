@@ -0,0 +1,111 @@
+# benchmarks/exportar_pdfs.py
+"""
+Throughput de la exportación masiva de PDF a ZIP: un PDF a la vez con todo en
+memoria y el ZIP armado al final (lo que costaría hacerlo desde la página) contra
+pdfs/lote.py (pool de procesos por lotes, ZIP escrito en flujo).
+
+    python -m benchmarks.exportar_pdfs --cotizaciones 10000 --workers 1 2 4
+
+"memoria" es el pico de tracemalloc en el proceso que arma el ZIP (en una segunda
+pasada, sin medir tiempo); los workers del pool solo retienen el lote que están
+renderizando.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db.conexion import conectar
+from db.consultas import FiltroCotizaciones
+from db.migraciones import asegurar_esquema
+from pdfs.lote import datos_pdf, exportar_zip, lotes_cotizaciones, nombre_pdf
+from pdfs.plantillas import cotizacion_app
+
+CIUDADES = ["Monterrey", "CDMX", "Guadalajara", "Querétaro", "Puebla", "Tijuana", "Mérida", "León"]
+UNIDADES = ["Camioneta", "Camión 3.5 t", "Tráiler", "Caja seca", "Caja refrigerada"]
+
+
+def preparar_db(ruta: str, n: int):
+    asegurar_esquema(ruta)
+    rnd = random.Random(7)
+    conn = conectar(ruta)
+    conn.executemany("""
+        INSERT INTO cotizaciones (cotizacion_id, cliente, origen, destino, distancia_km, peso_kg, tipo_unidad,
+                                  descripcion_paquete, precio_total, fecha, proveedor_asignado)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (f"{i:08x}", f"cliente{i % 300}", *rnd.sample(CIUDADES, 2), rnd.randint(50, 2000),
+         round(rnd.uniform(1, 5000), 1), rnd.choice(UNIDADES), "Tarimas con mercancía general",
+         round(rnd.uniform(800, 90000), 2), f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}", "Proveedor")
+        for i in range(n)
+    ])
+    conn.commit()
+    conn.close()
+
+
+def secuencial_en_memoria(conn, filtro) -> bytes:
+    pdfs = []
+    for filas in lotes_cotizaciones(conn, filtro):
+        for fila in filas:
+            pdfs.append((nombre_pdf(fila), cotizacion_app(datos_pdf(fila))))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for nombre, contenido in pdfs:
+            zf.writestr(nombre, contenido)
+    return buffer.getvalue()
+
+
+def _medir(fn):
+    # Dos pasadas: tracemalloc frena las asignaciones y castigaría al escenario
+    # que renderiza en este mismo proceso
+    t0 = time.perf_counter()
+    fn()
+    segundos = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos, pico
+
+
+def correr(n=10000, workers=(1, 2, 4)):
+    resultados = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_db = os.path.join(tmp, "eon.db")
+        preparar_db(ruta_db, n)
+        conn = conectar(ruta_db)
+        filtro = FiltroCotizaciones()
+        try:
+            segundos, pico = _medir(lambda: secuencial_en_memoria(conn, filtro))
+            resultados["secuencial_en_memoria"] = {"segundos": segundos, "memoria": pico, "zip": None}
+            for w in workers:
+                ruta_zip = os.path.join(tmp, f"salida_{w}.zip")
+                segundos, pico = _medir(lambda: exportar_zip(conn, filtro, ruta_zip, workers=w))
+                resultados[f"pool_{w}_workers"] = {"segundos": segundos, "memoria": pico,
+                                                   "zip": os.path.getsize(ruta_zip)}
+        finally:
+            conn.close()
+    for r in resultados.values():
+        r["pdfs_s"] = n / r["segundos"]
+    return resultados
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cotizaciones", type=int, default=10000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = ap.parse_args()
+    print(f"{args.cotizaciones} cotizaciones · {os.cpu_count()} CPU")
+    for nombre, r in correr(args.cotizaciones, args.workers).items():
+        zip_mb = f"{r['zip'] / 1e6:.1f} MB" if r["zip"] else "-"
+        print(f"{nombre:>22}: {r['segundos']:>7.1f} s  ·  {r['pdfs_s']:>6.0f} PDF/s  ·  "
+              f"memoria {r['memoria'] / 1e6:>7.1f} MB  ·  zip {zip_mb}")
@@ -0,0 +1,96 @@
+# benchmarks/ofertas.py
+"""
+Throughput de generación de ofertas automáticas: loop por proveedor (versión
+anterior de nueva_cotizacion_manual) contra INSERT ... SELECT por lote.
+
+    python -m benchmarks.ofertas --cotizaciones 10000 --proveedores 50
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from pricing.ofertas import generar_ofertas_automaticas
+
+ORIGEN, DESTINO, UNIDAD = "Monterrey", "CDMX", "Tráiler"
+
+
+def _preparar_db(ruta, n_cotizaciones, n_proveedores, rutas_extra=200):
+    conn = sqlite3.connect(ruta)
+    conn.executescript("""
+        CREATE TABLE cotizaciones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, cotizacion_id TEXT, cliente TEXT,
+            origen TEXT, destino TEXT, tipo_unidad TEXT, precio_total REAL, fecha TEXT
+        );
+        CREATE TABLE proveedores_rutas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, proveedor TEXT, origen TEXT,
+            destino TEXT, tipo_unidad TEXT, factor_precio REAL
+        );
+        CREATE INDEX idx_proveedores_rutas_ruta ON proveedores_rutas (origen, destino, tipo_unidad);
+        CREATE TABLE ofertas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, id_cotizacion INTEGER, proveedor TEXT,
+            precio_ofertado REAL, mensaje TEXT, fecha TEXT
+        );
+    """)
+    conn.executemany(
+        "INSERT INTO proveedores_rutas (proveedor, origen, destino, tipo_unidad, factor_precio) VALUES (?, ?, ?, ?, ?)",
+        [(f"Proveedor {i}", ORIGEN, DESTINO, UNIDAD, 0.85 + i / 1000) for i in range(n_proveedores)]
+        + [(f"Otro {i}", f"Origen {i}", DESTINO, UNIDAD, 0.9) for i in range(rutas_extra)],
+    )
+    conn.executemany(
+        "INSERT INTO cotizaciones (cotizacion_id, cliente, origen, destino, tipo_unidad, precio_total, fecha) VALUES (?, ?, ?, ?, ?, ?, DATE('now'))",
+        [(f"c{i:07d}", "Cliente", ORIGEN, DESTINO, UNIDAD, 1000.0 + i) for i in range(n_cotizaciones)],
+    )
+    conn.commit()
+    return conn
+
+
+def _loop_por_proveedor(conn):
+    c = conn.cursor()
+    cotizaciones = c.execute("SELECT id, origen, destino, tipo_unidad, precio_total FROM cotizaciones").fetchall()
+    for id_cot, origen, destino, tipo_unidad, precio_total in cotizaciones:
+        c.execute("""
+            SELECT proveedor, factor_precio FROM proveedores_rutas
+            WHERE origen = ? AND destino = ? AND tipo_unidad = ?
+        """, (origen, destino, tipo_unidad))
+        for proveedor, factor in c.fetchall():
+            c.execute("""
+                INSERT INTO ofertas (id_cotizacion, proveedor, precio_ofertado, mensaje, fecha)
+                VALUES (?, ?, ?, ?, DATE('now'))
+            """, (id_cot, proveedor, precio_total * factor, f"Oferta automática generada para {proveedor}"))
+    conn.commit()
+
+
+def _insert_select(conn):
+    id_min, id_max = conn.execute("SELECT MIN(id), MAX(id) FROM cotizaciones").fetchone()
+    generar_ofertas_automaticas(conn, id_min, id_max)
+    conn.commit()
+
+
+def correr(n_cotizaciones=10_000, n_proveedores=50):
+    resultados = {}
+    for nombre, fn in (("loop_por_proveedor", _loop_por_proveedor), ("insert_select", _insert_select)):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = _preparar_db(os.path.join(tmp, "bench.db"), n_cotizaciones, n_proveedores)
+            t0 = time.perf_counter()
+            fn(conn)
+            dt = time.perf_counter() - t0
+            n = conn.execute("SELECT COUNT(*) FROM ofertas").fetchone()[0]
+            conn.close()
+        resultados[nombre] = {"ofertas": n, "segundos": round(dt, 3), "ofertas_por_s": round(n / dt)}
+    return resultados
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cotizaciones", type=int, default=10_000)
+    ap.add_argument("--proveedores", type=int, default=50)
+    args = ap.parse_args()
+    for nombre, r in correr(args.cotizaciones, args.proveedores).items():
+        print(f"{nombre:>20}: {r['ofertas']:>9,} ofertas en {r['segundos']:>7.3f} s  ({r['ofertas_por_s']:,} ofertas/s)")
@@ -0,0 +1,151 @@
+# benchmarks/ofertas_dhl.py
+"""
+Parseo de respuestas grandes de DHL /rates y memoria que queda en la sesión:
+dicts con el producto completo en "raw" + dhl_raw_json (versión anterior de
+cotizar_dhl_api_ui) contra Oferta con __slots__ y el detalle guardado por hash.
+
+    python -m benchmarks.ofertas_dhl --productos 40 --repeticiones 200
+
+"sesión" es lo que retiene cada session_state. El detalle de la versión nueva vive
+una sola vez por respuesta distinta en carriers/detalle.py (acotado a
+DETALLE_MAX_RESPUESTAS y compartido por todas las sesiones), así que no se cuenta.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from carriers.dhl_client import normalizar_ofertas_dhl
+
+
+def respuesta_sintetica(n_productos: int) -> dict:
+    """Respuesta con la forma de MyDHL /rates: precios por moneda, desgloses y capacidades."""
+    productos = []
+    for i in range(n_productos):
+        base = 150.0 + 12.5 * i
+        desglose = [
+            {"typeCode": t, "price": round(base * f, 2), "priceBreakdown": [
+                {"typeCode": "STDIS", "percentage": 5.0, "price": round(base * f * 0.05, 2)},
+                {"typeCode": "TAX", "percentage": 16.0, "price": round(base * f * 0.16, 2)},
+            ]}
+            for t, f in (("SPRQT", 1.0), ("FF", 0.18), ("II", 0.02), ("YY", 0.04))
+        ]
+        productos.append({
+            "productName": f"EXPRESS DOMESTIC {i}",
+            "productCode": f"P{i}",
+            "localProductCode": f"L{i}",
+            "localProductCountryCode": "MX",
+            "networkTypeCode": "TD",
+            "isCustomerAgreement": False,
+            "weight": {"volumetric": 0.2, "provided": 5.0, "unitOfMeasurement": "metric"},
+            "totalPrice": [
+                {"currencyType": "BILLC", "priceCurrency": "MXN", "price": base * 1.24},
+                {"currencyType": "PULCL", "priceCurrency": "USD", "price": base * 1.24 / 17},
+                {"currencyType": "BASEC", "priceCurrency": "EUR", "price": base * 1.24 / 19},
+            ],
+            "totalPriceBreakdown": [
+                {"currencyType": c, "priceCurrency": m, "priceBreakdown": desglose}
+                for c, m in (("BILLC", "MXN"), ("PULCL", "USD"), ("BASEC", "EUR"))
+            ],
+            "detailedPriceBreakdown": [
+                {"currencyType": "BILLC", "priceCurrency": "MXN", "breakdown": [
+                    {"name": f"CARGO {j}", "serviceCode": f"S{j}", "localServiceCode": f"S{j}",
+                     "typeCode": "FUEL", "serviceTypeCode": "FF", "price": 10.0 + j,
+                     "isCustomerAgreement": False, "isMarketedService": False,
+                     "priceBreakdown": [{"priceType": "TAX", "typeCode": "IVA", "price": 1.6 + j, "rate": 16.0, "basePrice": 10.0 + j}]}
+                    for j in range(12)
+                ]}
+            ],
+            "pickupCapabilities": {"nextBusinessDay": False, "localCutoffDateAndTime": "2024-01-01T18:00:00",
+                                   "GMTCutoffTime": "18:00:00", "pickupEarliest": "09:00:00", "pickupLatest": "18:00:00",
+                                   "originServiceAreaCode": "MTY", "originFacilityAreaCode": "MTY", "pickupAdditionalDays": 0,
+                                   "pickupDayOfWeek": 1},
+            "deliveryCapabilities": {"deliveryTypeCode": "QDDC", "estimatedDeliveryDateAndTime": "2024-01-02T23:59:00",
+                                     "destinationServiceAreaCode": "MEX", "destinationFacilityAreaCode": "MEX",
+                                     "deliveryAdditionalDays": 0, "deliveryDayOfWeek": 2, "totalTransitDays": str(1 + i % 4)},
+            "items": [{"number": 1, "breakdown": desglose}],
+            "pricingDate": "2024-01-01",
+        })
+    return {"products": productos, "exchangeRates": [{"currentExchangeRate": 17.0, "currency": "USD", "baseCurrency": "MXN"}]}
+
+
+def _normalizar_anterior(data_json: dict) -> list[dict]:
+    # Copia de normalizar_ofertas_dhl antes de Oferta: cada dict arrastra el producto completo
+    ofertas = []
+    for p in data_json.get("products") or []:
+        total_prices = p.get("totalPrice") or []
+        price_mxn = next((x for x in total_prices if (x or {}).get("priceCurrency") == "MXN"), None)
+        price_any = price_mxn or (total_prices[0] if total_prices else None)
+        deliv = p.get("deliveryCapabilities") or {}
+        etd_days = deliv.get("totalTransitDays")
+        ofertas.append({
+            "productCode": p.get("productCode"),
+            "productName": p.get("productName"),
+            "totalPrice": float(price_any["price"]),
+            "currency": price_any.get("priceCurrency") or "MXN",
+            "eta": deliv.get("estimatedDeliveryDateAndTime"),
+            "etd_days": int(etd_days) if str(etd_days).isdigit() else None,
+            "raw": p,
+        })
+    ofertas.sort(key=lambda x: x["totalPrice"])
+    return ofertas
+
+
+def _medir(fn, data, repeticiones):
+    t0 = time.perf_counter()
+    for _ in range(repeticiones):
+        fn(data)
+    return (time.perf_counter() - t0) / repeticiones
+
+
+def _memoria(construir):
+    """Bytes que retiene lo que construir() deja en la sesión (tracemalloc) y su tamaño en pickle."""
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    sesion = construir()
+    despues = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retenido = sum(s.size_diff for s in despues.compare_to(antes, "filename"))
+    return retenido, len(pickle.dumps(sesion))
+
+
+def correr(n_productos=40, repeticiones=200):
+    # Cada sesión recibe su propia respuesta (requests.json() crea objetos nuevos)
+    def sesion_anterior():
+        data = respuesta_sintetica(n_productos)
+        return {"dhl_raw_json": data, "dhl_ofertas": _normalizar_anterior(data)}
+
+    def sesion_nueva():
+        data = respuesta_sintetica(n_productos)
+        # La respuesta se descarta al salir; solo las Oferta quedan en session_state
+        return {"dhl_ofertas": normalizar_ofertas_dhl(data)}
+
+    data = respuesta_sintetica(n_productos)
+    resultados = {}
+    for nombre, parsear, sesion in (
+        ("dicts_con_raw", _normalizar_anterior, sesion_anterior),
+        ("oferta_slots", normalizar_ofertas_dhl, sesion_nueva),
+    ):
+        segundos = _medir(parsear, data, repeticiones)
+        retenido, en_pickle = _memoria(sesion)
+        resultados[nombre] = {
+            "parseo_ms": round(segundos * 1000, 3),
+            "sesion_bytes": retenido,
+            "pickle_bytes": en_pickle,
+        }
+    return resultados
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--productos", type=int, default=40)
+    ap.add_argument("--repeticiones", type=int, default=200)
+    args = ap.parse_args()
+    for nombre, r in correr(args.productos, args.repeticiones).items():
+        print(f"{nombre:>14}: parseo {r['parseo_ms']:>8.3f} ms  ·  sesión {r['sesion_bytes']:>10,} B  ·  pickle {r['pickle_bytes']:>10,} B")
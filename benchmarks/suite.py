@@ -0,0 +1,332 @@
+# benchmarks/suite.py
+"""
+Suite reproducible: genera un eon.db sintético (benchmarks/datos_sinteticos.py),
+corre los escenarios cronometrados y escribe un JSON para comparar entre versiones.
+
+    python -m benchmarks.suite --escala mediana --salida resultados.json
+    python -m benchmarks.suite --escala grande --cotizaciones 500000 --solo pendientes dashboard_kpi
+    python -m benchmarks.suite --comparar base.json resultados.json
+
+Cada repetición corre dentro de metricas.medir_pagina, así que además del tiempo
+queda cuántas sentencias SQL y cuántos bytes de DataFrame costó. Los escenarios
+que escriben van al final para no cambiar los datos que leen los demás.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import asdict
+from datetime import date, datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from benchmarks.datos_sinteticos import UNIDADES, agregar_args_escala, escala_desde_args, generar_db
+from db import agregados
+from db.conexion import conectar
+from db.consultas import FiltroCotizaciones, pagina_cotizaciones
+from db.exportacion import exportar_ofertas, ultimo_id_ofertas
+from metricas.registro import instalar_pandas, medir_pagina
+from pdfs.lote import COLUMNAS, datos_pdf
+from pdfs.plantillas import PLANTILLAS
+from pdfs.servicio import ServicioPDF
+from pricing.bandas import repreciar_historial
+from pricing.engine import invalidar_motor, obtener_motor
+from pricing.ofertas import generar_ofertas_automaticas
+from pricing.simulador import Propuesta, simular
+
+COLUMNAS_PENDIENTES = (
+    "id, cotizacion_id, cliente, origen, destino, tipo_unidad, descripcion_paquete, precio_total, fecha, proveedor_asignado"
+)
+
+
+class Contexto:
+    """Lo que comparten los escenarios: la base, una conexión y muestras de la base para variar entradas."""
+
+    def __init__(self, db_path: str, semilla: int, dhl_url: str | None = None):
+        self.db_path = db_path
+        self.rnd = random.Random(semilla)
+        self.conn = conectar(db_path)
+        self.rutas = self.conn.execute("SELECT origen, destino FROM tarifas").fetchall()
+        self.clientes = [f[0] for f in self.conn.execute("SELECT nombre FROM usuarios WHERE rol = 'cliente'")]
+        self.filas_pdf = [dict(zip(COLUMNAS.split(", "), f)) for f in self.conn.execute(
+            f"SELECT {COLUMNAS} FROM cotizaciones ORDER BY id DESC LIMIT 200")]
+        self.dhl_url = dhl_url
+        self.carrier_dhl = None
+        self.pdf = ServicioPDF(workers=0, carpeta=None)
+
+    def cerrar(self):
+        self.conn.close()
+
+
+# -----------------------------
+# Escenarios (una operación por llamada)
+# -----------------------------
+def cotizacion_manual(ctx: Contexto):
+    # Lo que hace "Nueva Cotización (Manual)" al guardar
+    origen, destino = ctx.rnd.choice(ctx.rutas)
+    tipo_unidad, cliente = ctx.rnd.choice(UNIDADES), ctx.rnd.choice(ctx.clientes)
+    peso = round(ctx.rnd.uniform(1, 3000), 1)
+    precio_total = obtener_motor(ctx.db_path).cotizar(origen, destino, tipo_unidad, peso, cliente=cliente)
+    cotizacion_id = str(uuid.uuid4())[:8]
+    conn = conectar(ctx.db_path)
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO cotizaciones (
+            cotizacion_id, cliente, origen, destino, distancia_km, peso_kg,
+            descripcion_paquete, tipo_unidad, precio_total, fecha, estatus_url
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (cotizacion_id, cliente, origen, destino, 0, peso, "Benchmark", tipo_unidad, precio_total,
+          str(date.today()), f"https://eonlogisticgroup.com/estatus/{cotizacion_id}"))
+    generar_ofertas_automaticas(conn, c.lastrowid)
+    conn.commit()
+    conn.close()
+
+
+def motor_precios_recarga(ctx: Contexto):
+    # Snapshot de tarifas/márgenes desde cero (tras un cambio en Pricing)
+    invalidar_motor(ctx.db_path)
+    obtener_motor(ctx.db_path)
+
+
+def pendientes(ctx: Contexto):
+    # Primera página de "Pendientes por Asignar"
+    pagina_cotizaciones(ctx.conn, COLUMNAS_PENDIENTES, FiltroCotizaciones(sin_proveedor=True))
+
+
+def pendientes_10_paginas(ctx: Contexto):
+    cursor = None
+    for _ in range(10):
+        _, cursor = pagina_cotizaciones(ctx.conn, COLUMNAS_PENDIENTES, FiltroCotizaciones(sin_proveedor=True), cursor)
+        if cursor is None:
+            break
+
+
+def dashboard_kpi(ctx: Contexto):
+    conn = ctx.conn
+    fecha_min, fecha_max = agregados.rango_fechas(conn)
+    agregados.contar(conn, desde=fecha_min, hasta=fecha_max)
+    agregados.contar(conn, estatus=["En tránsito", "Asignado"], desde=fecha_min, hasta=fecha_max)
+    agregados.contar(conn, estatus=["Pendiente por asignar"], desde=fecha_min, hasta=fecha_max)
+    agregados.total_por(conn, "estatus", fecha_min, fecha_max)
+    agregados.total_por(conn, "cliente", fecha_min, fecha_max)
+
+
+def visualizaciones(ctx: Contexto):
+    for dimension in ("proveedor", "ruta", "fecha"):
+        agregados.total_por(ctx.conn, dimension)
+
+
+def repreciar_bandas(ctx: Contexto):
+    # Todo el histórico con una tabla de bandas propuesta (simulación de Pricing)
+    actual = obtener_motor(ctx.db_path).bandas
+    propuesta = [(lo, hi, m + 1) for lo, hi, m in zip(actual.minimos, actual.maximos, actual.margenes)]
+    repreciar_historial(ctx.conn, propuesta, actual=actual)
+
+
+def simulador_whatif(ctx: Contexto):
+    # Tarifas de 10 rutas +5% y el margen general +2 puntos sobre todo el histórico
+    motor = obtener_motor(ctx.db_path)
+    tarifas = {r: motor.tarifas[r] * 1.05 for r in ctx.rnd.sample(sorted(motor.tarifas), min(10, len(motor.tarifas)))}
+    margenes = {("general", "General"): motor.margenes.get(("general", "General"), 0) + 2}
+    simular(ctx.conn, Propuesta(tarifas=tarifas, margenes=margenes), actual=motor)
+
+
+def exportar_ofertas_incremental(ctx: Contexto):
+    # Las últimas 10 000 ofertas a Parquet en memoria (lo nuevo desde la marca de Finanzas)
+    exportar_ofertas(ctx.conn, io.BytesIO(), "parquet", max(ultimo_id_ofertas(ctx.conn) - 10_000, 0))
+
+
+def pdf_portal(ctx: Contexto):
+    fn, _ = PLANTILLAS["portal"]
+    fn(ctx.rnd.choice(ctx.filas_pdf))
+
+
+def pdf_app(ctx: Contexto):
+    # Plantilla de la app de clientes, con QR de seguimiento
+    fn, _ = PLANTILLAS["app"]
+    fn(datos_pdf(ctx.rnd.choice(ctx.filas_pdf)))
+
+
+def pdf_cache(ctx: Contexto):
+    # Las mismas 200 cotizaciones: tras el calentamiento todo sale de la caché en memoria
+    for fila in ctx.filas_pdf:
+        ctx.pdf.contenido("portal", fila)
+
+
+def dhl(ctx: Contexto):
+    from carriers.dhl_client import cotizar_dhl
+    cotizar_dhl("64000", "06600", round(ctx.rnd.uniform(1, 70), 1), base_url=ctx.dhl_url, timeout=10)
+
+
+def dhl_cache(ctx: Contexto):
+    from carriers.base import SolicitudTarifa
+    from carriers.cache import CacheTarifas
+    from carriers.dhl_client import CarrierDHL
+    if ctx.carrier_dhl is None:
+        ctx.carrier_dhl = CarrierDHL(base_url=ctx.dhl_url, cache=CacheTarifas(ruta_db=None))
+    asyncio.run(ctx.carrier_dhl.cotizar(SolicitudTarifa("64000", "06600", 12.0)))
+
+
+def insertar_ofertas(ctx: Contexto, n: int = 200):
+    # Lote de cotizaciones (como "Cotización por Lote") con sus ofertas automáticas
+    conn = conectar(ctx.db_path)
+    filas = []
+    for _ in range(n):
+        origen, destino = ctx.rnd.choice(ctx.rutas)
+        filas.append((str(uuid.uuid4())[:8], ctx.rnd.choice(ctx.clientes), origen, destino,
+                      ctx.rnd.choice(UNIDADES), round(ctx.rnd.uniform(500, 50000), 2), str(date.today())))
+    id_desde = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM cotizaciones").fetchone()[0]
+    conn.executemany("""
+        INSERT INTO cotizaciones (cotizacion_id, cliente, origen, destino, tipo_unidad, precio_total, fecha)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, filas)
+    generar_ofertas_automaticas(conn, id_desde, id_desde + n - 1)
+    conn.commit()
+    conn.close()
+
+
+# Orden de ejecución: lecturas primero, escrituras al final
+ESCENARIOS = {
+    "pendientes": pendientes,
+    "pendientes_10_paginas": pendientes_10_paginas,
+    "dashboard_kpi": dashboard_kpi,
+    "visualizaciones": visualizaciones,
+    "motor_precios_recarga": motor_precios_recarga,
+    "repreciar_bandas": repreciar_bandas,
+    "simulador_whatif": simulador_whatif,
+    "exportar_ofertas_incremental": exportar_ofertas_incremental,
+    "pdf_portal": pdf_portal,
+    "pdf_app_qr": pdf_app,
+    "pdf_cache_200": pdf_cache,
+    "dhl_stub": dhl,
+    "dhl_cache": dhl_cache,
+    "cotizacion_manual": cotizacion_manual,
+    "insertar_ofertas_lote_200": insertar_ofertas,
+}
+REPETICIONES = {"pdf_app_qr": 20, "dhl_stub": 30, "insertar_ofertas_lote_200": 10}
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+
+def medir(nombre: str, fn, ctx: Contexto, repeticiones: int, calentamiento: int = 1) -> dict:
+    for _ in range(calentamiento):
+        fn(ctx)
+    tiempos, sql, df_bytes = [], [], []
+    for _ in range(repeticiones):
+        with medir_pagina("benchmark", nombre) as medicion:
+            fn(ctx)
+        tiempos.append(medicion.segundos)
+        sql.append(medicion.sql_n)
+        df_bytes.append(medicion.df_bytes)
+    return {
+        "repeticiones": repeticiones,
+        "min_ms": round(min(tiempos) * 1000, 3),
+        "p50_ms": round(statistics.median(tiempos) * 1000, 3),
+        "p95_ms": round(_percentil(tiempos, 0.95) * 1000, 3),
+        "max_ms": round(max(tiempos) * 1000, 3),
+        "ops_s": round(repeticiones / sum(tiempos), 1),
+        "sql_consultas": statistics.mean(sql),
+        "dataframe_bytes": int(statistics.mean(df_bytes)),
+    }
+
+
+def _version_git() -> str | None:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def correr(escala, semilla: int = 7, repeticiones: int = 50, solo=None, db_path: str | None = None,
+           dhl_retraso: float = 0.0) -> dict:
+    from carriers import servidor_falso
+    # El servidor falso solo pide que venga alguna API key
+    os.environ.setdefault("DHL_API_KEY", "benchmark")
+    instalar_pandas()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = db_path or os.path.join(tmp, "eon.db")
+        t0 = time.perf_counter()
+        filas = generar_db(db_path, escala, semilla)
+        generacion_s = time.perf_counter() - t0
+
+        servidor, url = servidor_falso.levantar(retraso=dhl_retraso)
+        ctx = Contexto(db_path, semilla, url)
+        escenarios = {}
+        try:
+            for nombre, fn in ESCENARIOS.items():
+                if solo and nombre not in solo:
+                    continue
+                escenarios[nombre] = medir(nombre, fn, ctx, REPETICIONES.get(nombre, repeticiones))
+                print(f"{nombre:>28}: p50 {escenarios[nombre]['p50_ms']:>9.2f} ms  ·  "
+                      f"p95 {escenarios[nombre]['p95_ms']:>9.2f} ms  ·  SQL {escenarios[nombre]['sql_consultas']:>5.1f}")
+        finally:
+            ctx.cerrar()
+            servidor.shutdown()
+            invalidar_motor(db_path)
+
+    return {
+        "generado_en": datetime.now().isoformat(timespec="seconds"),
+        "version": _version_git(),
+        "entorno": {"python": platform.python_version(), "plataforma": platform.platform(), "cpu": os.cpu_count()},
+        "escala": asdict(escala),
+        "semilla": semilla,
+        "filas": filas,
+        "generacion_s": round(generacion_s, 2),
+        "escenarios": escenarios,
+    }
+
+
+def comparar(base: dict, nuevo: dict) -> list[dict]:
+    """p50 de cada escenario en ambos resultados y el cambio relativo (negativo = más rápido)."""
+    filas = []
+    for nombre in {**base["escenarios"], **nuevo["escenarios"]}:
+        a = base["escenarios"].get(nombre, {}).get("p50_ms")
+        b = nuevo["escenarios"].get(nombre, {}).get("p50_ms")
+        cambio = (b - a) / a if a and b is not None else None
+        filas.append({"escenario": nombre, "base_p50_ms": a, "nuevo_p50_ms": b, "cambio": cambio})
+    return filas
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmarks de broker-eon sobre un eon.db sintético")
+    agregar_args_escala(ap)
+    ap.add_argument("--salida", default="resultados_benchmark.json")
+    ap.add_argument("--repeticiones", type=int, default=50)
+    ap.add_argument("--solo", nargs="+", choices=list(ESCENARIOS), help="correr solo estos escenarios")
+    ap.add_argument("--db", help="conservar el eon.db generado en esta ruta")
+    ap.add_argument("--dhl-retraso", type=float, default=0.0, help="segundos de latencia del servidor falso de DHL")
+    ap.add_argument("--comparar", nargs=2, metavar=("BASE", "NUEVO"), help="comparar dos JSON de resultados")
+    args = ap.parse_args()
+
+    if args.comparar:
+        with open(args.comparar[0]) as fa, open(args.comparar[1]) as fb:
+            base, nuevo = json.load(fa), json.load(fb)
+        print(f"base {base.get('version')} · nuevo {nuevo.get('version')}")
+        if (base["escala"], base["semilla"]) != (nuevo["escala"], nuevo["semilla"]):
+            print("⚠️ Escala o semilla distintas: los tiempos no son comparables")
+        for f in comparar(base, nuevo):
+            cambio = f"{f['cambio']:+.1%}" if f["cambio"] is not None else "-"
+            print(f"{f['escenario']:>28}: {f['base_p50_ms'] or '-':>10} ms → {f['nuevo_p50_ms'] or '-':>10} ms  {cambio:>8}")
+        sys.exit(0)
+
+    escala = escala_desde_args(args)
+    resultados = correr(escala, args.semilla, args.repeticiones, args.solo, args.db, args.dhl_retraso)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"Resultados en {args.salida}")
@@ -0,0 +1,59 @@
+# carriers/base.py
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SolicitudTarifa:
+    """Parámetros del envío, comunes a todos los carriers."""
+    origen_cp: str
+    destino_cp: str
+    peso_kg: float
+    largo: float = 10.0
+    ancho: float = 10.0
+    alto: float = 10.0
+    origin_city: str | None = None
+    dest_city: str | None = None
+    origin_country: str = "MX"
+    dest_country: str = "MX"
+    is_customs_declarable: bool | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class Oferta:
+    """
+    Oferta normalizada de un carrier. Sin el JSON original: `raw_id` apunta al
+    producto guardado una sola vez en carriers/detalle.py (se pide solo al mostrarlo).
+    """
+    carrier: str
+    productCode: str
+    productName: str
+    totalPrice: float
+    currency: str = "MXN"
+    eta: str | None = None
+    etd_days: int | None = None
+    raw_id: str | None = None
+    cached: bool = False
+    respaldo: bool = False
+
+
+@dataclass
+class ResultadoCarrier:
+    carrier: str
+    ofertas: list
+    error: str | None
+    latencia_s: float
+
+
+class Carrier(ABC):
+    """Adaptador de un carrier. `cotizar` devuelve ofertas normalizadas (Oferta)."""
+    nombre: str = ""
+    timeout_s: float = 20.0
+
+    def configurado(self) -> bool:
+        """False si faltan credenciales; el cotizador lo omite."""
+        return True
+
+    @abstractmethod
+    async def cotizar(self, solicitud: SolicitudTarifa) -> list[Oferta]:
+        ...
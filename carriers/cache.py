@@ -0,0 +1,137 @@
+# carriers/cache.py
+"""
+Caché de tarifas de carriers: LRU en memoria con TTL y, opcionalmente, respaldo
+en un archivo SQLite (TARIFAS_CACHE_DB) para sobrevivir reinicios de Streamlit.
+La llave sale de los parámetros de la petición (_mk_params), que incluyen
+plannedShippingDate: una tarifa cacheada nunca se sirve para otro día.
+"""
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, replace
+
+from carriers.base import Oferta
+
+TARIFAS_CACHE_TTL_S = float(os.getenv("TARIFAS_CACHE_TTL_S", "900"))
+TARIFAS_CACHE_MAX = int(os.getenv("TARIFAS_CACHE_MAX", "2000"))
+TARIFAS_CACHE_DB = os.getenv("TARIFAS_CACHE_DB") or None
+
+
+def cubeta_envio(peso_kg: float, largo: float, ancho: float, alto: float) -> tuple:
+    """
+    Redondea hacia arriba a la cubeta que cotiza el carrier (0.5 kg, 1 cm), así
+    5.1 kg y 5.4 kg comparten llave y el precio nunca queda por debajo del real.
+    """
+    return (
+        math.ceil(float(peso_kg) * 2) / 2,
+        float(math.ceil(float(largo))),
+        float(math.ceil(float(ancho))),
+        float(math.ceil(float(alto))),
+    )
+
+
+def clave_tarifa(carrier: str, params: dict) -> str:
+    return f"{carrier}|{json.dumps(params, sort_keys=True, default=str)}"
+
+
+class CacheTarifas:
+    def __init__(self, ttl_s: float = TARIFAS_CACHE_TTL_S, max_entradas: int = TARIFAS_CACHE_MAX,
+                 ruta_db: str | None = TARIFAS_CACHE_DB):
+        self.ttl_s = ttl_s
+        self.max_entradas = max_entradas
+        self.ruta_db = ruta_db
+        self._datos: OrderedDict = OrderedDict()   # clave -> (vence, ofertas ya marcadas cached=True)
+        self._lock = threading.Lock()
+        self.aciertos = self.fallos = self.aciertos_disco = 0
+        if ruta_db:
+            with self._conectar() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS cache_tarifas (
+                        clave TEXT PRIMARY KEY,
+                        ofertas TEXT NOT NULL,
+                        vence REAL NOT NULL
+                    )
+                """)
+
+    @contextmanager
+    def _conectar(self):
+        """Conexión corta en una transacción; se cierra al salir."""
+        conn = sqlite3.connect(self.ruta_db, timeout=5)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def obtener(self, clave: str) -> list | None:
+        """Ofertas con cached=True, o None si no hay entrada vigente."""
+        ahora = time.time()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada and entrada[0] > ahora:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return list(entrada[1])
+            self._datos.pop(clave, None)
+
+        if self.ruta_db:
+            with self._conectar() as conn:
+                fila = conn.execute(
+                    "SELECT ofertas, vence FROM cache_tarifas WHERE clave = ? AND vence > ?", (clave, ahora)
+                ).fetchone()
+            if fila:
+                ofertas = [Oferta(**{**d, "cached": True}) for d in json.loads(fila[0])]
+                with self._lock:
+                    self._poner(clave, fila[1], ofertas)
+                    self.aciertos += 1
+                    self.aciertos_disco += 1
+                return list(ofertas)
+
+        with self._lock:
+            self.fallos += 1
+        return None
+
+    def guardar(self, clave: str, ofertas: list):
+        vence = time.time() + self.ttl_s
+        ofertas = [replace(of, cached=True) for of in ofertas]
+        with self._lock:
+            self._poner(clave, vence, ofertas)
+        if self.ruta_db:
+            with self._conectar() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_tarifas (clave, ofertas, vence) VALUES (?, ?, ?)",
+                    (clave, json.dumps([asdict(of) for of in ofertas]), vence),  # cached se fija al leer
+                )
+                conn.execute("DELETE FROM cache_tarifas WHERE vence <= ?", (time.time(),))
+
+    def _poner(self, clave, vence, ofertas):
+        self._datos[clave] = (vence, ofertas)
+        self._datos.move_to_end(clave)
+        while len(self._datos) > self.max_entradas:
+            self._datos.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+        if self.ruta_db:
+            with self._conectar() as conn:
+                conn.execute("DELETE FROM cache_tarifas")
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "entradas": len(self._datos),
+                "aciertos": self.aciertos,
+                "aciertos_disco": self.aciertos_disco,
+                "fallos": self.fallos,
+            }
+
+
+# Instancia compartida por todas las sesiones del proceso
+CACHE_TARIFAS = CacheTarifas()
@@ -0,0 +1,86 @@
+# carriers/cotizador.py
+"""
+Rate shopping: dispara la cotización a todos los carriers configurados en
+paralelo, cada uno con su timeout, y entrega los resultados conforme llegan.
+"""
+import asyncio
+import time
+
+from carriers.base import Carrier, Oferta, ResultadoCarrier, SolicitudTarifa
+from carriers.detalle import guardar_productos
+from carriers.dhl_client import CarrierDHL
+from carriers.resiliencia import CircuitoAbierto
+
+
+def carriers_configurados() -> list[Carrier]:
+    """Carriers con credenciales en .env (hoy solo DHL)."""
+    return [c for c in (CarrierDHL(),) if c.configurado()]
+
+
+def oferta_respaldo(precio: float, carrier: str, detalle: dict | None = None) -> Oferta:
+    """Oferta con el precio de tarifas manuales, marcada como respaldo."""
+    return Oferta(
+        carrier="Tarifa manual",
+        productCode="TARIFA_MANUAL",
+        productName=f"Tarifa manual EON (respaldo: {carrier} no disponible)",
+        totalPrice=round(float(precio), 2),
+        raw_id=f"{guardar_productos([detalle])}:0" if detalle else None,
+        respaldo=True,
+    )
+
+
+async def _cotizar_uno(carrier: Carrier, solicitud: SolicitudTarifa, respaldo=None) -> ResultadoCarrier:
+    inicio = time.perf_counter()
+    try:
+        ofertas = await asyncio.wait_for(carrier.cotizar(solicitud), carrier.timeout_s)
+        error = None
+    except CircuitoAbierto as e:
+        # Falla rápida: en lugar del carrier, el precio manual de la ruta (si se dio respaldo)
+        ofertas, error = [], f"{carrier.nombre} no disponible: {e}"
+        if respaldo:
+            try:
+                ofertas = respaldo(solicitud, carrier.nombre)
+            except Exception as e_respaldo:
+                error += f" (sin respaldo: {e_respaldo})"
+    except asyncio.TimeoutError:
+        ofertas, error = [], f"sin respuesta en {carrier.timeout_s:g} s"
+    except Exception as e:
+        ofertas, error = [], str(e)
+    return ResultadoCarrier(carrier.nombre, ofertas, error, time.perf_counter() - inicio)
+
+
+async def cotizar_carriers(solicitud: SolicitudTarifa, carriers: list[Carrier] | None = None, respaldo=None):
+    """
+    Generador asíncrono: un ResultadoCarrier por carrier, en orden de llegada.
+    `respaldo(solicitud, carrier)` da las ofertas sustitutas cuando el circuito
+    del carrier está abierto (ver oferta_respaldo).
+    """
+    if carriers is None:
+        carriers = carriers_configurados()
+    tareas = [asyncio.create_task(_cotizar_uno(c, solicitud, respaldo)) for c in carriers]
+    try:
+        for siguiente in asyncio.as_completed(tareas):
+            yield await siguiente
+    finally:
+        # Si el consumidor deja de iterar, no se quedan peticiones colgadas
+        for t in tareas:
+            t.cancel()
+
+
+def cotizar_todos(solicitud: SolicitudTarifa, carriers: list[Carrier] | None = None, al_llegar=None, respaldo=None):
+    """
+    Versión síncrona para Streamlit. Devuelve (ofertas ordenadas por precio,
+    {carrier: error}). `al_llegar(resultado, ofertas)` se llama con cada carrier
+    que responde y la lista combinada hasta ese momento.
+    """
+    async def correr():
+        ofertas, errores = [], {}
+        async for resultado in cotizar_carriers(solicitud, carriers, respaldo):
+            if resultado.error:
+                errores[resultado.carrier] = resultado.error
+            ofertas = sorted(ofertas + resultado.ofertas, key=lambda x: x.totalPrice)
+            if al_llegar:
+                al_llegar(resultado, ofertas)
+        return ofertas, errores
+
+    return asyncio.run(correr())
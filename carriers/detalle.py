@@ -0,0 +1,46 @@
+# carriers/detalle.py
+"""
+JSON original de las respuestas de carriers, guardado una vez por contenido.
+Las ofertas solo llevan `raw_id` ("<hash>:<índice>"); la UI pide el detalle al
+abrir el expander. Respuestas idénticas (la misma ruta cotizada por varias
+sesiones) ocupan una sola entrada.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+DETALLE_MAX_RESPUESTAS = 500
+
+_lock = threading.Lock()
+_respuestas: OrderedDict = OrderedDict()   # hash -> lista de productos
+
+
+def guardar_productos(productos: list, resumen=None) -> str:
+    """
+    Guarda la lista de productos de una respuesta; devuelve su hash. Con `resumen`
+    (código/precio/ETA por producto) el hash no serializa todo el JSON: dos
+    respuestas con el mismo resumen comparten detalle, que solo es informativo.
+    """
+    firma = repr(resumen) if resumen is not None else json.dumps(productos, default=str)
+    h = hashlib.sha1(firma.encode()).hexdigest()[:20]
+    with _lock:
+        if h in _respuestas:
+            _respuestas.move_to_end(h)
+        else:
+            _respuestas[h] = productos
+            while len(_respuestas) > DETALLE_MAX_RESPUESTAS:
+                _respuestas.popitem(last=False)
+    return h
+
+
+def obtener_detalle(raw_id: str | None) -> dict | None:
+    """Producto original de una oferta, o None si ya salió del almacén."""
+    if not raw_id:
+        return None
+    h, _, indice = raw_id.partition(":")
+    with _lock:
+        productos = _respuestas.get(h)
+    if productos is None or not indice.isdigit() or int(indice) >= len(productos):
+        return None
+    return productos[int(indice)]
@@ -1,8 +1,20 @@
 # carriers/dhl_client.py
+import hashlib
 import os
+import threading
+import time
 import requests
+from collections import Counter
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from carriers.base import Carrier, Oferta, SolicitudTarifa
+from carriers.cache import CACHE_TARIFAS, CacheTarifas, clave_tarifa, cubeta_envio
+from carriers.detalle import guardar_productos
+from carriers.resiliencia import ProteccionCarrier, proteccion_para
+from carriers.singleflight import VUELOS_CARRIERS, SingleFlight
+from metricas.registro import REGISTRO
 
 load_dotenv(".env")
 
@@ -21,7 +33,7 @@ ENV             = (_get_env("DHL_ENV", "sandbox") or "sandbox").lower()
 BASIC_USER = _get_env("DHL_BASIC_USER")
 BASIC_PASS = _get_env("DHL_BASIC_PASS")
 
-BASE = (
+BASE = _get_env("DHL_BASE_URL") or (  # DHL_BASE_URL: p.ej. carriers/servidor_falso.py
     "https://express.api.dhl.com/mydhlapi"
     if ENV in ("prod", "production", "live")
     else "https://express.api.dhl.com/mydhlapi/test"
@@ -78,6 +90,82 @@ def _mk_params(origen_cp, destino_cp, peso_kg, largo, ancho, alto,
         params["destinationCityName"] = dest_city
     return params
 
+# -----------------------------------------------
+# Estrategia de autenticación recordada + Session
+# -----------------------------------------------
+AUTH_TTL_S = float(_get_env("DHL_AUTH_TTL_S", "3600") or 3600)
+
+_lock = threading.Lock()
+_sesion: requests.Session | None = None
+_modos: dict = {}           # clave de credenciales -> (número de estrategia, vence)
+_intentos = Counter()       # (estrategia, status) -> peticiones
+
+
+def _session() -> requests.Session:
+    """Una Session por proceso: reutiliza conexiones TLS (keep-alive) entre cotizaciones."""
+    global _sesion
+    if _sesion is None:
+        with _lock:
+            if _sesion is None:
+                s = requests.Session()
+                s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+                s.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+                _sesion = s
+    return _sesion
+
+
+def _estrategias():
+    """[(número, etiqueta, con accountNumber, auth)] en el orden de prueba original."""
+    auth = _auth_primary()
+    estrategias = []
+    if DHL_ACCOUNT:
+        estrategias.append((1, "APIKEY+ACC", True, None))
+    if auth and DHL_ACCOUNT:
+        estrategias.append((2, "APIKEY+BASIC+ACC", True, auth))
+    if ENV != "prod":
+        estrategias.append((3, "SANDBOX_NO_ACC" + ("+BASIC" if auth else ""), False, auth))
+    return estrategias
+
+
+def _clave_credenciales(url: str) -> str:
+    # Hash para no guardar el API key en claro como llave
+    datos = "|".join(str(x) for x in (ENV, url, DHL_API_KEY, DHL_ACCOUNT, BASIC_USER, DHL_API_SECRET))
+    return hashlib.sha256(datos.encode()).hexdigest()[:16]
+
+
+def _modo_recordado(clave: str):
+    with _lock:
+        modo = _modos.get(clave)
+        if modo and modo[1] > time.monotonic():
+            return modo[0]
+        _modos.pop(clave, None)
+    return None
+
+
+def _recordar_modo(clave: str, numero: int):
+    with _lock:
+        _modos[clave] = (numero, time.monotonic() + AUTH_TTL_S)
+
+
+def _olvidar_modo(clave: str):
+    with _lock:
+        _modos.pop(clave, None)
+
+
+def _contar(label: str, status, segundos: float):
+    with _lock:
+        _intentos[(label, status)] += 1
+    REGISTRO.observar("eon_dhl_intento_segundos", segundos, estrategia=label, status=str(status))
+
+
+def estadisticas_auth() -> dict:
+    """Peticiones a /rates por estrategia y status, y la estrategia recordada por credenciales."""
+    with _lock:
+        return {
+            "intentos": {f"{label} {status}": n for (label, status), n in sorted(_intentos.items(), key=lambda kv: str(kv[0]))},
+            "recordados": {clave: numero for clave, (numero, vence) in _modos.items() if vence > time.monotonic()},
+        }
+
 def cotizar_dhl(
     origen_cp: str,
     destino_cp: str,
@@ -91,16 +179,21 @@ def cotizar_dhl(
     origin_country: str = "MX",
     dest_country: str = "MX",
     is_customs_declarable: bool | None = None,  # aceptado por compatibilidad con tu UI
+    base_url: str | None = None,
+    timeout: float = 45,
 ) -> dict:
     """
     Intenta /rates con varias estrategias para evitar 401:
       1) Header DHL-API-Key + accountNumber
       2) (si 401) Header + Basic Auth
       3) (si 401 y sandbox) Header (+Basic si disponible) sin accountNumber
+    La estrategia que funcionó se recuerda por credenciales (AUTH_TTL_S) y se
+    prueba primero; si da 401 se olvida y se vuelven a probar las demás.
+    `timeout` es el total para todas las estrategias, no para cada una.
     Devuelve: {"mode": "GET", "attempt": <int>, "url": <url>, "json": <dict>}
     """
     headers = _headers()
-    url = f"{BASE}/rates"
+    url = f"{base_url or BASE}/rates"
 
     # Params base
     params = _mk_params(
@@ -109,44 +202,37 @@ def cotizar_dhl(
         is_customs_declarable,
     )
 
-    attempts = []
+    clave = _clave_credenciales(url)
+    recordado = _modo_recordado(clave)
+    estrategias = _estrategias()
+    estrategias.sort(key=lambda e: e[0] != recordado)
 
-    # ---- Attempt 1: API-Key + accountNumber (si hay cuenta)
-    auth = None
-    if DHL_ACCOUNT:
-        params_1 = dict(params)
-        params_1["accountNumber"] = DHL_ACCOUNT
-        r1 = requests.get(url, headers=headers, params=params_1, auth=auth, timeout=45)
-        attempts.append(("APIKEY+ACC", r1.status_code, r1.url, r1.text))
-        if r1.status_code < 400:
-            return {"mode": "GET", "attempt": 1, "url": r1.url, "json": r1.json()}
-        if r1.status_code != 401:
-            # error diferente a 401: propagar
-            raise requests.HTTPError(f"{r1.status_code} {r1.reason}\nURL={r1.url}\nBODY={r1.text}", response=r1)
-
-    # ---- Attempt 2: API-Key + Basic Auth + accountNumber
-    auth = _auth_primary()
-    if auth and DHL_ACCOUNT:
-        params_2 = dict(params)
-        params_2["accountNumber"] = DHL_ACCOUNT
-        r2 = requests.get(url, headers=headers, params=params_2, auth=auth, timeout=45)
-        attempts.append(("APIKEY+BASIC+ACC", r2.status_code, r2.url, r2.text))
-        if r2.status_code < 400:
-            return {"mode": "GET", "attempt": 2, "url": r2.url, "json": r2.json()}
-        if r2.status_code != 401:
-            raise requests.HTTPError(f"{r2.status_code} {r2.reason}\nURL={r2.url}\nBODY={r2.text}", response=r2)
-
-    # ---- Attempt 3 (solo sandbox): sin accountNumber
-    if ENV != "prod":
-        params_3 = dict(params)
-        # sin accountNumber
-        r3 = requests.get(url, headers=headers, params=params_3, auth=auth, timeout=45)
-        attempts.append(("SANDBOX_NO_ACC" + ("+BASIC" if auth else ""), r3.status_code, r3.url, r3.text))
-        if r3.status_code < 400:
-            return {"mode": "GET", "attempt": 3, "url": r3.url, "json": r3.json()}
-        # si aquí no es 401, propaga
-        if r3.status_code != 401:
-            raise requests.HTTPError(f"{r3.status_code} {r3.reason}\nURL={r3.url}\nBODY={r3.text}", response=r3)
+    attempts = []
+    limite = time.monotonic() + timeout
+    for numero, label, con_cuenta, auth in estrategias:
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            raise requests.Timeout(f"/rates sin respuesta válida en {timeout:g} s ({len(attempts)} estrategias probadas)")
+        params_n = dict(params)
+        if con_cuenta:
+            params_n["accountNumber"] = DHL_ACCOUNT
+        t0 = time.perf_counter()
+        try:
+            r = _session().get(url, headers=headers, params=params_n, auth=auth, timeout=restante)
+        except requests.RequestException as e:
+            _contar(label, type(e).__name__, time.perf_counter() - t0)
+            raise
+        _contar(label, r.status_code, time.perf_counter() - t0)
+        attempts.append((label, r.status_code, r.url, r.text))
+        if r.status_code < 400:
+            _recordar_modo(clave, numero)
+            return {"mode": "GET", "attempt": numero, "url": r.url, "json": r.json()}
+        if r.status_code != 401:
+            # error diferente a 401: propagar (no es problema de credenciales)
+            raise requests.HTTPError(f"{r.status_code} {r.reason}\nURL={r.url}\nBODY={r.text}", response=r)
+        if numero == recordado:
+            # El modo recordado dejó de servir: re-probar desde el principio
+            _olvidar_modo(clave)
 
     # Si todos fallan con 401
     # Construimos un mensaje claro con los intentos realizados (sin exponer el API Key)
@@ -155,10 +241,14 @@ def cotizar_dhl(
         lines.append(f"- {label}: {code}\n  URL={tried_url}\n  BODY={body}")
     raise requests.HTTPError("\n".join(lines))
 
-def normalizar_ofertas_dhl(data_json: dict) -> list[dict]:
-    ofertas = []
+def normalizar_ofertas_dhl(data_json: dict, carrier: str = "DHL", con_detalle: bool = True) -> list[Oferta]:
+    """
+    Ofertas compactas (Oferta) ordenadas por precio. Con `con_detalle` los productos
+    originales se guardan una vez en carriers/detalle.py y cada oferta lleva su raw_id.
+    """
+    filas = []
     products = data_json.get("products") or []
-    for p in products:
+    for i, p in enumerate(products):
         code = p.get("productCode")
         name = p.get("productName") or code or "N/D"
         total_prices = p.get("totalPrice") or []
@@ -175,14 +265,64 @@ def normalizar_ofertas_dhl(data_json: dict) -> list[dict]:
             etd = int(etd_days)
 
         if code is not None and price is not None:
-            ofertas.append({
-                "productCode": code,
-                "productName": name,
-                "totalPrice": float(price),
-                "currency": curr,
-                "eta": eta,
-                "etd_days": etd,
-                "raw": p,
-            })
-    ofertas.sort(key=lambda x: x["totalPrice"])
-    return ofertas
\ No newline at end of file
+            filas.append((i, code, name, float(price), curr, eta, etd))
+
+    h = guardar_productos(products, resumen=filas) if con_detalle and filas else None
+    ofertas = [
+        Oferta(carrier, code, name, price, curr, eta, etd, f"{h}:{i}" if h else None)
+        for i, code, name, price, curr, eta, etd in filas
+    ]
+    ofertas.sort(key=lambda x: x.totalPrice)
+    return ofertas
+
+class CarrierDHL(Carrier):
+    """
+    Adaptador asíncrono: caché → single-flight → breaker/reintentos → cotizar_dhl
+    en un hilo (no bloquea el event loop).
+    """
+
+    def __init__(self, nombre: str = "DHL", base_url: str | None = None, timeout_s: float = 20.0,
+                 cache: CacheTarifas | None = CACHE_TARIFAS, vuelos: SingleFlight = VUELOS_CARRIERS,
+                 proteccion: ProteccionCarrier | None = None):
+        self.nombre = nombre
+        self.base_url = base_url
+        self.timeout_s = timeout_s
+        self.cache = cache
+        self.vuelos = vuelos
+        self.proteccion = proteccion or proteccion_para(f"{nombre}@{base_url or BASE}")
+
+    def configurado(self) -> bool:
+        return bool(DHL_API_KEY)
+
+    async def cotizar(self, solicitud: SolicitudTarifa) -> list[Oferta]:
+        peso, largo, ancho, alto = cubeta_envio(solicitud.peso_kg, solicitud.largo, solicitud.ancho, solicitud.alto)
+        clave = clave_tarifa(self.nombre + "@" + (self.base_url or BASE), _mk_params(
+            solicitud.origen_cp, solicitud.destino_cp, peso, largo, ancho, alto,
+            solicitud.origin_city, solicitud.dest_city, solicitud.origin_country, solicitud.dest_country,
+            solicitud.is_customs_declarable,
+        ))
+        if self.cache is not None:
+            ofertas = self.cache.obtener(clave)
+            if ofertas is not None:
+                return ofertas
+
+        def llamar():
+            # Breaker, timeout adaptativo y reintentos; el total no pasa de timeout_s
+            res = self.proteccion.llamar(lambda timeout: cotizar_dhl(
+                solicitud.origen_cp, solicitud.destino_cp, peso,
+                largo=largo, ancho=ancho, alto=alto,
+                origin_city=solicitud.origin_city, dest_city=solicitud.dest_city,
+                origin_country=solicitud.origin_country, dest_country=solicitud.dest_country,
+                is_customs_declarable=solicitud.is_customs_declarable,
+                base_url=self.base_url,
+                timeout=timeout,
+            ), plazo_s=self.timeout_s)
+            ofertas = normalizar_ofertas_dhl(res["json"], carrier=self.nombre)
+            # Se guarda aquí y no en quien esperaba: aunque todos hayan expirado, la respuesta sirve
+            if self.cache is not None:
+                self.cache.guardar(clave, ofertas)
+            return ofertas
+
+        # Cotizaciones idénticas en curso (otras sesiones) comparten una sola petición
+        # Oferta es inmutable: todas las sesiones pueden compartir las mismas instancias
+        return await self.vuelos.compartir(clave, llamar)
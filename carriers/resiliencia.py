@@ -0,0 +1,183 @@
+# carriers/resiliencia.py
+"""
+Protección de las llamadas a carriers: circuit breaker, timeout adaptativo por
+percentil de latencia y reintentos con backoff + jitter solo para fallas
+transitorias (timeouts, conexión, 429 y 5xx). Un 400/401 es problema de la
+petición o de credenciales: ni se reintenta ni abre el circuito.
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+
+STATUS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+CARRIER_FALLOS_UMBRAL = int(os.getenv("CARRIER_FALLOS_UMBRAL", "5"))
+CARRIER_ESPERA_S = float(os.getenv("CARRIER_ESPERA_S", "30"))
+# Intentos en total (1 = sin reintentos); CARRIER_REINTENTOS es el nombre anterior
+CARRIER_INTENTOS = int(os.getenv("CARRIER_INTENTOS", os.getenv("CARRIER_REINTENTOS", "3")))
+CARRIER_TIMEOUT_MIN_S = float(os.getenv("CARRIER_TIMEOUT_MIN_S", "2"))
+CARRIER_TIMEOUT_MAX_S = float(os.getenv("CARRIER_TIMEOUT_MAX_S", "15"))
+
+
+class CircuitoAbierto(RuntimeError):
+    """El carrier falló demasiadas veces seguidas; no se intenta hasta la siguiente sonda."""
+
+
+def es_reintentable(e: Exception) -> bool:
+    if isinstance(e, (requests.Timeout, requests.ConnectionError)):
+        return True
+    respuesta = getattr(e, "response", None)
+    return isinstance(e, requests.HTTPError) and respuesta is not None and respuesta.status_code in STATUS_REINTENTABLES
+
+
+class CircuitBreaker:
+    CERRADO, ABIERTO, SEMIABIERTO = "cerrado", "abierto", "semiabierto"
+
+    def __init__(self, umbral_fallos: int = CARRIER_FALLOS_UMBRAL, espera_s: float = CARRIER_ESPERA_S):
+        self.umbral_fallos = umbral_fallos
+        self.espera_s = espera_s
+        self.estado = self.CERRADO
+        self.fallos_seguidos = 0
+        self.aperturas = 0
+        self._abierto_en = 0.0
+        self._sonda_en_curso = False
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """Lanza CircuitoAbierto si no toca llamar; en semiabierto deja pasar una sola sonda."""
+        with self._lock:
+            if self.estado == self.ABIERTO:
+                restante = self.espera_s - (time.monotonic() - self._abierto_en)
+                if restante > 0:
+                    raise CircuitoAbierto(f"circuito abierto, siguiente intento en {restante:.0f} s")
+                self.estado = self.SEMIABIERTO
+                self._sonda_en_curso = False
+            if self.estado == self.SEMIABIERTO:
+                if self._sonda_en_curso:
+                    raise CircuitoAbierto("circuito semiabierto, sonda en curso")
+                self._sonda_en_curso = True
+
+    def exito(self):
+        with self._lock:
+            self.estado = self.CERRADO
+            self.fallos_seguidos = 0
+            self._sonda_en_curso = False
+
+    def fallo(self):
+        with self._lock:
+            self.fallos_seguidos += 1
+            if self.estado == self.SEMIABIERTO or self.fallos_seguidos >= self.umbral_fallos:
+                if self.estado != self.ABIERTO:
+                    self.aperturas += 1
+                self.estado = self.ABIERTO
+                self._abierto_en = time.monotonic()
+                self._sonda_en_curso = False
+
+
+class TimeoutAdaptativo:
+    """
+    Timeout = factor × percentil de las últimas latencias exitosas, acotado a
+    [minimo_s, maximo_s]. Sin suficientes muestras usa maximo_s.
+    """
+
+    def __init__(self, percentil: float = 95, factor: float = 1.5, minimo_s: float = CARRIER_TIMEOUT_MIN_S,
+                 maximo_s: float = CARRIER_TIMEOUT_MAX_S, ventana: int = 200, muestras_min: int = 20):
+        self.percentil = percentil
+        self.factor = factor
+        self.minimo_s = minimo_s
+        self.maximo_s = maximo_s
+        self.muestras_min = muestras_min
+        self._latencias = deque(maxlen=ventana)
+        self._lock = threading.Lock()
+
+    def registrar(self, latencia_s: float):
+        with self._lock:
+            self._latencias.append(latencia_s)
+
+    def percentil_s(self) -> float | None:
+        with self._lock:
+            if len(self._latencias) < self.muestras_min:
+                return None
+            ordenadas = sorted(self._latencias)
+        return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * self.percentil / 100))]
+
+    def actual(self) -> float:
+        p = self.percentil_s()
+        if p is None:
+            return self.maximo_s
+        return min(self.maximo_s, max(self.minimo_s, p * self.factor))
+
+
+class ProteccionCarrier:
+    """Breaker + timeout adaptativo + reintentos de un carrier; compartido por todas las sesiones."""
+
+    def __init__(self, intentos: int = CARRIER_INTENTOS, base_s: float = 0.25, tope_s: float = 2.0):
+        if intentos < 1:
+            raise ValueError(f"intentos debe ser ≥ 1 (CARRIER_INTENTOS={intentos})")
+        self.breaker = CircuitBreaker()
+        self.tiempos = TimeoutAdaptativo()
+        self.intentos = intentos
+        self.base_s = base_s
+        self.tope_s = tope_s
+        self.total_reintentos = 0
+
+    def llamar(self, fn, plazo_s: float):
+        """
+        fn(timeout) hace la petición. Reintenta fallas transitorias con backoff
+        exponencial y jitter completo sin pasarse de plazo_s en total.
+        """
+        plazo = time.monotonic() + plazo_s
+        for n in range(self.intentos):
+            self.breaker.permitir()
+            restante = plazo - time.monotonic()
+            inicio = time.monotonic()
+            try:
+                resultado = fn(max(0.1, min(self.tiempos.actual(), restante)))
+            except Exception as e:
+                if not es_reintentable(e):
+                    # El servicio respondió (400, 401 agotado...): no cuenta como falla
+                    self.breaker.exito()
+                    raise
+                self.breaker.fallo()
+                espera = random.uniform(0, min(self.tope_s, self.base_s * 2 ** n))
+                reintentar_en = getattr(getattr(e, "response", None), "headers", {}).get("Retry-After")
+                if reintentar_en and str(reintentar_en).isdigit():
+                    espera = max(espera, min(float(reintentar_en), self.tope_s))
+                if n == self.intentos - 1 or time.monotonic() + espera >= plazo:
+                    raise
+                self.total_reintentos += 1
+                time.sleep(espera)
+                continue
+            self.breaker.exito()
+            self.tiempos.registrar(time.monotonic() - inicio)
+            return resultado
+
+    def estadisticas(self) -> dict:
+        return {
+            "circuito": self.breaker.estado,
+            "fallos_seguidos": self.breaker.fallos_seguidos,
+            "aperturas": self.breaker.aperturas,
+            "reintentos": self.total_reintentos,
+            "latencia_p95_s": self.tiempos.percentil_s(),
+            "timeout_actual_s": round(self.tiempos.actual(), 2),
+        }
+
+
+_lock = threading.Lock()
+_protecciones: dict[str, ProteccionCarrier] = {}
+
+
+def proteccion_para(nombre: str) -> ProteccionCarrier:
+    with _lock:
+        if nombre not in _protecciones:
+            _protecciones[nombre] = ProteccionCarrier()
+        return _protecciones[nombre]
+
+
+def estadisticas_protecciones() -> dict:
+    with _lock:
+        return {nombre: p.estadisticas() for nombre, p in _protecciones.items()}
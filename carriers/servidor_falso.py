@@ -0,0 +1,100 @@
+# carriers/servidor_falso.py
+"""
+Servidor HTTP local que imita GET /rates de MyDHL para probar la capa de
+carriers sin red ni credenciales:
+
+    python -m carriers.servidor_falso --puerto 8765 --retraso 0.5
+    DHL_BASE_URL=http://127.0.0.1:8765 DHL_API_KEY=falsa streamlit run eon_ops_portal/main.py
+
+GET /__stats devuelve cuántas peticiones recibió por modo de autenticación.
+"""
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PRODUCTOS = [
+    # (código, nombre, precio base, precio por kg, días)
+    ("N", "EXPRESS DOMESTIC", 180.0, 32.0, 1),
+    ("1", "EXPRESS DOMESTIC 12:00", 240.0, 41.0, 1),
+    ("G", "ECONOMY SELECT DOMESTIC", 120.0, 22.0, 3),
+]
+
+
+def respuesta_rates(peso: float) -> dict:
+    return {"products": [
+        {
+            "productCode": codigo,
+            "productName": nombre,
+            "totalPrice": [{"currencyType": "BILLC", "priceCurrency": "MXN", "price": round(base + por_kg * peso, 2)}],
+            "deliveryCapabilities": {"totalTransitDays": str(dias)},
+        }
+        for codigo, nombre, base, por_kg, dias in PRODUCTOS
+    ]}
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, cuerpo):
+        datos = json.dumps(cuerpo).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        cfg = self.server.config
+        url = urlparse(self.path)
+        if url.path == "/__stats":
+            return self._json(200, dict(self.server.contadores))
+        if not url.path.endswith("/rates"):
+            return self._json(404, {"detail": "not found"})
+
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        modo = ("ACC" if "accountNumber" in params else "NO_ACC") + ("+BASIC" if "Authorization" in self.headers else "")
+        with self.server.lock:
+            self.server.contadores[modo] += 1
+            self.server.contadores["total"] += 1
+
+        if cfg["retraso"]:
+            time.sleep(cfg["retraso"])
+        if cfg["status"] >= 400:
+            return self._json(cfg["status"], {"status": cfg["status"], "detail": "forzado por servidor_falso"})
+        if not self.headers.get("DHL-API-Key"):
+            return self._json(401, {"status": 401, "detail": "Missing API key"})
+        # Tenant de sandbox que rechaza accountNumber (los intentos 1 y 2 dan 401)
+        if cfg["solo_sin_cuenta"] and "accountNumber" in params:
+            return self._json(401, {"status": 401, "detail": "Invalid credentials"})
+        self._json(200, respuesta_rates(float(params.get("weight", 1))))
+
+
+def levantar(puerto: int = 0, retraso: float = 0.0, status: int = 200, solo_sin_cuenta: bool = False):
+    """Arranca el servidor en un hilo; devuelve (servidor, base_url). Cerrar con servidor.shutdown()."""
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), _Manejador)
+    servidor.daemon_threads = True
+    servidor.config = {"retraso": retraso, "status": status, "solo_sin_cuenta": solo_sin_cuenta}
+    servidor.contadores = Counter()
+    servidor.lock = threading.Lock()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Servidor falso de tarifas DHL")
+    ap.add_argument("--puerto", type=int, default=8765)
+    ap.add_argument("--retraso", type=float, default=0.0, help="segundos antes de responder")
+    ap.add_argument("--status", type=int, default=200, help="forzar este código HTTP")
+    ap.add_argument("--solo-sin-cuenta", action="store_true", help="401 si la petición trae accountNumber")
+    args = ap.parse_args()
+    servidor, url = levantar(args.puerto, args.retraso, args.status, args.solo_sin_cuenta)
+    print(f"Escuchando en {url} (Ctrl+C para salir)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
@@ -0,0 +1,51 @@
+# carriers/singleflight.py
+"""
+Single-flight: peticiones idénticas que llegan mientras otra igual está en
+curso (p.ej. varios operadores cotizando la misma ruta, cada uno en su sesión
+de Streamlit y su propio event loop) esperan el resultado de esa única llamada.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self):
+        self._en_vuelo: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.llamadas = 0       # llamadas reales al carrier
+        self.coalescidas = 0    # peticiones servidas por una llamada ajena
+
+    def _correr(self, clave: str, futuro: Future, fn):
+        try:
+            futuro.set_result(fn())
+        except BaseException as e:
+            futuro.set_exception(e)
+        finally:
+            with self._lock:
+                self._en_vuelo.pop(clave, None)
+
+    async def compartir(self, clave: str, fn):
+        """
+        Ejecuta fn() (síncrona) en un hilo si no hay otra igual en vuelo y espera
+        su resultado. La llamada no depende de quien la inició: si esa tarea se
+        cancela por timeout, las demás siguen esperando el mismo resultado.
+        """
+        with self._lock:
+            futuro = self._en_vuelo.get(clave)
+            if futuro is None:
+                futuro = Future()
+                self._en_vuelo[clave] = futuro
+                self.llamadas += 1
+                threading.Thread(target=self._correr, args=(clave, futuro, fn), daemon=True).start()
+            else:
+                self.coalescidas += 1
+        return await asyncio.shield(asyncio.wrap_future(futuro))
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {"llamadas": self.llamadas, "coalescidas": self.coalescidas, "en_vuelo": len(self._en_vuelo)}
+
+
+# Compartido por todas las sesiones del proceso
+VUELOS_CARRIERS = SingleFlight()
@@ -0,0 +1,244 @@
+# correo/outbox.py
+"""
+Bandeja de salida de correos. La UI solo encola (encolar) y un hilo por proceso
+envía por lotes sobre una conexión SMTP autenticada que se reutiliza, con
+reintentos y backoff; el estatus de cada correo queda en correos_salida.
+
+    python -m correo.outbox [--db eon.db]            # vacía la cola una vez
+    python -m correo.servidor_falso --puerto 1025     # SMTP local para pruebas
+    SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_SSL=0 streamlit run eon_ops_portal/main.py
+"""
+import argparse
+import os
+import random
+import smtplib
+import sys
+import threading
+import time
+from datetime import datetime
+from email.message import EmailMessage
+
+from dotenv import load_dotenv
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db.conexion import DB_PATH, conectar
+from metricas.registro import REGISTRO, cronometro
+
+load_dotenv()
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_SSL = os.getenv("SMTP_SSL", "1").lower() not in ("0", "false", "no")
+EMAIL = os.getenv("EMAIL")
+PASSWORD = os.getenv("PASSWORD")
+
+CORREO_LOTE = int(os.getenv("CORREO_LOTE", "20"))
+CORREO_MAX_INTENTOS = int(os.getenv("CORREO_MAX_INTENTOS", "6"))
+CORREO_BACKOFF_S = float(os.getenv("CORREO_BACKOFF_S", "30"))
+CORREO_INACTIVO_S = 60      # se cierra la conexión SMTP tras este tiempo sin enviar
+CORREO_RESERVA_S = 300      # si el proceso muere enviando, la fila se libera tras esto
+
+PENDIENTE, ENVIANDO, ENVIADO, FALLIDO = "pendiente", "enviando", "enviado", "fallido"
+
+_despertar = threading.Event()
+
+
+def _ahora_iso() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def encolar(destinatario: str, asunto: str, cuerpo: str, archivo_pdf: str | None = None,
+            id_cotizacion: int | None = None, db_path: str = DB_PATH,
+            adjunto: bytes | None = None, nombre_adjunto: str | None = None) -> int:
+    """
+    Guarda el correo y despierta al enviador. Devuelve el id. El PDF va en `adjunto`
+    (bytes) o se lee de `archivo_pdf` en ese momento.
+    """
+    if adjunto is None and archivo_pdf:
+        with open(archivo_pdf, "rb") as f:
+            adjunto = f.read()
+        nombre_adjunto = os.path.basename(archivo_pdf)
+
+    # En la página solo cuesta el INSERT; el envío se mide en el hilo (eon_correo_segundos)
+    with cronometro("eon_correo_encolar_segundos", "correo_s"):
+        conn = conectar(db_path)
+        try:
+            cur = conn.execute("""
+                INSERT INTO correos_salida (destinatario, asunto, cuerpo, adjunto, nombre_adjunto, id_cotizacion, creado_en)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (destinatario, asunto, cuerpo, adjunto, nombre_adjunto, id_cotizacion, _ahora_iso()))
+            conn.commit()
+            id_correo = cur.lastrowid
+        finally:
+            conn.close()
+    _despertar.set()
+    return id_correo
+
+
+def estatus_correos(conn, id_cotizacion: int):
+    """[(id, destinatario, asunto, estatus, intentos, ultimo_error, creado_en, enviado_en)] de una cotización."""
+    return conn.execute("""
+        SELECT id, destinatario, asunto, estatus, intentos, ultimo_error, creado_en, enviado_en
+        FROM correos_salida
+        WHERE id_cotizacion = ?
+        ORDER BY id DESC
+    """, (id_cotizacion,)).fetchall()
+
+
+def _es_permanente(e: Exception) -> bool:
+    # 5xx del servidor (destinatario inexistente, mensaje rechazado): reintentar no sirve
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return all(codigo >= 500 for codigo, _ in e.recipients.values())
+    if isinstance(e, (smtplib.SMTPSenderRefused, smtplib.SMTPDataError)):
+        return e.smtp_code >= 500
+    return False
+
+
+class EnviadorCorreos:
+    def __init__(self, db_path: str = DB_PATH, host: str = SMTP_HOST, port: int = SMTP_PORT,
+                 ssl: bool = SMTP_SSL, usuario: str | None = EMAIL, contrasena: str | None = PASSWORD,
+                 lote: int = CORREO_LOTE):
+        self.db_path = db_path
+        self.host, self.port, self.ssl = host, port, ssl
+        self.usuario, self.contrasena = usuario, contrasena
+        self.lote = lote
+        self._conexion: smtplib.SMTP | None = None
+        self._ultimo_uso = 0.0
+
+    # --- conexión SMTP reutilizable ---
+    def _smtp(self) -> smtplib.SMTP:
+        if self._conexion is not None:
+            try:
+                self._conexion.noop()
+                return self._conexion
+            except smtplib.SMTPException:
+                self._cerrar()
+        clase = smtplib.SMTP_SSL if self.ssl else smtplib.SMTP
+        smtp = clase(self.host, self.port, timeout=30)
+        if self.usuario and self.contrasena:
+            smtp.login(self.usuario, self.contrasena)
+        self._conexion = smtp
+        return smtp
+
+    def _cerrar(self):
+        if self._conexion is not None:
+            try:
+                self._conexion.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._conexion = None
+
+    def _mensaje(self, destinatario, asunto, cuerpo, adjunto, nombre_adjunto) -> EmailMessage:
+        mensaje = EmailMessage()
+        mensaje["Subject"] = asunto or ""
+        mensaje["From"] = self.usuario or "no-reply@eonlogisticgroup.com"
+        mensaje["To"] = destinatario
+        mensaje.set_content(cuerpo or "")
+        if adjunto:
+            mensaje.add_attachment(adjunto, maintype="application", subtype="pdf", filename=nombre_adjunto or "adjunto.pdf")
+        return mensaje
+
+    # --- cola ---
+    def _reservar(self, conn) -> list:
+        # Reserva atómica: otro proceso con su propio enviador no toma las mismas filas
+        ahora = time.time()
+        filas = conn.execute("""
+            UPDATE correos_salida
+            SET estatus = 'enviando', siguiente_intento = ?
+            WHERE id IN (
+                SELECT id FROM correos_salida
+                WHERE estatus IN ('pendiente', 'enviando') AND siguiente_intento <= ?
+                ORDER BY siguiente_intento, id
+                LIMIT ?
+            )
+            RETURNING id, destinatario, asunto, cuerpo, adjunto, nombre_adjunto, intentos
+        """, (ahora + CORREO_RESERVA_S, ahora, self.lote)).fetchall()
+        conn.commit()
+        return sorted(filas)
+
+    def _resultado(self, conn, id_correo, intentos, error: Exception | None):
+        if error is None:
+            conn.execute(
+                "UPDATE correos_salida SET estatus = 'enviado', intentos = ?, ultimo_error = NULL, enviado_en = ? WHERE id = ?",
+                (intentos + 1, _ahora_iso(), id_correo),
+            )
+            return
+        intentos += 1
+        if _es_permanente(error) or intentos >= CORREO_MAX_INTENTOS:
+            estatus, siguiente = FALLIDO, 0
+        else:
+            espera = min(3600, CORREO_BACKOFF_S * 2 ** (intentos - 1)) * random.uniform(0.8, 1.2)
+            estatus, siguiente = PENDIENTE, time.time() + espera
+        conn.execute(
+            "UPDATE correos_salida SET estatus = ?, intentos = ?, siguiente_intento = ?, ultimo_error = ? WHERE id = ?",
+            (estatus, intentos, siguiente, f"{type(error).__name__}: {error}"[:500], id_correo),
+        )
+
+    def enviar_pendientes(self) -> dict:
+        """Envía por lotes todo lo que ya toca enviar. Devuelve {'enviados': n, 'errores': n}."""
+        enviados = errores = 0
+        conn = conectar(self.db_path)
+        try:
+            while True:
+                filas = self._reservar(conn)
+                if not filas:
+                    break
+                for id_correo, destinatario, asunto, cuerpo, adjunto, nombre_adjunto, intentos in filas:
+                    t0 = time.perf_counter()
+                    try:
+                        self._smtp().send_message(self._mensaje(destinatario, asunto, cuerpo, adjunto, nombre_adjunto))
+                        error = None
+                        enviados += 1
+                    except (smtplib.SMTPException, OSError) as e:
+                        error = e
+                        errores += 1
+                        if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                            # Conexión caída: la siguiente fila reconecta (un rechazo con código no la invalida)
+                            self._cerrar()
+                    REGISTRO.observar("eon_correo_segundos", time.perf_counter() - t0,
+                                      resultado="enviado" if error is None else type(error).__name__)
+                    self._resultado(conn, id_correo, intentos, error)
+                    conn.commit()
+                self._ultimo_uso = time.monotonic()
+        finally:
+            conn.close()
+        return {"enviados": enviados, "errores": errores}
+
+    def ciclo(self, espera_s: float = 5.0):
+        while True:
+            try:
+                self.enviar_pendientes()
+            except Exception as e:
+                print("❌ Error en el enviador de correos:", e)
+            if self._conexion is not None and time.monotonic() - self._ultimo_uso > CORREO_INACTIVO_S:
+                self._cerrar()
+            _despertar.wait(espera_s)
+            _despertar.clear()
+
+
+_lock = threading.Lock()
+_hilo: threading.Thread | None = None
+
+
+def iniciar_enviador(db_path: str = DB_PATH):
+    """Un hilo daemon por proceso; encolar() lo despierta al instante."""
+    global _hilo
+    with _lock:
+        if _hilo is None or not _hilo.is_alive():
+            _hilo = threading.Thread(target=EnviadorCorreos(db_path).ciclo, name="enviador-correos", daemon=True)
+            _hilo.start()
+    return _hilo
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Envía los correos pendientes de correos_salida")
+    ap.add_argument("--db", default=DB_PATH)
+    args = ap.parse_args()
+    from db.migraciones import asegurar_esquema
+    asegurar_esquema(args.db)
+    enviador = EnviadorCorreos(args.db)
+    print(enviador.enviar_pendientes())
+    enviador._cerrar()
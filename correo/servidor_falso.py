@@ -0,0 +1,100 @@
+# correo/servidor_falso.py
+"""
+Servidor SMTP local para probar la bandeja de salida sin mandar correos reales.
+Acepta cualquier AUTH PLAIN, guarda los mensajes en memoria y cuenta conexiones
+(para comprobar que el enviador reutiliza la sesión).
+
+    python -m correo.servidor_falso --puerto 1025
+    SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_SSL=0 python -m correo.outbox
+"""
+import argparse
+import socketserver
+import threading
+from collections import Counter
+from email import message_from_bytes, policy
+
+
+class _Manejador(socketserver.StreamRequestHandler):
+    def _responder(self, *lineas):
+        self.wfile.write(("\r\n".join(lineas) + "\r\n").encode())
+
+    def handle(self):
+        srv = self.server
+        with srv.lock:
+            srv.contadores["conexiones"] += 1
+        self._responder("220 servidor_falso ESMTP")
+        destinatarios = []
+        while True:
+            linea = self.rfile.readline()
+            if not linea:
+                return
+            comando = linea.decode(errors="replace").rstrip("\r\n")
+            verbo = comando.split(" ", 1)[0].upper()
+            if verbo == "EHLO":
+                self._responder("250-servidor_falso", "250-AUTH PLAIN", "250 8BITMIME")
+            elif verbo == "HELO":
+                self._responder("250 servidor_falso")
+            elif verbo == "AUTH":
+                with srv.lock:
+                    srv.contadores["logins"] += 1
+                self._responder("235 2.7.0 Authentication successful")
+            elif verbo == "MAIL":
+                destinatarios = []
+                self._responder("250 OK")
+            elif verbo == "RCPT":
+                correo = comando.split(":", 1)[1].strip().strip("<>")
+                if correo in srv.config["rechazar"]:
+                    self._responder("550 5.1.1 No such user")
+                else:
+                    destinatarios.append(correo)
+                    self._responder("250 OK")
+            elif verbo == "DATA":
+                self._responder("354 End data with <CR><LF>.<CR><LF>")
+                datos = []
+                while True:
+                    linea = self.rfile.readline()
+                    if not linea or linea in (b".\r\n", b".\n"):
+                        break
+                    datos.append(linea[1:] if linea.startswith(b"..") else linea)
+                with srv.lock:
+                    if srv.config["fallos_temporales"] > 0:
+                        srv.config["fallos_temporales"] -= 1
+                        self._responder("451 4.3.0 Temporary failure")
+                        continue
+                    srv.mensajes.append((destinatarios, message_from_bytes(b"".join(datos), policy=policy.default)))
+                self._responder("250 OK queued")
+            elif verbo in ("RSET", "NOOP"):
+                self._responder("250 OK")
+            elif verbo == "QUIT":
+                self._responder("221 Bye")
+                return
+            else:
+                self._responder("502 Command not implemented")
+
+
+def levantar(puerto: int = 0, rechazar=(), fallos_temporales: int = 0):
+    """Arranca el servidor en un hilo; devuelve (servidor, puerto). servidor.mensajes = [(destinatarios, Message)]."""
+    servidor = socketserver.ThreadingTCPServer(("127.0.0.1", puerto), _Manejador)
+    servidor.daemon_threads = True
+    servidor.config = {"rechazar": set(rechazar), "fallos_temporales": fallos_temporales}
+    servidor.mensajes = []
+    servidor.contadores = Counter()
+    servidor.lock = threading.Lock()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, servidor.server_address[1]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Servidor SMTP falso")
+    ap.add_argument("--puerto", type=int, default=1025)
+    args = ap.parse_args()
+    servidor, puerto = levantar(args.puerto)
+    print(f"SMTP en 127.0.0.1:{puerto} (Ctrl+C para salir)")
+    try:
+        while True:
+            n = len(servidor.mensajes)
+            threading.Event().wait(2)
+            for destinatarios, msg in servidor.mensajes[n:]:
+                print(f"✉️  {', '.join(destinatarios)} · {msg['Subject']}")
+    except KeyboardInterrupt:
+        servidor.shutdown()
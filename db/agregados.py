@@ -0,0 +1,138 @@
+# db/agregados.py
+"""
+Rollup diario de cotizaciones para los dashboards. Lo mantienen triggers de
+SQLite en cada INSERT/UPDATE/DELETE de cotizaciones, así que cualquier escritor
+(portal, app de clientes, lotes) lo deja al día sin código extra.
+"""
+import sqlite3
+
+import pandas as pd
+
+# Llaves sin NULL ('' = sin valor) para que el UPSERT choque con la PK
+_LLAVES_NEW = """
+    COALESCE(DATE(NEW.fecha), ''), COALESCE(NEW.estatus, ''), COALESCE(NEW.proveedor_asignado, ''),
+    COALESCE(NEW.cliente, ''), COALESCE(NEW.origen, '') || ' → ' || COALESCE(NEW.destino, '')
+"""
+_LLAVES_OLD = _LLAVES_NEW.replace("NEW.", "OLD.")
+
+_SUMAR = """
+    INSERT INTO cotizaciones_diarias (fecha, estatus, proveedor, cliente, ruta, movimientos, ingreso)
+    VALUES ({llaves}, 1, COALESCE({fila}.precio_total, 0))
+    ON CONFLICT (fecha, estatus, proveedor, cliente, ruta) DO UPDATE SET
+        movimientos = movimientos + 1,
+        ingreso = ingreso + excluded.ingreso;
+"""
+_RESTAR = """
+    UPDATE cotizaciones_diarias
+    SET movimientos = movimientos - 1, ingreso = ingreso - COALESCE(OLD.precio_total, 0)
+    WHERE (fecha, estatus, proveedor, cliente, ruta) = ({llaves});
+"""
+
+DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS cotizaciones_diarias (
+        fecha TEXT NOT NULL,
+        estatus TEXT NOT NULL,
+        proveedor TEXT NOT NULL,
+        cliente TEXT NOT NULL,
+        ruta TEXT NOT NULL,
+        movimientos INTEGER NOT NULL DEFAULT 0,
+        ingreso REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, estatus, proveedor, cliente, ruta)
+    ) WITHOUT ROWID
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_cotizaciones_diarias_ins
+    AFTER INSERT ON cotizaciones
+    BEGIN
+        {_SUMAR.format(llaves=_LLAVES_NEW, fila="NEW")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_cotizaciones_diarias_del
+    AFTER DELETE ON cotizaciones
+    BEGIN
+        {_RESTAR.format(llaves=_LLAVES_OLD)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_cotizaciones_diarias_upd
+    AFTER UPDATE OF fecha, estatus, proveedor_asignado, cliente, origen, destino, precio_total ON cotizaciones
+    BEGIN
+        {_RESTAR.format(llaves=_LLAVES_OLD)}
+        {_SUMAR.format(llaves=_LLAVES_NEW, fila="NEW")}
+    END
+    """,
+]
+
+_BACKFILL = """
+    INSERT INTO cotizaciones_diarias (fecha, estatus, proveedor, cliente, ruta, movimientos, ingreso)
+    SELECT COALESCE(DATE(fecha), ''), COALESCE(estatus, ''), COALESCE(proveedor_asignado, ''),
+           COALESCE(cliente, ''), COALESCE(origen, '') || ' → ' || COALESCE(destino, ''),
+           COUNT(*), COALESCE(SUM(precio_total), 0)
+    FROM cotizaciones /* recorrido completo */
+    GROUP BY 1, 2, 3, 4, 5
+"""
+
+
+def crear_agregados(conn: sqlite3.Connection):
+    """Tabla, triggers y carga inicial desde el histórico. No hace commit."""
+    for ddl in DDL:
+        conn.execute(ddl)
+    conn.execute("DELETE FROM cotizaciones_diarias")
+    conn.execute(_BACKFILL)
+
+
+def reconstruir_agregados(conn: sqlite3.Connection):
+    """Recalcula el rollup completo (p.ej. tras cargas masivas con triggers desactivados)."""
+    conn.execute("DELETE FROM cotizaciones_diarias")
+    conn.execute(_BACKFILL)
+    conn.commit()
+
+
+# -----------------------------
+# Lecturas para los dashboards
+# -----------------------------
+def _rango(desde, hasta):
+    condiciones, params = ["movimientos > 0"], []
+    if desde:
+        condiciones.append("fecha >= ?")
+        params.append(str(desde))
+    if hasta:
+        condiciones.append("fecha <= ?")
+        params.append(str(hasta))
+    return " AND ".join(condiciones), params
+
+
+def rango_fechas(conn: sqlite3.Connection):
+    return conn.execute(
+        "SELECT MIN(fecha), MAX(fecha) FROM cotizaciones_diarias WHERE movimientos > 0 AND fecha != ''"
+    ).fetchone()
+
+
+def total_por(conn: sqlite3.Connection, dimension: str, desde=None, hasta=None) -> pd.DataFrame:
+    """Movimientos e ingreso agrupados por una dimensión del rollup."""
+    if dimension not in ("fecha", "estatus", "proveedor", "cliente", "ruta"):
+        raise ValueError(f"Dimensión no válida: {dimension}")
+    where, params = _rango(desde, hasta)
+    return pd.read_sql_query(f"""
+        SELECT {dimension}, SUM(movimientos) AS movimientos, SUM(ingreso) AS ingreso
+        FROM cotizaciones_diarias
+        WHERE {where}
+        GROUP BY {dimension}
+        HAVING SUM(movimientos) > 0
+        ORDER BY movimientos DESC
+    """, conn, params=params)
+
+
+def contar(conn: sqlite3.Connection, estatus=None, proveedor=None, desde=None, hasta=None) -> int:
+    where, params = _rango(desde, hasta)
+    if estatus is not None:
+        where += f" AND estatus IN ({', '.join('?' * len(estatus))})"
+        params += list(estatus)
+    if proveedor is not None:
+        where += " AND proveedor = ?"
+        params.append(proveedor)
+    return conn.execute(
+        f"SELECT COALESCE(SUM(movimientos), 0) FROM cotizaciones_diarias WHERE {where}", params
+    ).fetchone()[0]
@@ -0,0 +1,147 @@
+# db/conexion.py
+import os
+import queue
+import sqlite3
+import time
+
+import streamlit as st
+
+from metricas.registro import registrar_sql
+
+DB_PATH = os.path.abspath(os.getenv("EON_DB_PATH", "eon.db"))
+
+# WAL: los lectores (Live Tracking, dashboards) no se bloquean mientras Pricing escribe.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-65536",      # 64 MiB por conexión
+    "PRAGMA mmap_size=268435456",    # 256 MiB
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class CursorMedido(sqlite3.Cursor):
+    """Cursor que reporta número y duración de sentencias a metricas/registro.py."""
+
+    def execute(self, sql, parametros=()):
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            registrar_sql(time.perf_counter() - t0, 1)
+
+    def executemany(self, sql, parametros):
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, parametros)
+        finally:
+            registrar_sql(time.perf_counter() - t0, 1)
+
+    def executescript(self, script):
+        t0 = time.perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            registrar_sql(time.perf_counter() - t0, 1)
+
+    # En SQLite el trabajo de un SELECT sigue en los fetch
+    def fetchone(self):
+        t0 = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            registrar_sql(time.perf_counter() - t0)
+
+    def fetchmany(self, *args):
+        t0 = time.perf_counter()
+        try:
+            return super().fetchmany(*args)
+        finally:
+            registrar_sql(time.perf_counter() - t0)
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            registrar_sql(time.perf_counter() - t0)
+
+
+class ConexionPool(sqlite3.Connection):
+    """Conexión sqlite3 normal cuyo close() la regresa al pool en vez de cerrarla."""
+
+    _pool = None
+    _prestada = False
+
+    # Connection.execute crea su cursor en C; pasar por cursor() para medirlo
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+    def close(self):
+        if self._pool is None:
+            return super().close()
+        if self._prestada:
+            self._pool._devolver(self)
+
+
+class PoolConexiones:
+    """
+    Pool thread-safe de conexiones a un archivo SQLite. Las conexiones se abren
+    con check_same_thread=False porque Streamlit corre cada rerun en un hilo
+    distinto; el pool garantiza que cada una la usa un solo hilo a la vez.
+    """
+
+    def __init__(self, db_path: str, max_inactivas: int = 8):
+        self.db_path = db_path
+        self._libres = queue.LifoQueue(maxsize=max_inactivas)
+
+    def _abrir(self) -> ConexionPool:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, factory=ConexionPool)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        conn._pool = self
+        return conn
+
+    def obtener(self) -> ConexionPool:
+        try:
+            conn = self._libres.get_nowait()
+        except queue.Empty:
+            conn = self._abrir()
+        conn._prestada = True
+        return conn
+
+    def _devolver(self, conn: ConexionPool):
+        conn._prestada = False
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._libres.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            sqlite3.Connection.close(conn)
+
+    def cerrar_todo(self):
+        while True:
+            try:
+                sqlite3.Connection.close(self._libres.get_nowait())
+            except queue.Empty:
+                break
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_pool(db_path: str = DB_PATH) -> PoolConexiones:
+    return PoolConexiones(db_path)
+
+
+def conectar(db_path: str = DB_PATH) -> ConexionPool:
+    """Reemplazo de sqlite3.connect(DB_PATH): conn.close() devuelve la conexión al pool."""
+    return obtener_pool(os.path.abspath(db_path)).obtener()
@@ -0,0 +1,142 @@
+# db/consultas.py
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+NO_ASIGNADO = "No Asignado"
+
+
+@dataclass
+class FiltroCotizaciones:
+    """Filtros de los listados de cotizaciones; todos se traducen a WHERE."""
+    estatus: str | None = None
+    proveedor: str | None = None          # NO_ASIGNADO = sin proveedor
+    cliente: str | None = None            # igualdad exacta
+    sin_proveedor: bool = False
+    con_proveedor: bool = False
+    cliente_contiene: str | None = None   # LIKE sin distinguir mayúsculas
+    origen_contiene: str | None = None
+    destino_contiene: str | None = None
+    tipos_unidad: list = field(default_factory=list)
+    desde: date | None = None
+    hasta: date | None = None
+
+
+def _like(texto: str) -> str:
+    escapado = texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escapado}%"
+
+
+def where_cotizaciones(filtro: FiltroCotizaciones, alias: str = "") -> tuple[str, list]:
+    p = f"{alias}." if alias else ""
+    condiciones, params = [], []
+
+    sin_prov = f"({p}proveedor_asignado IS NULL OR {p}proveedor_asignado = '')"
+    if filtro.sin_proveedor or filtro.proveedor == NO_ASIGNADO:
+        condiciones.append(sin_prov)
+    elif filtro.proveedor:
+        condiciones.append(f"{p}proveedor_asignado = ?")
+        params.append(filtro.proveedor)
+    if filtro.con_proveedor:
+        condiciones.append(f"NOT {sin_prov}")
+    if filtro.estatus:
+        condiciones.append(f"{p}estatus = ?")
+        params.append(filtro.estatus)
+    if filtro.cliente:
+        condiciones.append(f"{p}cliente = ?")
+        params.append(filtro.cliente)
+    for columna, texto in (
+        ("cliente", filtro.cliente_contiene),
+        ("origen", filtro.origen_contiene),
+        ("destino", filtro.destino_contiene),
+    ):
+        if texto:
+            condiciones.append(f"{p}{columna} LIKE ? ESCAPE '\\'")
+            params.append(_like(texto))
+    if filtro.tipos_unidad:
+        condiciones.append(f"{p}tipo_unidad IN ({', '.join('?' * len(filtro.tipos_unidad))})")
+        params.extend(filtro.tipos_unidad)
+    if filtro.desde:
+        condiciones.append(f"{p}fecha >= ?")
+        params.append(str(filtro.desde))
+    if filtro.hasta:
+        condiciones.append(f"{p}fecha <= ?")
+        params.append(str(filtro.hasta))
+
+    return (" AND ".join(condiciones) or "1 = 1"), params
+
+
+def pagina_cotizaciones(
+    conn: sqlite3.Connection,
+    columnas: str,
+    filtro: FiltroCotizaciones,
+    cursor: tuple | None = None,
+    tamano: int = 50,
+) -> tuple[pd.DataFrame, tuple | None]:
+    """
+    Una página ordenada por (fecha DESC, id DESC) con paginación por llave: `cursor`
+    es el (fecha, id) de la última fila de la página anterior. Devuelve la página y
+    el cursor de la siguiente (None si es la última).
+    """
+    where, params = where_cotizaciones(filtro)
+    if cursor is not None:
+        fecha, id_ = cursor
+        if fecha is None:
+            # Las fechas NULL van al final en orden DESC
+            where += " AND fecha IS NULL AND id < ?"
+            params = params + [id_]
+        else:
+            where += " AND (fecha < ? OR (fecha = ? AND id < ?) OR fecha IS NULL)"
+            params = params + [fecha, fecha, id_]
+
+    sql = f"""
+        SELECT {columnas}
+        FROM cotizaciones
+        WHERE {where}
+        ORDER BY fecha DESC, id DESC
+        LIMIT ?
+    """
+    df = pd.read_sql_query(sql, conn, params=params + [tamano + 1])
+    siguiente = None
+    if len(df) > tamano:
+        df = df.iloc[:tamano]
+        ultima = df.iloc[-1]
+        siguiente = (ultima["fecha"], int(ultima["id"]))
+    return df, siguiente
+
+
+def valores_distintos(conn: sqlite3.Connection, columna: str) -> list:
+    """Opciones para selectbox/multiselect sin cargar la tabla (DISTINCT sobre índice)."""
+    if columna not in ("estatus", "proveedor_asignado", "cliente", "tipo_unidad"):
+        raise ValueError(f"Columna no permitida: {columna}")
+    filas = conn.execute(
+        f"SELECT DISTINCT {columna} FROM cotizaciones WHERE {columna} IS NOT NULL AND {columna} != '' ORDER BY {columna}"
+    ).fetchall()
+    return [f[0] for f in filas]
+
+
+def pagina_en_sesion(clave: str, conn, columnas: str, filtro: FiltroCotizaciones, tamano: int = 50) -> pd.DataFrame:
+    """
+    Página actual de un listado con controles Anterior/Siguiente. La pila de
+    cursores vive en st.session_state[clave] y se reinicia si cambian los filtros.
+    """
+    firma = repr(filtro)
+    estado = st.session_state.get(clave)
+    if estado is None or estado["firma"] != firma:
+        estado = {"firma": firma, "cursores": [None], "siguiente": None}
+        st.session_state[clave] = estado
+
+    col_ant, col_pag, col_sig = st.columns([1, 2, 1])
+    if col_ant.button("⬅️ Anterior", key=f"{clave}_anterior", disabled=len(estado["cursores"]) == 1):
+        if len(estado["cursores"]) > 1:
+            estado["cursores"].pop()
+    if col_sig.button("Siguiente ➡️", key=f"{clave}_siguiente", disabled=estado["siguiente"] is None):
+        if estado["siguiente"] is not None:
+            estado["cursores"].append(estado["siguiente"])
+
+    df, estado["siguiente"] = pagina_cotizaciones(conn, columnas, filtro, estado["cursores"][-1], tamano)
+    col_pag.caption(f"Página {len(estado['cursores'])} · {len(df)} registro(s)")
+    return df
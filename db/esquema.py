@@ -0,0 +1,193 @@
+# db/esquema.py
+import sqlite3
+
+# Esquema único para el portal y la app de clientes (antes cada módulo creaba
+# sus propias versiones de cotizaciones/ofertas/usuarios). Una tabla nueva se
+# agrega aquí y la crea su migración en db/migraciones.py, nunca la 1.
+TABLAS = {
+    "cotizaciones": """
+        CREATE TABLE IF NOT EXISTS cotizaciones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cotizacion_id TEXT,
+            cliente TEXT,
+            origen TEXT,
+            destino TEXT,
+            distancia_km REAL,
+            peso_kg REAL,
+            descripcion_paquete TEXT,
+            tipo_unidad TEXT,
+            precio_total REAL,
+            fecha TEXT,
+            estatus_url TEXT,
+            archivo_pdf TEXT,
+            proveedor_asignado TEXT,
+            estatus TEXT DEFAULT 'Pendiente por asignar'
+        )
+    """,
+    # Tarifas con UNIQUE(origen, destino) para ON CONFLICT
+    "tarifas": """
+        CREATE TABLE IF NOT EXISTS tarifas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            origen TEXT,
+            destino TEXT,
+            tarifa_base REAL,
+            UNIQUE(origen, destino)
+        )
+    """,
+    # Márgenes con UNIQUE(criterio, valor)
+    "margenes": """
+        CREATE TABLE IF NOT EXISTS margenes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            criterio TEXT,   -- 'cliente' / 'unidad' / 'general'
+            valor TEXT,
+            margen_porcentaje REAL,
+            UNIQUE(criterio, valor)
+        )
+    """,
+    "margenes_peso": """
+        CREATE TABLE IF NOT EXISTS margenes_peso (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            rango_min REAL,
+            rango_max REAL,
+            margen_porcentaje REAL
+        )
+    """,
+    "proveedores_rutas": """
+        CREATE TABLE IF NOT EXISTS proveedores_rutas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            proveedor TEXT,
+            origen TEXT,
+            destino TEXT,
+            tipo_unidad TEXT,
+            factor_precio REAL
+        )
+    """,
+    "ofertas": """
+        CREATE TABLE IF NOT EXISTS ofertas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_cotizacion INTEGER,
+            proveedor TEXT,
+            precio_ofertado REAL,
+            mensaje TEXT,
+            fecha TEXT DEFAULT (DATE('now')),
+            FOREIGN KEY (id_cotizacion) REFERENCES cotizaciones(id)
+        )
+    """,
+    # Orden de columnas fijo: login.py lee usuario[2] (correo) y usuario[4] (rol)
+    "usuarios": """
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            correo TEXT UNIQUE NOT NULL,
+            contraseña TEXT NOT NULL,
+            rol TEXT CHECK(rol IN ('admin', 'cliente', 'proveedor')) NOT NULL
+        )
+    """,
+    # Precios precalculados por ruta frecuente y banda de peso (pricing/matriz.py)
+    "matriz_rutas": """
+        CREATE TABLE IF NOT EXISTS matriz_rutas (
+            origen TEXT NOT NULL,
+            destino TEXT NOT NULL,
+            peso_kg REAL NOT NULL,
+            precio_tarifa REAL,
+            motivo_tarifa TEXT,
+            tarifa_en TEXT,
+            precio_dhl REAL,
+            producto_dhl TEXT,
+            error_dhl TEXT,
+            dhl_en TEXT,
+            PRIMARY KEY (origen, destino, peso_kg)
+        ) WITHOUT ROWID
+    """,
+    # Bandeja de salida de correos (correo/outbox.py); el adjunto va completo en la fila
+    "correos_salida": """
+        CREATE TABLE IF NOT EXISTS correos_salida (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            destinatario TEXT NOT NULL,
+            asunto TEXT,
+            cuerpo TEXT,
+            adjunto BLOB,
+            nombre_adjunto TEXT,
+            id_cotizacion INTEGER,
+            estatus TEXT NOT NULL DEFAULT 'pendiente',
+            intentos INTEGER NOT NULL DEFAULT 0,
+            siguiente_intento REAL NOT NULL DEFAULT 0,
+            ultimo_error TEXT,
+            creado_en TEXT,
+            enviado_en TEXT
+        )
+    """,
+    # Última oferta exportada por cada exportación incremental (db/exportacion.py)
+    "marcas_exportacion": """
+        CREATE TABLE IF NOT EXISTS marcas_exportacion (
+            nombre TEXT PRIMARY KEY,
+            ultimo_id INTEGER NOT NULL,
+            ultima_fecha TEXT,
+            filas INTEGER,
+            actualizado_en TEXT
+        )
+    """,
+    # CP por ciudad, aprendido de las cotizaciones DHL (las rutas de tarifas usan ciudades)
+    "ciudades_cp": """
+        CREATE TABLE IF NOT EXISTS ciudades_cp (
+            ciudad TEXT PRIMARY KEY,
+            cp TEXT NOT NULL,
+            actualizado_en TEXT
+        )
+    """,
+}
+
+# Columnas que pueden faltar en bases creadas por versiones anteriores del
+# portal o de la app (definición compatible con ALTER TABLE ADD COLUMN).
+COLUMNAS_HEREDADAS = {
+    "cotizaciones": [
+        ("cotizacion_id", "TEXT"),
+        ("estatus_url", "TEXT"),
+        ("archivo_pdf", "TEXT"),
+        ("proveedor_asignado", "TEXT"),
+        ("precio_total", "REAL"),
+        ("estatus", "TEXT DEFAULT 'Pendiente por asignar'"),
+    ],
+    "usuarios": [
+        ("contraseña", "TEXT"),
+        ("rol", "TEXT CHECK(rol IN ('admin', 'cliente', 'proveedor'))"),
+    ],
+}
+
+# Índices secundarios por versión. Una versión nueva se agrega al final (con su
+# migración en db/migraciones.py); nunca se editan las anteriores.
+INDICES = {
+    1: [
+        ("idx_cotizaciones_fecha", "cotizaciones (fecha, id)"),
+        ("idx_cotizaciones_cliente", "cotizaciones (cliente, fecha)"),
+        ("idx_cotizaciones_proveedor", "cotizaciones (proveedor_asignado, fecha)"),
+        ("idx_cotizaciones_estatus", "cotizaciones (estatus, fecha)"),
+        ("idx_ofertas_cotizacion", "ofertas (id_cotizacion)"),
+        ("idx_ofertas_proveedor", "ofertas (proveedor, id_cotizacion)"),
+        ("idx_ofertas_fecha", "ofertas (fecha)"),
+        ("idx_proveedores_rutas_ruta", "proveedores_rutas (origen, destino, tipo_unidad)"),
+        ("idx_usuarios_nombre", "usuarios (nombre)"),
+    ],
+    # Opciones del filtro "Tipo de unidad" sin recorrer la tabla
+    2: [
+        ("idx_cotizaciones_tipo_unidad", "cotizaciones (tipo_unidad)"),
+    ],
+    # Ranking de rutas frecuentes para la matriz precalculada
+    3: [
+        ("idx_cotizaciones_ruta", "cotizaciones (origen, destino)"),
+    ],
+    4: [
+        ("idx_correos_salida_cola", "correos_salida (estatus, siguiente_intento)"),
+        ("idx_correos_salida_cotizacion", "correos_salida (id_cotizacion)"),
+    ],
+}
+
+
+def columnas(conn: sqlite3.Connection, tabla: str) -> set:
+    return {fila[1] for fila in conn.execute(f"PRAGMA table_info({tabla})")}
+
+
+def crear_indices(conn: sqlite3.Connection, version: int):
+    """Crea los índices de una versión del set. No hace commit."""
+    for nombre, definicion in INDICES[version]:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {definicion}")
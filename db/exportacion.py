@@ -0,0 +1,231 @@
+# db/exportacion.py
+"""
+Exportación de ofertas con su cotización (el mismo JOIN de "Ver ofertas" en el
+panel de administrador) a CSV o Parquet para Finanzas. Recorre ofertas por id
+con fetchmany y escribe cada lote con pyarrow en cuanto llega: la memoria no
+crece con el tamaño de la tabla.
+
+Incremental: marcas_exportacion guarda, por nombre de exportación, la última
+oferta exportada (id y fecha). La siguiente exportación empieza después de ese
+id; los cambios posteriores a una cotización ya exportada (estatus, proveedor
+asignado) no vuelven a salir.
+
+    python -m db.exportacion --salida ofertas.parquet [--formato parquet] [--db eon.db]
+                             [--incremental [finanzas] | --desde 2024-01-01 --hasta 2024-12-31]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db.conexion import DB_PATH, conectar
+from db.migraciones import asegurar_esquema
+
+EXPORT_LOTE = int(os.getenv("EXPORT_LOTE", "20000"))   # filas por fetchmany / lote de pyarrow
+
+MARCA_FINANZAS = "finanzas"   # la que avanza la descarga incremental del panel de administrador
+
+FORMATOS = {"csv": ("text/csv", ".csv"), "parquet": ("application/vnd.apache.parquet", ".parquet")}
+
+# Columnas de "Ver ofertas" más las que Finanzas cruza con facturación. Los
+# numéricos van con CAST: columnas heredadas pueden traer texto y el esquema
+# de pyarrow es fijo
+ESQUEMA = pa.schema([
+    ("id_oferta", pa.int64()),
+    ("id_cotizacion", pa.int64()),
+    ("proveedor", pa.string()),
+    ("precio_ofertado", pa.float64()),
+    ("mensaje", pa.string()),
+    ("fecha_oferta", pa.string()),
+    ("origen", pa.string()),
+    ("destino", pa.string()),
+    ("tipo_unidad", pa.string()),
+    ("descripcion_paquete", pa.string()),
+    ("cliente", pa.string()),
+    ("cotizacion_id", pa.string()),
+    ("peso_kg", pa.float64()),
+    ("precio_total", pa.float64()),
+    ("fecha_cotizacion", pa.string()),
+    ("estatus", pa.string()),
+    ("proveedor_asignado", pa.string()),
+])
+
+
+def _fechas_ofertas(desde: date | None, hasta: date | None) -> tuple[str, list]:
+    condiciones, params = [], []
+    if desde:
+        condiciones.append("o.fecha >= ?")
+        params.append(str(desde))
+    if hasta:
+        condiciones.append("o.fecha <= ?")
+        params.append(str(hasta))
+    return (" AND ".join(condiciones) or "1 = 1"), params
+
+
+def ultimo_id_ofertas(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT MAX(id) FROM ofertas").fetchone()[0] or 0
+
+
+def contar_ofertas(conn: sqlite3.Connection, desde_id: int = 0, desde: date | None = None,
+                   hasta: date | None = None) -> int:
+    """Las mismas filas que lotes_ofertas: ofertas sin cotización (huérfanas) no cuentan."""
+    fechas, params = _fechas_ofertas(desde, hasta)
+    return conn.execute(f"""
+        SELECT COUNT(*)
+        FROM ofertas o
+        JOIN cotizaciones c ON o.id_cotizacion = c.id
+        WHERE o.id > ? AND o.id <= ? AND {fechas}
+    """, [desde_id, ultimo_id_ofertas(conn)] + params).fetchone()[0]
+
+
+def lotes_ofertas(conn: sqlite3.Connection, desde_id: int = 0, hasta_id: int | None = None,
+                  desde: date | None = None, hasta: date | None = None, tamano: int = EXPORT_LOTE):
+    """RecordBatch de ESQUEMA en orden de id de oferta, de `tamano` filas como máximo."""
+    if hasta_id is None:
+        hasta_id = ultimo_id_ofertas(conn)
+    fechas, params = _fechas_ofertas(desde, hasta)
+    # Rango de rowid: cada lote sigue en la página de la tabla donde quedó el anterior
+    cursor = conn.execute(f"""
+        SELECT o.id, CAST(o.id_cotizacion AS INTEGER), o.proveedor, CAST(o.precio_ofertado AS REAL),
+               o.mensaje, o.fecha, c.origen, c.destino, c.tipo_unidad, c.descripcion_paquete, c.cliente,
+               c.cotizacion_id, CAST(c.peso_kg AS REAL), CAST(c.precio_total AS REAL), c.fecha,
+               c.estatus, c.proveedor_asignado
+        FROM ofertas o
+        JOIN cotizaciones c ON o.id_cotizacion = c.id
+        WHERE o.id > ? AND o.id <= ? AND {fechas}
+        ORDER BY o.id
+    """, [desde_id, hasta_id] + params)
+    try:
+        while True:
+            filas = cursor.fetchmany(tamano)
+            if not filas:
+                break
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(columna, type=campo.type) for columna, campo in zip(zip(*filas), ESQUEMA)],
+                schema=ESQUEMA,
+            )
+    finally:
+        cursor.close()
+
+
+def exportar_ofertas(conn: sqlite3.Connection, destino, formato: str = "csv", desde_id: int = 0,
+                     desde: date | None = None, hasta: date | None = None,
+                     tamano_lote: int = EXPORT_LOTE, al_avanzar=None) -> dict:
+    """
+    Escribe en `destino` (ruta o archivo binario) las ofertas con id > desde_id
+    (y en el rango de fechas de la oferta, si se da). al_avanzar(filas) se llama
+    tras cada lote. Devuelve filas, ultimo_id y ultima_fecha exportados (para la
+    marca incremental) y segundos. No toca marcas_exportacion.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no válido: {formato}")
+    inicio = time.perf_counter()
+    # Tope fijo al empezar: las ofertas que lleguen durante la exportación
+    # quedan para la siguiente en vez de salir a medias
+    hasta_id = ultimo_id_ofertas(conn)
+    filas, ultimo_id, ultima_fecha = 0, desde_id, None
+
+    if formato == "csv":
+        if isinstance(destino, str):
+            destino = open(destino, "wb")
+            cerrar = True
+        else:
+            cerrar = False
+        # BOM para que Excel abra los acentos como UTF-8
+        destino.write(b"\xef\xbb\xbf")
+        escritor = pa_csv.CSVWriter(destino, ESQUEMA)
+    else:
+        cerrar = False
+        escritor = pq.ParquetWriter(destino, ESQUEMA, compression="zstd")
+    try:
+        for lote in lotes_ofertas(conn, desde_id, hasta_id, desde, hasta, tamano_lote):
+            escritor.write_batch(lote)
+            filas += lote.num_rows
+            ultimo_id = lote.column("id_oferta")[-1].as_py()
+            fecha_lote = pc.max(lote.column("fecha_oferta")).as_py()
+            if fecha_lote and (ultima_fecha is None or fecha_lote > ultima_fecha):
+                ultima_fecha = fecha_lote
+            if al_avanzar:
+                al_avanzar(filas)
+    finally:
+        escritor.close()
+        if cerrar:
+            destino.close()
+
+    return {
+        "filas": filas,
+        "ultimo_id": ultimo_id,
+        "ultima_fecha": ultima_fecha,
+        "segundos": round(time.perf_counter() - inicio, 2),
+    }
+
+
+# -----------------------------
+# Marcas (exportación incremental)
+# -----------------------------
+def leer_marca(conn: sqlite3.Connection, nombre: str) -> tuple:
+    """(ultimo_id, ultima_fecha, actualizado_en) de la exportación `nombre`; (0, None, None) si nunca corrió."""
+    fila = conn.execute(
+        "SELECT ultimo_id, ultima_fecha, actualizado_en FROM marcas_exportacion WHERE nombre = ?", (nombre,)
+    ).fetchone()
+    return tuple(fila) if fila else (0, None, None)
+
+
+def guardar_marca(conn: sqlite3.Connection, nombre: str, resultado: dict):
+    """Avanza la marca con el resultado de exportar_ofertas (si exportó algo) y hace commit."""
+    if not resultado["filas"]:
+        return
+    conn.execute("""
+        INSERT INTO marcas_exportacion (nombre, ultimo_id, ultima_fecha, filas, actualizado_en)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (nombre) DO UPDATE SET
+            ultimo_id = MAX(ultimo_id, excluded.ultimo_id),
+            ultima_fecha = excluded.ultima_fecha,
+            filas = excluded.filas,
+            actualizado_en = excluded.actualizado_en
+    """, (nombre, resultado["ultimo_id"], resultado["ultima_fecha"], resultado["filas"],
+          datetime.now().isoformat(timespec="seconds")))
+    conn.commit()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Exporta ofertas con su cotización a CSV o Parquet")
+    ap.add_argument("--salida", required=True)
+    ap.add_argument("--formato", choices=list(FORMATOS), help="por defecto, según la extensión de --salida")
+    ap.add_argument("--incremental", metavar="NOMBRE", nargs="?", const=MARCA_FINANZAS,
+                    help=f"solo lo nuevo desde la marca NOMBRE (por defecto {MARCA_FINANZAS}), y la avanza")
+    ap.add_argument("--desde-id", type=int, default=0)
+    ap.add_argument("--desde", type=date.fromisoformat)
+    ap.add_argument("--hasta", type=date.fromisoformat)
+    ap.add_argument("--db", default=DB_PATH)
+    args = ap.parse_args()
+    if args.incremental and (args.desde or args.hasta):
+        # La marca avanzaría hasta el último id exportado y las ofertas fuera
+        # del rango con id menor ya no saldrían en ninguna incremental
+        ap.error("--incremental no se combina con --desde/--hasta")
+
+    formato = args.formato or ("parquet" if args.salida.endswith(".parquet") else "csv")
+    asegurar_esquema(args.db)
+    conn = conectar(args.db)
+    try:
+        desde_id = args.desde_id
+        if args.incremental:
+            desde_id = max(desde_id, leer_marca(conn, args.incremental)[0])
+        r = exportar_ofertas(conn, args.salida, formato, desde_id, args.desde, args.hasta)
+        if args.incremental:
+            guardar_marca(conn, args.incremental, r)
+    finally:
+        conn.close()
+    print(f"{r['filas']:,} ofertas después del id {desde_id} → {args.salida} en {r['segundos']} s"
+          + (f" · marca '{args.incremental}' en id {r['ultimo_id']}" if args.incremental else ""))
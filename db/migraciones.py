@@ -0,0 +1,134 @@
+# db/migraciones.py
+"""
+Migraciones versionadas con PRAGMA user_version. Cada migración corre una sola
+vez por base; arrancar una sesión con el esquema al día cuesta un PRAGMA.
+
+    python -m db.migraciones [--db eon.db]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db.agregados import crear_agregados
+from db.conexion import DB_PATH, conectar
+from db.esquema import COLUMNAS_HEREDADAS, TABLAS, columnas, crear_indices
+
+
+# Tablas de la migración 1, congeladas: las que se agregan a TABLAS después las
+# crea su propia migración (si no, una base nueva nacería con su forma final y
+# un ALTER TABLE posterior fallaría por columna duplicada)
+TABLAS_V1 = ("cotizaciones", "tarifas", "margenes", "margenes_peso", "proveedores_rutas", "ofertas", "usuarios")
+
+
+def _m001_esquema_base(conn: sqlite3.Connection):
+    for tabla in TABLAS_V1:
+        conn.execute(TABLAS[tabla])
+    # Bases creadas por versiones anteriores: agrega solo las columnas que faltan
+    for tabla, defs in COLUMNAS_HEREDADAS.items():
+        existentes = columnas(conn, tabla)
+        for nombre, definicion in defs:
+            if nombre not in existentes:
+                conn.execute(f"ALTER TABLE {tabla} ADD COLUMN {nombre} {definicion}")
+
+
+def _m002_indices_v1(conn: sqlite3.Connection):
+    crear_indices(conn, 1)
+
+
+def _m003_indices_v2(conn: sqlite3.Connection):
+    crear_indices(conn, 2)
+
+
+def _m004_agregados_diarios(conn: sqlite3.Connection):
+    crear_agregados(conn)
+
+
+def _m005_matriz_rutas(conn: sqlite3.Connection):
+    conn.execute(TABLAS["matriz_rutas"])
+    conn.execute(TABLAS["ciudades_cp"])
+    crear_indices(conn, 3)
+
+
+def _m006_correos_salida(conn: sqlite3.Connection):
+    conn.execute(TABLAS["correos_salida"])
+    crear_indices(conn, 4)
+
+
+def _m007_marcas_exportacion(conn: sqlite3.Connection):
+    conn.execute(TABLAS["marcas_exportacion"])
+
+
+# (versión, descripción, función). Solo se agregan al final.
+MIGRACIONES = [
+    (1, "esquema base unificado", _m001_esquema_base),
+    (2, "índices secundarios v1", _m002_indices_v1),
+    (3, "índices secundarios v2", _m003_indices_v2),
+    (4, "rollup diario de cotizaciones", _m004_agregados_diarios),
+    (5, "matriz de rutas precalculada", _m005_matriz_rutas),
+    (6, "bandeja de salida de correos", _m006_correos_salida),
+    (7, "marcas de exportación incremental", _m007_marcas_exportacion),
+]
+VERSION_ACTUAL = MIGRACIONES[-1][0]
+
+
+def version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(conn: sqlite3.Connection) -> list:
+    """Aplica en una transacción las migraciones pendientes; devuelve las aplicadas."""
+    if version(conn) >= VERSION_ACTUAL:
+        return []
+    aplicadas = []
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        # Otra sesión pudo migrar mientras esperábamos el lock
+        actual = version(conn)
+        for numero, descripcion, fn in MIGRACIONES:
+            if numero > actual:
+                fn(conn)
+                aplicadas.append((numero, descripcion))
+        conn.execute(f"PRAGMA user_version = {VERSION_ACTUAL}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return aplicadas
+
+
+_lock = threading.Lock()
+_al_dia: set = set()
+
+
+def asegurar_esquema(db_path: str = DB_PATH):
+    """Llamado al arrancar cada app; después de la primera vez no toca la base."""
+    db_path = os.path.abspath(db_path)
+    if db_path in _al_dia:
+        return
+    with _lock:
+        if db_path in _al_dia:
+            return
+        conn = conectar(db_path)
+        try:
+            migrar(conn)
+        finally:
+            conn.close()
+        _al_dia.add(db_path)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Aplica las migraciones pendientes de eon.db")
+    ap.add_argument("--db", default=DB_PATH)
+    args = ap.parse_args()
+    conn = conectar(args.db)
+    antes = version(conn)
+    for numero, descripcion in migrar(conn):
+        print(f"✅ {numero:03d} {descripcion}")
+    print(f"user_version: {antes} → {version(conn)}")
+    conn.close()
@@ -0,0 +1,145 @@
+# db/planner.py
+"""
+Auditoría de planes de consulta: extrae cada sentencia SQL del portal, de app/
+y de los paquetes compartidos, corre EXPLAIN QUERY PLAN contra la base y marca
+los recorridos completos (SCAN sin índice) sobre tablas grandes.
+
+    python -m db.planner [--db eon.db] [--todas]
+
+Sale con código 1 si encuentra algún SCAN sin índice sobre cotizaciones u ofertas;
+los SCAN que recorren un índice completo (p.ej. ORDER BY fecha sin filtro) se
+reportan como advertencia, igual que las sentencias marcadas con
+/* recorrido completo */ (cargas iniciales que leen toda la tabla a propósito).
+"""
+import argparse
+import ast
+import os
+import re
+import sqlite3
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db.conexion import DB_PATH
+
+CARPETAS = ("eon_ops_portal", "app", "pricing", "db", "carriers", "correo")
+TABLAS_GRANDES = {"cotizaciones", "ofertas"}
+_ES_DML = re.compile(r"\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+RECORRIDO_PERMITIDO = "/* recorrido completo */"
+
+
+def _texto_sql(nodo):
+    """SQL de un literal o f-string; los valores interpolados se vuelven `?`."""
+    if isinstance(nodo, ast.Constant) and isinstance(nodo.value, str):
+        return nodo.value
+    if isinstance(nodo, ast.JoinedStr):
+        partes = []
+        for v in nodo.values:
+            if isinstance(v, ast.Constant):
+                partes.append(str(v.value))
+            else:
+                partes.append("?")
+        return "".join(partes)
+    return None
+
+
+def extraer_sentencias(raiz: str = ROOT_DIR):
+    """[(archivo, línea, sql)] para cada literal que empieza con un verbo DML."""
+    sentencias = []
+    for carpeta in CARPETAS:
+        for dirpath, _, archivos in os.walk(os.path.join(raiz, carpeta)):
+            for nombre in sorted(archivos):
+                ruta = os.path.join(dirpath, nombre)
+                if not nombre.endswith(".py") or ruta == os.path.abspath(__file__):
+                    continue
+                with open(ruta, encoding="utf-8") as f:
+                    arbol = ast.parse(f.read(), filename=ruta)
+                for nodo in ast.walk(arbol):
+                    sql = _texto_sql(nodo)
+                    if sql and _ES_DML.match(sql):
+                        sentencias.append((os.path.relpath(ruta, raiz), nodo.lineno, " ".join(sql.split())))
+    # Las f-strings también aparecen como Constant internos; se queda la primera por línea
+    vistos, unicas = set(), []
+    for s in sentencias:
+        if (s[0], s[1]) not in vistos:
+            vistos.add((s[0], s[1]))
+            unicas.append(s)
+    return sorted(unicas)
+
+
+def plan(conn: sqlite3.Connection, sql: str):
+    # Los parámetros no cambian el plan; se enlazan como NULL
+    n = sql.count("?")
+    return [fila[3] for fila in conn.execute(f"EXPLAIN QUERY PLAN {sql}", (None,) * n).fetchall()]
+
+
+def es_scan(detalle: str):
+    """(tabla, usa_indice) si el paso recorre toda la tabla o un índice completo, si no None."""
+    if not detalle.startswith("SCAN "):
+        return None
+    partes = detalle.split()
+    # SQLite < 3.36 escribe "SCAN TABLE <t>"
+    tabla = partes[2] if partes[1] == "TABLE" and len(partes) > 2 else partes[1]
+    return tabla, "USING" in detalle
+
+
+def auditar(conn: sqlite3.Connection, sentencias):
+    """[(archivo, línea, sql, pasos, scans, error)]; scans = [(tabla, usa_indice)]"""
+    resultados = []
+    for archivo, linea, sql in sentencias:
+        try:
+            pasos = plan(conn, sql)
+            error = None
+        except sqlite3.Error as e:
+            pasos, error = [], str(e)
+        scans = []
+        for paso in pasos:
+            scan = es_scan(paso)
+            if scan:
+                scans.append((_tabla_real(sql, scan[0]), scan[1]))
+        resultados.append((archivo, linea, sql, pasos, scans, error))
+    return resultados
+
+
+def _tabla_real(sql, nombre):
+    # "SCAN c" usa el alias; se resuelve buscando "<tabla> c" en la sentencia
+    palabras = sql.replace(",", " ").split()
+    for i, p in enumerate(palabras[1:], start=1):
+        if p == nombre and palabras[i - 1].lower() not in ("from", "join", "as", "into", "update"):
+            return palabras[i - 1]
+    return nombre
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN sobre todas las consultas de la app")
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--todas", action="store_true", help="muestra también las consultas sin hallazgos")
+    args = ap.parse_args(argv)
+
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    resultados = auditar(conn, extraer_sentencias())
+    conn.close()
+
+    graves = 0
+    for archivo, linea, sql, pasos, scans, error in resultados:
+        permitido = RECORRIDO_PERMITIDO in sql
+        sin_indice = [t for t, con_indice in scans if t in TABLAS_GRANDES and not (con_indice or permitido)]
+        avisos = [t for t, con_indice in scans if t in TABLAS_GRANDES and (con_indice or permitido)]
+        graves += bool(sin_indice)
+        if not (args.todas or sin_indice or avisos or error):
+            continue
+        marca = "❌" if sin_indice else ("⚠️" if avisos or error else "✅")
+        print(f"{marca} {archivo}:{linea}")
+        print(f"   {sql[:160]}{'…' if len(sql) > 160 else ''}")
+        if error:
+            print(f"   error: {error}")
+        for paso in pasos:
+            print(f"   - {paso}")
+    print(f"\n{len(resultados)} consultas auditadas, {graves} con SCAN sin índice sobre {', '.join(sorted(TABLAS_GRANDES))}.")
+    return 1 if graves else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# descargas/servidor.py
+"""
+Descargas grandes (ZIP de PDF, exportaciones de ofertas) servidas desde disco
+por un servidor HTTP propio, en trozos. st.download_button no sirve para esto:
+lee el archivo completo a memoria en cada rerun mientras el botón está visible.
+
+Cada archivo publicado lleva un token aleatorio en la URL y vive mientras la
+sesión que lo generó lo tenga en st.session_state y no pase DESCARGAS_TTL_S;
+después se borra del disco.
+
+Apagado por defecto. El servidor solo habla HTTP plano: con la app en https
+hace falta un proxy inverso (nginx, Caddy) que publique DESCARGAS_HOST:DESCARGAS_PUERTO
+bajo https y DESCARGAS_URL apuntando ahí; sin DESCARGAS_URL, una página https
+no muestra enlace (el navegador bloquearía http://host:puerto).
+
+    DESCARGAS_URL=https://.../d    URL pública del proxy (enciende el servidor en 8502)
+    DESCARGAS_PUERTO=8502          puerto del servidor (0 = sin servidor)
+    DESCARGAS_HOST=127.0.0.1       interfaz; 0.0.0.0 solo para acceso directo sin proxy (http)
+"""
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlparse
+
+import streamlit as st
+
+DESCARGAS_URL = os.getenv("DESCARGAS_URL", "").rstrip("/")
+DESCARGAS_PUERTO = int(os.getenv("DESCARGAS_PUERTO") or (8502 if DESCARGAS_URL else 0))
+DESCARGAS_HOST = os.getenv("DESCARGAS_HOST", "127.0.0.1")
+DESCARGAS_TTL_S = float(os.getenv("DESCARGAS_TTL_S", "3600"))
+DESCARGAS_DIR = os.getenv("DESCARGAS_DIR") or os.path.join(tempfile.gettempdir(), "eon_descargas")
+TROZO = 1024 * 1024
+
+_lock = threading.Lock()
+# Débiles: la única referencia fuerte es la de la sesión; al soltarla se borra el archivo
+_publicadas: "weakref.WeakValueDictionary[str, Descarga]" = weakref.WeakValueDictionary()
+
+
+def _borrar(ruta: str):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+
+
+class Descarga:
+    """Archivo temporal publicado en el servidor de descargas."""
+
+    def __init__(self, prefijo: str, sufijo: str, nombre: str, mime: str, al_completar=None):
+        os.makedirs(DESCARGAS_DIR, exist_ok=True)
+        limpiar_vencidas()
+        fd, self.ruta = tempfile.mkstemp(prefix=prefijo, suffix=sufijo, dir=DESCARGAS_DIR)
+        os.close(fd)
+        self.nombre = nombre
+        self.mime = mime
+        self.al_completar = al_completar      # se llama tras cada descarga completa (sin cancelar)
+        self.token = secrets.token_urlsafe(24)
+        self.creada = time.time()
+        self.completadas = 0
+        self._finalizador = weakref.finalize(self, _borrar, self.ruta)
+        with _lock:
+            _publicadas[self.token] = self
+
+    def vencida(self) -> bool:
+        return time.time() - self.creada > DESCARGAS_TTL_S or not os.path.exists(self.ruta)
+
+    def retirar(self):
+        """Deja de servirla y borra el archivo ya, sin esperar al fin de la sesión."""
+        with _lock:
+            _publicadas.pop(self.token, None)
+        self._finalizador()
+
+    def url(self) -> str | None:
+        """None si la página va por https sin DESCARGAS_URL: no hay enlace que funcione."""
+        base = _base_url()
+        return f"{base}/{self.token}" if base else None
+
+
+def _base_url() -> str | None:
+    if DESCARGAS_URL:
+        return DESCARGAS_URL
+    pagina = urlparse(st.context.url or "")
+    if pagina.scheme == "https":
+        return None
+    return f"http://{pagina.hostname or 'localhost'}:{DESCARGAS_PUERTO}"
+
+
+def limpiar_vencidas():
+    """Retira las descargas vencidas y borra archivos huérfanos de la carpeta (procesos que murieron)."""
+    with _lock:
+        vencidas = [d for d in _publicadas.values() if d.vencida()]
+        vigentes = {d.ruta for d in _publicadas.values()}
+    for d in vencidas:
+        d.retirar()
+    if not os.path.isdir(DESCARGAS_DIR):
+        return
+    limite = time.time() - DESCARGAS_TTL_S
+    with os.scandir(DESCARGAS_DIR) as entradas:
+        for e in entradas:
+            try:
+                if e.path not in vigentes and e.stat().st_mtime < limite:
+                    os.remove(e.path)
+            except FileNotFoundError:
+                pass
+
+
+# -----------------------------
+# Servidor
+# -----------------------------
+class _Manejador(BaseHTTPRequestHandler):
+    def do_GET(self):
+        with _lock:
+            descarga = _publicadas.get(urlparse(self.path).path.strip("/"))
+        if descarga is None or descarga.vencida():
+            self.send_error(404, "Descarga vencida o inexistente")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", descarga.mime)
+        self.send_header("Content-Length", str(os.path.getsize(descarga.ruta)))
+        self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(descarga.nombre)}")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        try:
+            with open(descarga.ruta, "rb") as f:
+                shutil.copyfileobj(f, self.wfile, TROZO)
+        except OSError:
+            return      # el navegador canceló o se cayó la conexión: no cuenta como descargada
+        descarga.completadas += 1
+        if descarga.al_completar:
+            try:
+                descarga.al_completar()
+            except Exception as e:
+                print("❌ Error al cerrar la descarga:", e)
+
+    def log_message(self, *args):
+        pass
+
+
+_servidor: ThreadingHTTPServer | None = None
+
+
+def iniciar_servidor_descargas(puerto: int = DESCARGAS_PUERTO, host: str = DESCARGAS_HOST):
+    """Un servidor de descargas por proceso (DESCARGAS_PUERTO > 0)."""
+    global _servidor
+    if puerto <= 0:
+        return None
+    with _lock:
+        if _servidor is None:
+            try:
+                _servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+            except OSError as e:
+                print("❌ Error al abrir el puerto de descargas:", e)
+                return None
+            _servidor.daemon_threads = True
+            threading.Thread(target=_servidor.serve_forever, name="descargas", daemon=True).start()
+    limpiar_vencidas()
+    return _servidor
+
+
+def servidor_activo() -> bool:
+    return _servidor is not None
@@ -3,13 +3,9 @@
 import os
 import sys
 import uuid
-import sqlite3
-import smtplib
-import requests
 import pandas as pd
 import streamlit as st
-from fpdf import FPDF
-from email.message import EmailMessage
+from dataclasses import asdict
 from datetime import date, datetime, timedelta
 from dotenv import load_dotenv
 
@@ -26,186 +22,65 @@ ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if ROOT_DIR not in sys.path:
     sys.path.append(ROOT_DIR)
 
-from carriers.dhl_client import cotizar_dhl, normalizar_ofertas_dhl  # requiere carriers/dhl_client.py
+from db.conexion import DB_PATH, conectar
+from db import agregados
+from db.migraciones import asegurar_esquema
+from db.consultas import (
+    NO_ASIGNADO, FiltroCotizaciones, pagina_en_sesion, valores_distintos,
+)
+from carriers.base import SolicitudTarifa
+from carriers.cotizador import carriers_configurados, cotizar_todos, oferta_respaldo
+from carriers.cache import CACHE_TARIFAS
+from carriers.detalle import obtener_detalle
+from carriers.dhl_client import estadisticas_auth
+from carriers.resiliencia import estadisticas_protecciones
+from carriers.singleflight import VUELOS_CARRIERS
+from correo.outbox import encolar, estatus_correos, iniciar_enviador
+from metricas.pagina import mostrar_performance
+from metricas.registro import iniciar_servidor, instalar_pandas, medir_pagina
+from pdfs.servicio import SERVICIO_PDF
+from pricing.engine import PrecioNoDisponible, obtener_motor, invalidar_motor
+from pricing.bandas import BandasInvalidas, agregar_banda, leer_bandas
+from pricing.batch import cotizar_lote, guardar_lote
+from pricing.ofertas import generar_ofertas_automaticas
+from pricing.simulador import Propuesta, normalizar_margenes, simular, valores_sin_historial
+from pricing.matriz import celda, iniciar_recalculo_periodico, precio_lista, precios_ruta, registrar_ciudad_cp
 
 # -----------------------------------------
 # DB Helpers: path y asegurado de estructura
 # -----------------------------------------
-DB_PATH = os.path.abspath("eon.db")
-
 def ensure_db_schema():
-    """Crea/ajusta todas las tablas e índices necesarios para la app."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-
-    # Tabla principal de cotizaciones
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS cotizaciones (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cotizacion_id TEXT,
-            cliente TEXT,
-            origen TEXT,
-            destino TEXT,
-            distancia_km REAL,
-            peso_kg REAL,
-            descripcion_paquete TEXT,
-            tipo_unidad TEXT,
-            precio_total REAL,
-            fecha TEXT,
-            estatus_url TEXT,
-            archivo_pdf TEXT,
-            proveedor_asignado TEXT,
-            estatus TEXT DEFAULT 'Pendiente por asignar'
-        )
-    """)
-
-    # Columnas defensivas (por si existía una versión antigua)
-    for col_def in [
-        ("estatus", "TEXT DEFAULT 'Pendiente por asignar'"),
-        ("cotizacion_id", "TEXT"),
-        ("estatus_url", "TEXT"),
-        ("proveedor_asignado", "TEXT"),
-        ("precio_total", "REAL")
-    ]:
-        try:
-            c.execute(f"ALTER TABLE cotizaciones ADD COLUMN {col_def[0]} {col_def[1]}")
-        except sqlite3.OperationalError:
-            pass
-
-    # Tarifas con UNIQUE(origen, destino) para ON CONFLICT
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS tarifas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            origen TEXT,
-            destino TEXT,
-            tarifa_base REAL,
-            UNIQUE(origen, destino)
-        )
-    """)
-
-    # Márgenes con UNIQUE(criterio, valor)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS margenes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            criterio TEXT,   -- 'unidad' / 'peso' / 'general'
-            valor TEXT,
-            margen_porcentaje REAL,
-            UNIQUE(criterio, valor)
-        )
-    """)
-
-    # Márgenes por peso
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS margenes_peso (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            rango_min REAL,
-            rango_max REAL,
-            margen_porcentaje REAL
-        )
-    """)
-
-    # Proveedores por ruta
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS proveedores_rutas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            proveedor TEXT,
-            origen TEXT,
-            destino TEXT,
-            tipo_unidad TEXT,
-            factor_precio REAL
-        )
-    """)
-
-    # Ofertas de proveedores
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS ofertas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_cotizacion INTEGER,
-            proveedor TEXT,
-            precio_ofertado REAL,
-            mensaje TEXT,
-            fecha TEXT
-        )
-    """)
-
-    # Usuarios (para buscar correo al enviar PDF)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT UNIQUE,
-            correo TEXT
-        )
-    """)
-
-    conn.commit()
-    conn.close()
+    """Aplica las migraciones pendientes (db/migraciones.py); con el esquema al día es un solo PRAGMA."""
+    asegurar_esquema(DB_PATH)
 
 ensure_db_schema()
+# Matriz de rutas frecuentes (pricing/matriz.py); un hilo por proceso
+iniciar_recalculo_periodico(DB_PATH)
+# Bandeja de salida de correos (correo/outbox.py); un hilo por proceso
+iniciar_enviador(DB_PATH)
+# Métricas por página (metricas/registro.py); /metrics solo con METRICAS_PUERTO
+instalar_pandas()
+iniciar_servidor()
 
 # ------------------
 # Utilidades de mail
 # ------------------
-def enviar_email(destinatario, asunto, cuerpo, archivo_pdf=None):
-    EMAIL = os.getenv("EMAIL")
-    PASSWORD = os.getenv("PASSWORD")
-
-    if not EMAIL or not PASSWORD:
-        print("⚠️ Falta EMAIL y/o PASSWORD en .env para envío SMTP.")
-        return False
-
-    mensaje = EmailMessage()
-    mensaje['Subject'] = asunto
-    mensaje['From'] = EMAIL
-    mensaje['To'] = destinatario
-    mensaje.set_content(cuerpo)
-
-    if archivo_pdf:
-        with open(archivo_pdf, "rb") as f:
-            mensaje.add_attachment(f.read(), maintype='application', subtype='pdf', filename=os.path.basename(archivo_pdf))
-
+def enviar_email(destinatario, asunto, cuerpo, archivo_pdf=None, id_cotizacion=None, adjunto=None, nombre_adjunto=None):
+    """Encola el correo en correos_salida; el enviador de fondo (correo/outbox.py) lo manda."""
     try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
-            smtp.login(EMAIL, PASSWORD)
-            smtp.send_message(mensaje)
+        encolar(destinatario, asunto, cuerpo, archivo_pdf, id_cotizacion=id_cotizacion, db_path=DB_PATH,
+                adjunto=adjunto, nombre_adjunto=nombre_adjunto)
         return True
     except Exception as e:
-        print(f"Error al enviar correo: {e}")
+        print(f"Error al encolar correo: {e}")
         return False
 
 # -----------------------------
 # Generador de PDF de cotizacion
 # -----------------------------
-def generar_pdf_cotizacion(datos, nombre_archivo):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-
-    pdf.cell(0, 10, "Cotización de Envío - Eon Logistics", ln=True, align="C")
-    pdf.ln(10)
-
-    pdf.cell(0, 10, f"Cliente: {datos['cliente']}", ln=True)
-    if datos.get("proveedor_asignado"):  # pásalo vacío si quieres ocultarlo
-        pdf.cell(0, 10, f"Proveedor Asignado: {datos['proveedor_asignado']}", ln=True)
-
-    pdf.cell(0, 10, f"Origen: {datos['origen']}", ln=True)
-    pdf.cell(0, 10, f"Destino: {datos['destino']}", ln=True)
-    pdf.cell(0, 10, f"Tipo de unidad: {datos['tipo_unidad']}", ln=True)
-    pdf.cell(0, 10, f"Peso: {datos['peso_kg']} kg", ln=True)
-    pdf.multi_cell(0, 10, f"Descripción: {datos['descripcion_paquete']}")
-    pdf.cell(0, 10, f"Precio total: ${datos['precio_total']:,.2f}", ln=True)
-    pdf.cell(0, 10, f"Fecha: {datos['fecha']}", ln=True)
-
-    seguimiento_url = f"https://eonlogisticgroup.com/estatus/{datos['cotizacion_id']}"
-    pdf.ln(10)
-    pdf.set_text_color(0, 0, 255)
-    pdf.cell(0, 10, f"Seguimiento en línea: {seguimiento_url}", ln=True, link=seguimiento_url)
-    pdf.set_text_color(0, 0, 0)
-
-    out_dir = os.path.abspath("../app/cotizaciones_pdf")
-    os.makedirs(out_dir, exist_ok=True)
-    ruta_pdf = os.path.join(out_dir, nombre_archivo)
-    pdf.output(ruta_pdf)
-    return ruta_pdf
+def generar_pdf_cotizacion(datos):
+    # Plantilla "portal" de pdfs/plantillas.py; bytes en memoria, render en el pool y caché por contenido
+    return SERVICIO_PDF.contenido("portal", datos)
 
 # -----------------------------
 # UI: Nueva cotización (Manual)
@@ -220,6 +95,9 @@ def nueva_cotizacion_manual():
     descripcion = st.text_area("Descripción del paquete")
     cliente = st.text_input("Nombre del cliente")
 
+    if origen and destino:
+        mostrar_precios_ruta(origen, destino, tipo_unidad, cliente)
+
     if st.button("💾 Guardar cotización"):
         if not origen or not destino or not cliente or peso <= 0:
             st.warning("Por favor llena todos los campos correctamente.")
@@ -228,39 +106,15 @@ def nueva_cotizacion_manual():
         cotizacion_id = str(uuid.uuid4())[:8]
         estatus_url = f"https://eonlogisticgroup.com/estatus/{cotizacion_id}"
 
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-
-        # 1) Tarifa base por ruta
-        c.execute("SELECT tarifa_base FROM tarifas WHERE origen = ? AND destino = ?", (origen, destino))
-        row_tarifa = c.fetchone()
-        if not row_tarifa:
-            conn.close()
-            st.error("No se encontró una tarifa base para esta ruta. Configúrala en el módulo de Pricing.")
-            return
-        tarifa_base = row_tarifa[0]
-
-        # 2) Margen por unidad
-        c.execute("SELECT margen_porcentaje FROM margenes WHERE criterio = 'unidad' AND valor = ?", (tipo_unidad,))
-        row_margen_uni = c.fetchone()
-        if not row_margen_uni:
-            conn.close()
-            st.error(f"No se encontró un margen de utilidad para la unidad: {tipo_unidad}. Configúralo en el módulo de Pricing.")
-            return
-        margen_unidad = row_margen_uni[0]
-
-        # 3) Margen por peso
-        c.execute("SELECT margen_porcentaje FROM margenes_peso WHERE ? BETWEEN rango_min AND rango_max", (peso,))
-        row_margen_peso = c.fetchone()
-        if not row_margen_peso:
-            conn.close()
-            st.error(f"No se encontró un margen de utilidad para el peso: {peso} kg. Configúralo en el módulo de Pricing.")
+        # 1-4) Precio desde el motor en memoria (tarifa, margen y margen por peso)
+        try:
+            precio_total = obtener_motor(DB_PATH).cotizar(origen, destino, tipo_unidad, peso, cliente=cliente)
+        except PrecioNoDisponible as e:
+            st.error(str(e))
             return
-        margen_peso = row_margen_peso[0]
 
-        # 4) Cálculo del precio
-        precio_sin_margen = tarifa_base * peso
-        precio_total = precio_sin_margen * (1 + margen_unidad / 100) * (1 + margen_peso / 100)
+        conn = conectar()
+        c = conn.cursor()
 
         # 5) Insertar cotización
         c.execute("""
@@ -274,29 +128,72 @@ def nueva_cotizacion_manual():
         ))
         id_cotizacion = c.lastrowid
 
-        # 6) Ofertas automáticas
-        c.execute("""
-            SELECT proveedor, factor_precio FROM proveedores_rutas
-            WHERE origen = ? AND destino = ? AND tipo_unidad = ?
-        """, (origen, destino, tipo_unidad))
-        proveedores = c.fetchall()
-
-        hoy = datetime.now().strftime("%Y-%m-%d")
-        for proveedor, factor in proveedores:
-            precio_ofertado = precio_total * factor
-            msg = f"Oferta automática generada para {proveedor}"
-            c.execute("""
-                INSERT INTO ofertas (id_cotizacion, proveedor, precio_ofertado, mensaje, fecha)
-                VALUES (?, ?, ?, ?, ?)
-            """, (id_cotizacion, proveedor, precio_ofertado, msg, hoy))
+        # 6) Ofertas automáticas (INSERT ... SELECT sobre proveedores_rutas)
+        n_ofertas = generar_ofertas_automaticas(conn, id_cotizacion)
 
         conn.commit()
         conn.close()
 
         st.success(f"Cotización generada automáticamente: ${precio_total:,.2f} MXN")
         st.caption(f"Estatus URL: {estatus_url}")
-        if proveedores:
-            st.info(f"Se generaron {len(proveedores)} ofertas automáticas.")
+        if n_ofertas:
+            st.info(f"Se generaron {n_ofertas} ofertas automáticas.")
+
+def mostrar_precios_ruta(origen, destino, tipo_unidad, cliente):
+    """
+    Precios de la ruta por banda de peso: tarifa manual con la unidad y el cliente
+    del formulario (motor en memoria, el mismo precio que se guarda) y DHL
+    precalculado con su antigüedad.
+    """
+    conn = conectar()
+    filas = precios_ruta(conn, origen, destino)
+    conn.close()
+    if not filas:
+        return
+    motor = obtener_motor(DB_PATH)
+    registros = []
+    for peso, _, _, _, precio_dhl, producto_dhl, dhl_en in filas:
+        try:
+            precio, motivo = motor.cotizar(origen, destino, tipo_unidad, peso, cliente=cliente or None), None
+        except PrecioNoDisponible as e:
+            precio, motivo = None, e.motivo
+        registros.append((peso, precio, motivo, precio_dhl, producto_dhl, dhl_en))
+    df = pd.DataFrame(registros, columns=[
+        "Peso hasta (kg)", f"Tarifa {tipo_unidad} (MXN)", "Sin tarifa por", "DHL (MXN)", "Producto DHL", "DHL al",
+    ])
+    with st.expander("⚡ Precios precalculados de esta ruta", expanded=True):
+        st.dataframe(df.dropna(axis=1, how="all"), use_container_width=True, hide_index=True)
+
+# -----------------------------------------
+# UI: Cotización por lote (CSV)
+# -----------------------------------------
+def cotizacion_por_lote():
+    st.subheader("📚 Cotización por Lote (CSV)")
+    st.caption("Columnas: origen, destino, tipo_unidad, peso_kg y opcionalmente cliente, descripcion_paquete.")
+
+    archivo = st.file_uploader("Archivo CSV de envíos", type=["csv"])
+    if archivo is None:
+        return
+
+    try:
+        resultado = cotizar_lote(archivo, DB_PATH)
+    except ValueError as e:
+        st.error(str(e))
+        return
+
+    fallidas = resultado["motivo"].notna()
+    col1, col2 = st.columns(2)
+    col1.metric("✅ Cotizadas", int((~fallidas).sum()))
+    col2.metric("⚠️ Sin precio", int(fallidas.sum()))
+    st.dataframe(resultado, use_container_width=True)
+
+    if st.button("💾 Guardar cotizaciones y ofertas del lote"):
+        conn = conectar()
+        try:
+            guardadas, n_ofertas = guardar_lote(conn, resultado)
+        finally:
+            conn.close()
+        st.success(f"Se guardaron {len(guardadas)} cotizaciones y {n_ofertas} ofertas automáticas.")
 
 # -----------------------------------------
 # UI: Cotizaciones pendientes por asignar
@@ -304,15 +201,14 @@ def nueva_cotizacion_manual():
 def cotizaciones_pendientes():
     st.subheader("📋 Cotizaciones Pendientes por Asignar")
 
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("""
-        SELECT id, cotizacion_id, cliente, origen, destino, tipo_unidad, descripcion_paquete, precio_total, fecha, proveedor_asignado
-        FROM cotizaciones
-        ORDER BY fecha DESC
-    """, conn)
+    conn = conectar()
+    df_pend = pagina_en_sesion(
+        "pag_pendientes", conn,
+        "id, cotizacion_id, cliente, origen, destino, tipo_unidad, descripcion_paquete, precio_total, fecha, proveedor_asignado",
+        FiltroCotizaciones(sin_proveedor=True),
+    )
     conn.close()
 
-    df_pend = df[df["proveedor_asignado"].isnull() | (df["proveedor_asignado"] == "")]
     if df_pend.empty:
         st.info("No hay cotizaciones pendientes por asignar.")
         return
@@ -343,7 +239,7 @@ def cotizaciones_pendientes():
             st.warning("Debes ingresar el nombre de un proveedor.")
             return
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = conectar()
         c = conn.cursor()
         c.execute("""
             UPDATE cotizaciones
@@ -356,7 +252,7 @@ def cotizaciones_pendientes():
         st.success(f"Proveedor '{proveedor}' asignado correctamente a la cotización ID {cot_id}.")
 
         # Envío de PDF al cliente SIN mostrar proveedor
-        conn = sqlite3.connect(DB_PATH)
+        conn = conectar()
         c = conn.cursor()
         c.execute("SELECT correo FROM usuarios WHERE nombre = ?", (cot['cliente'],))
         row_cli = c.fetchone()
@@ -377,7 +273,7 @@ def cotizaciones_pendientes():
                 "cotizacion_id": cot['cotizacion_id']
             }
             nombre_pdf = f"cotizacion_{cot['cotizacion_id']}.pdf"
-            ruta_pdf = generar_pdf_cotizacion(datos_pdf, nombre_pdf)
+            contenido_pdf = generar_pdf_cotizacion(datos_pdf)
 
             asunto = "📦 Cotización Asignada - Eon Logistics"
             cuerpo = (f"Hola {cot['cliente']},\n\n"
@@ -385,11 +281,12 @@ def cotizaciones_pendientes():
                       "Adjunto encontrarás el PDF con los detalles.\n\n"
                       "Gracias por confiar en Eon Logistics.")
 
-            exito = enviar_email(correo_cliente, asunto, cuerpo, ruta_pdf)
+            exito = enviar_email(correo_cliente, asunto, cuerpo, id_cotizacion=cot_id,
+                                 adjunto=contenido_pdf, nombre_adjunto=nombre_pdf)
             if exito:
-                st.success(f"Correo enviado correctamente a {correo_cliente}.")
+                st.success(f"Correo en cola para {correo_cliente}; se enviará en segundo plano.")
             else:
-                st.error("❌ No se pudo enviar el correo al cliente.")
+                st.error("❌ No se pudo encolar el correo al cliente.")
         else:
             st.warning("⚠️ No se encontró el correo del cliente en 'usuarios'.")
 
@@ -401,13 +298,12 @@ def cotizaciones_pendientes():
 def cotizaciones_asignadas():
     st.subheader("📑 Cotizaciones Asignadas")
 
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("""
-        SELECT id, cotizacion_id, cliente, origen, destino, tipo_unidad, descripcion_paquete, precio_total, fecha, proveedor_asignado
-        FROM cotizaciones
-        WHERE proveedor_asignado IS NOT NULL AND proveedor_asignado != ''
-        ORDER BY fecha DESC
-    """, conn)
+    conn = conectar()
+    df = pagina_en_sesion(
+        "pag_asignadas", conn,
+        "id, cotizacion_id, cliente, origen, destino, tipo_unidad, descripcion_paquete, precio_total, fecha, proveedor_asignado",
+        FiltroCotizaciones(con_proveedor=True),
+    )
     conn.close()
 
     if df.empty:
@@ -448,15 +344,12 @@ def cotizaciones_asignadas():
         }
 
         nombre_pdf = f"cotizacion_{cot['cotizacion_id']}.pdf"
-        ruta_pdf = generar_pdf_cotizacion(datos_pdf, nombre_pdf)
-
-        with open(ruta_pdf, "rb") as f:
-            st.download_button(
-                label="📥 Descargar PDF",
-                data=f,
-                file_name=nombre_pdf,
-                mime="application/pdf"
-            )
+        st.download_button(
+            label="📥 Descargar PDF",
+            data=generar_pdf_cotizacion(datos_pdf),
+            file_name=nombre_pdf,
+            mime="application/pdf"
+        )
 
     st.markdown("---")
     correo_cliente = st.text_input("Correo del cliente")
@@ -478,24 +371,34 @@ def cotizaciones_asignadas():
                 "cotizacion_id": cot['cotizacion_id']
             }
             nombre_pdf = f"cotizacion_{cot['cotizacion_id']}.pdf"
-            ruta_pdf = generar_pdf_cotizacion(datos_pdf, nombre_pdf)
+            contenido_pdf = generar_pdf_cotizacion(datos_pdf)
 
             asunto = "📦 Cotización Asignada - Eon Logistics"
             cuerpo = (f"Hola {cot['cliente']},\n\n"
                       "Adjunto encontrarás la cotización asignada con todos los detalles.\n\n"
                       "Gracias por confiar en Eon Logistics.")
 
-            exito = enviar_email(correo_cliente, asunto, cuerpo, ruta_pdf)
+            exito = enviar_email(correo_cliente, asunto, cuerpo, id_cotizacion=cot_id,
+                                 adjunto=contenido_pdf, nombre_adjunto=nombre_pdf)
             if exito:
-                st.success(f"Correo enviado correctamente a {correo_cliente}.")
-                # opcional: marcar en tránsito tras enviar
-                conn = sqlite3.connect(DB_PATH)
+                st.success(f"Correo en cola para {correo_cliente}; se enviará en segundo plano.")
+                # opcional: marcar en tránsito tras encolar
+                conn = conectar()
                 c = conn.cursor()
                 c.execute("UPDATE cotizaciones SET estatus = 'En tránsito' WHERE id = ?", (cot_id,))
                 conn.commit()
                 conn.close()
             else:
-                st.error("❌ No se pudo enviar el correo. Verifica la configuración.")
+                st.error("❌ No se pudo encolar el correo.")
+
+    conn = conectar()
+    correos = estatus_correos(conn, cot_id)
+    conn.close()
+    if correos:
+        with st.expander(f"📬 Correos de esta cotización ({len(correos)})"):
+            st.dataframe(pd.DataFrame(correos, columns=[
+                "id", "destinatario", "asunto", "estatus", "intentos", "ultimo_error", "creado_en", "enviado_en",
+            ]), use_container_width=True)
 
 # -------------------------------
 # UI: Live tracking (control tower)
@@ -503,33 +406,35 @@ def cotizaciones_asignadas():
 def live_tracking():
     st.subheader("🚦 EON Live Tracking - Control Tower")
 
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("""
-        SELECT id, cotizacion_id, cliente, origen, destino, proveedor_asignado, estatus, fecha
-        FROM cotizaciones
-        ORDER BY fecha DESC
-    """, conn)
-    conn.close()
-
-    if df.empty:
+    conn = conectar()
+    if conn.execute("SELECT 1 FROM cotizaciones LIMIT 1").fetchone() is None:
+        conn.close()
         st.info("No hay movimientos registrados.")
         return
 
     col1, col2, col3 = st.columns(3)
     with col1:
-        filtro_estatus = st.selectbox("Filtrar por Estatus", ["Todos"] + df["estatus"].dropna().unique().tolist())
+        filtro_estatus = st.selectbox("Filtrar por Estatus", ["Todos"] + valores_distintos(conn, "estatus"))
     with col2:
-        filtro_proveedor = st.selectbox("Filtrar por Proveedor", ["Todos"] + df["proveedor_asignado"].fillna("No Asignado").unique().tolist())
+        filtro_proveedor = st.selectbox("Filtrar por Proveedor", ["Todos", NO_ASIGNADO] + valores_distintos(conn, "proveedor_asignado"))
     with col3:
-        filtro_cliente = st.selectbox("Filtrar por Cliente", ["Todos"] + df["cliente"].dropna().unique().tolist())
+        filtro_cliente = st.selectbox("Filtrar por Cliente", ["Todos"] + valores_distintos(conn, "cliente"))
 
-    dfv = df.copy()
-    if filtro_estatus != "Todos":
-        dfv = dfv[dfv["estatus"] == filtro_estatus]
-    if filtro_proveedor != "Todos":
-        dfv = dfv[dfv["proveedor_asignado"].fillna("No Asignado") == filtro_proveedor]
-    if filtro_cliente != "Todos":
-        dfv = dfv[dfv["cliente"] == filtro_cliente]
+    filtro = FiltroCotizaciones(
+        estatus=None if filtro_estatus == "Todos" else filtro_estatus,
+        proveedor=None if filtro_proveedor == "Todos" else filtro_proveedor,
+        cliente=None if filtro_cliente == "Todos" else filtro_cliente,
+    )
+    dfv = pagina_en_sesion(
+        "pag_live_tracking", conn,
+        "id, cotizacion_id, cliente, origen, destino, proveedor_asignado, estatus, fecha",
+        filtro,
+    )
+    conn.close()
+
+    if dfv.empty:
+        st.info("No hay movimientos con los filtros seleccionados.")
+        return
 
     st.dataframe(dfv, use_container_width=True)
 
@@ -541,7 +446,7 @@ def live_tracking():
 
     nuevo_estatus = st.selectbox("Nuevo estatus:", ["Pendiente por asignar", "Asignado", "En tránsito", "Entregado"])
     if st.button("Actualizar Estatus"):
-        conn = sqlite3.connect(DB_PATH)
+        conn = conectar()
         c = conn.cursor()
         c.execute("UPDATE cotizaciones SET estatus = ? WHERE id = ?", (nuevo_estatus, cot_id))
         conn.commit()
@@ -555,57 +460,58 @@ def live_tracking():
 def dashboard_kpi():
     st.subheader("📊 EON Logistics - Dashboard KPI")
 
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("""
-        SELECT id, cliente, proveedor_asignado, estatus, fecha, precio_total
-        FROM cotizaciones
-        ORDER BY fecha DESC
-    """, conn)
-    conn.close()
-
-    if df.empty:
+    conn = conectar()
+    fecha_min, fecha_max = agregados.rango_fechas(conn)
+    if fecha_min is None:
+        conn.close()
         st.info("No hay datos aún.")
         return
 
-    fechas = pd.to_datetime(df["fecha"])
-    fecha_inicio = st.date_input("Desde", fechas.min().date())
-    fecha_fin = st.date_input("Hasta", fechas.max().date())
+    fecha_inicio = st.date_input("Desde", pd.to_datetime(fecha_min).date())
+    fecha_fin = st.date_input("Hasta", pd.to_datetime(fecha_max).date())
 
-    df = df[(fechas >= pd.to_datetime(fecha_inicio)) & (fechas <= pd.to_datetime(fecha_fin))]
+    # Todo sale del rollup diario (db/agregados.py), no de cotizaciones
+    total = agregados.contar(conn, desde=fecha_inicio, hasta=fecha_fin)
+    en_proceso = agregados.contar(conn, estatus=["En tránsito", "Asignado"], desde=fecha_inicio, hasta=fecha_fin)
+    pendientes = agregados.contar(conn, estatus=["Pendiente por asignar"], desde=fecha_inicio, hasta=fecha_fin)
+    por_estatus = agregados.total_por(conn, "estatus", fecha_inicio, fecha_fin)
+    por_cliente = agregados.total_por(conn, "cliente", fecha_inicio, fecha_fin)
+    conn.close()
 
     col1, col2, col3 = st.columns(3)
-    col1.metric("📦 Total Movimientos", len(df))
-    col2.metric("🚚 En Proceso", len(df[df["estatus"].isin(["En tránsito", "Asignado"])]))
-    col3.metric("⏳ Pendientes", len(df[df["estatus"] == "Pendiente por asignar"]))
+    col1.metric("📦 Total Movimientos", total)
+    col2.metric("🚚 En Proceso", en_proceso)
+    col3.metric("⏳ Pendientes", pendientes)
 
     st.markdown("### 📈 Estado de Movimientos")
-    estatus_count = df["estatus"].value_counts().reset_index()
+    estatus_count = por_estatus[por_estatus["estatus"] != ""][["estatus", "movimientos"]]
     estatus_count.columns = ["Estatus", "Cantidad"]
     st.bar_chart(estatus_count.set_index("Estatus"))
 
     st.markdown("### 🧑‍💼 Top Clientes por Movimientos")
-    top_clientes = df["cliente"].value_counts().head(5)
+    top_clientes = por_cliente[por_cliente["cliente"] != ""].head(5).set_index("cliente")["movimientos"]
     st.dataframe(top_clientes)
 
-    st.metric("💰 Ingreso Total (MXN)", f"${(df['precio_total'].fillna(0).sum()):,.2f}")
+    st.metric("💰 Ingreso Total (MXN)", f"${por_estatus['ingreso'].sum():,.2f}")
 
 def visualizaciones_avanzadas():
     st.subheader("📊 Visualizaciones Avanzadas EON Logistics")
 
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("""
-        SELECT id, cliente, proveedor_asignado, estatus, origen, destino, fecha
-        FROM cotizaciones
-    """, conn)
+    conn = conectar()
+    por_proveedor = agregados.total_por(conn, "proveedor")
+    por_ruta = agregados.total_por(conn, "ruta")
+    por_fecha = agregados.total_por(conn, "fecha")
     conn.close()
 
-    if df.empty:
+    if por_proveedor.empty:
         st.info("No hay datos aún.")
         return
 
     # Pie Proveedor
     st.markdown("### 🥧 Distribución de Movimientos por Proveedor")
-    proveedores_count = df["proveedor_asignado"].fillna("No Asignado").value_counts()
+    proveedores_count = por_proveedor.assign(
+        proveedor=por_proveedor["proveedor"].replace("", NO_ASIGNADO)
+    ).groupby("proveedor")["movimientos"].sum().sort_values(ascending=False)
     st.plotly_chart({
         "data": [{
             "labels": proveedores_count.index.tolist(),
@@ -617,59 +523,59 @@ def visualizaciones_avanzadas():
 
     # Heatmap simple de rutas (barra)
     st.markdown("### 🌍 Rutas (Origen → Destino)")
-    df["ruta"] = df["origen"].fillna("") + " → " + df["destino"].fillna("")
-    rutas_count = df["ruta"].value_counts().reset_index()
+    rutas_count = por_ruta[["ruta", "movimientos"]]
     rutas_count.columns = ["Ruta", "Cantidad"]
     st.bar_chart(rutas_count.set_index("Ruta"))
 
     # Tendencia semanal
     st.markdown("### 📆 Movimientos por Semana")
-    df["fecha"] = pd.to_datetime(df["fecha"])
-    df["Semana"] = df["fecha"].dt.to_period('W').astype(str)
-    semana_count = df["Semana"].value_counts().sort_index()
+    por_fecha = por_fecha[por_fecha["fecha"] != ""]
+    por_fecha["Semana"] = pd.to_datetime(por_fecha["fecha"]).dt.to_period('W').astype(str)
+    semana_count = por_fecha.groupby("Semana")["movimientos"].sum().sort_index()
     st.line_chart(semana_count)
 
 def dashboard_alertas():
     st.subheader("🚨 EON Control Tower - Alertas en Tiempo Real")
 
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("""
-        SELECT id, cotizacion_id, cliente, proveedor_asignado, estatus, fecha
-        FROM cotizaciones
-    """, conn)
-    conn.close()
-
-    if df.empty:
+    conn = conectar()
+    if agregados.rango_fechas(conn)[0] is None:
+        conn.close()
         st.info("No hay datos aún.")
         return
 
-    df["fecha"] = pd.to_datetime(df["fecha"])
     hoy = datetime.now().date()
     hace_2_dias = hoy - timedelta(days=2)
 
     col1, col2, col3 = st.columns(3)
-    sin_proveedor = df[df["proveedor_asignado"].isnull() | (df["proveedor_asignado"] == "")]
-    col1.metric("⚠️ Sin Proveedor", len(sin_proveedor))
-
-    en_transito_retrasados = df[(df["estatus"] == "En tránsito") & (df["fecha"].dt.date <= hace_2_dias)]
-    col2.metric("🚚 Posibles Retrasos", len(en_transito_retrasados))
-
-    entregados_hoy = df[(df["estatus"] == "Entregado") & (df["fecha"].dt.date == hoy)]
-    col3.metric("✅ Entregados Hoy", len(entregados_hoy))
+    col1.metric("⚠️ Sin Proveedor", agregados.contar(conn, proveedor=""))
+    col2.metric("🚚 Posibles Retrasos", agregados.contar(conn, estatus=["En tránsito"], hasta=hace_2_dias))
+    col3.metric("✅ Entregados Hoy", agregados.contar(conn, estatus=["Entregado"], desde=hoy, hasta=hoy))
 
     st.markdown("### 📋 Detalle de Alertas Activas")
-    df_alertas = pd.concat([sin_proveedor, en_transito_retrasados])
+    df_alertas = pd.read_sql_query("""
+        SELECT id, cotizacion_id, cliente, proveedor_asignado, estatus, fecha
+        FROM cotizaciones
+        WHERE proveedor_asignado IS NULL OR proveedor_asignado = ''
+           OR (estatus = 'En tránsito' AND fecha <= ?)
+        ORDER BY fecha DESC, id DESC
+        LIMIT 200
+    """, conn, params=(str(hace_2_dias),))
     st.dataframe(df_alertas, use_container_width=True)
+    if len(df_alertas) == 200:
+        st.caption("Mostrando las 200 alertas más recientes.")
 
     st.markdown("### 🔍 Filtros")
-    filtro_estatus = st.selectbox("Estatus", ["Todos"] + df["estatus"].dropna().unique().tolist())
-    filtro_proveedor = st.selectbox("Proveedor", ["Todos"] + df["proveedor_asignado"].fillna("No Asignado").unique().tolist())
-
-    dfv = df.copy()
-    if filtro_estatus != "Todos":
-        dfv = dfv[dfv["estatus"] == filtro_estatus]
-    if filtro_proveedor != "Todos":
-        dfv = dfv[dfv["proveedor_asignado"].fillna("No Asignado") == filtro_proveedor]
+    filtro_estatus = st.selectbox("Estatus", ["Todos"] + valores_distintos(conn, "estatus"))
+    filtro_proveedor = st.selectbox("Proveedor", ["Todos", NO_ASIGNADO] + valores_distintos(conn, "proveedor_asignado"))
+
+    filtro = FiltroCotizaciones(
+        estatus=None if filtro_estatus == "Todos" else filtro_estatus,
+        proveedor=None if filtro_proveedor == "Todos" else filtro_proveedor,
+    )
+    dfv = pagina_en_sesion(
+        "pag_alertas", conn, "id, cotizacion_id, cliente, proveedor_asignado, estatus, fecha", filtro
+    )
+    conn.close()
     st.dataframe(dfv, use_container_width=True)
 
 # ---------------------
@@ -678,7 +584,7 @@ def dashboard_alertas():
 def pricing_module():
     st.subheader("📈 Sistema de Pricing - EON Logistics")
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = conectar()
     c = conn.cursor()
 
     # --- Tarifas Base ---
@@ -698,7 +604,9 @@ def pricing_module():
                 ON CONFLICT(origen, destino) DO UPDATE SET tarifa_base=excluded.tarifa_base
             """, (origen, destino, tarifa_base))
             conn.commit()
+            invalidar_motor(DB_PATH)
             st.success(f"Tarifa {origen} → {destino} guardada.")
+            conn.close()
             st.rerun()
 
     st.dataframe(
@@ -721,7 +629,9 @@ def pricing_module():
                 ON CONFLICT(criterio, valor) DO UPDATE SET margen_porcentaje=excluded.margen_porcentaje
             """, (criterio, valor, margen))
             conn.commit()
+            invalidar_motor(DB_PATH)
             st.success(f"Margen para {criterio}:{valor} guardado.")
+            conn.close()
             st.rerun()
 
     st.dataframe(
@@ -732,26 +642,100 @@ def pricing_module():
 
     # --- Márgenes por Peso ---
     st.markdown("### ⚖️ Márgenes por Peso (rangos)")
+    st.caption("Rangos con extremos inclusivos y sin traslapes, p.ej. 0–10 kg y 10.01–25 kg.")
     with st.form("form_margen_peso"):
         rmin = st.number_input("Rango mínimo (kg)", min_value=0.0, value=0.0)
         rmax = st.number_input("Rango máximo (kg)", min_value=0.0, value=0.0)
         mp = st.number_input("Margen (%)", min_value=0.0, value=0.0)
         sent3 = st.form_submit_button("Agregar rango")
         if sent3:
-            c.execute("""
-                INSERT INTO margenes_peso (rango_min, rango_max, margen_porcentaje)
-                VALUES (?, ?, ?)
-            """, (rmin, rmax, mp))
+            try:
+                agregar_banda(conn, rmin, rmax, mp)
+            except BandasInvalidas as e:
+                for error in e.errores:
+                    st.error(error)
+            else:
+                invalidar_motor(DB_PATH)
+                st.success("Rango de margen por peso agregado.")
+                conn.close()
+                st.rerun()
+
+    df_bandas = leer_bandas(conn)
+    st.dataframe(df_bandas.drop(columns="id"), use_container_width=True, hide_index=True)
+    traslapes = obtener_motor(DB_PATH).bandas.traslapes
+    if traslapes:
+        st.warning(
+            f"Hay {traslapes} rango(s) traslapados de versiones anteriores; en el traslape aplica el rango "
+            "capturado primero. Elimina o corrige los rangos para dejar la tabla sin traslapes."
+        )
+
+    if not df_bandas.empty:
+        col_sel, col_btn = st.columns([3, 1])
+        banda_id = col_sel.selectbox(
+            "Rango a eliminar", df_bandas["id"].tolist(),
+            format_func=lambda i: "{rango_min:g}–{rango_max:g} kg → {margen_porcentaje:g}%".format(
+                **df_bandas.set_index("id").loc[i]),
+        )
+        if col_btn.button("🗑️ Eliminar rango"):
+            c.execute("DELETE FROM margenes_peso WHERE id = ?", (int(banda_id),))
             conn.commit()
-            st.success("Rango de margen por peso agregado.")
+            invalidar_motor(DB_PATH)
+            conn.close()
             st.rerun()
 
-    st.dataframe(
-        pd.read_sql_query("SELECT rango_min, rango_max, margen_porcentaje FROM margenes_peso", conn),
-        use_container_width=True
-    )
+    with st.expander("🔁 Simulador what-if sobre el histórico"):
+        simulador_pricing(conn, df_bandas)
     conn.close()
 
+def _renglones(texto: str, columnas: int) -> list[tuple]:
+    """Renglones "a, b, ..., número" de un text_area; el último valor es numérico."""
+    filas = []
+    for n, linea in enumerate(texto.splitlines(), start=1):
+        if not linea.strip():
+            continue
+        partes = [p.strip() for p in linea.split(",")]
+        if len(partes) != columnas:
+            raise ValueError(f"Renglón {n}: se esperaban {columnas} valores separados por coma")
+        filas.append((*partes[:-1], float(partes[-1])))
+    return filas
+
+def simulador_pricing(conn, df_bandas):
+    st.caption("Cambios propuestos (vacío = sin cambio). Se reprecia todo el histórico y se compara el ingreso.")
+    tarifas_txt = st.text_area("Tarifas: origen, destino, tarifa_base", key="sim_tarifas")
+    margenes_txt = st.text_area("Márgenes: criterio (cliente/unidad/general), valor, margen_%", key="sim_margenes")
+    cambiar_bandas = st.checkbox("Cambiar bandas de peso", key="sim_cambiar_bandas")
+    bandas_txt = st.text_area(
+        "Bandas: rango_min, rango_max, margen_% (tabla completa)",
+        "\n".join(f"{r.rango_min:g}, {r.rango_max:g}, {r.margen_porcentaje:g}" for r in df_bandas.itertuples()),
+        key="sim_bandas", disabled=not cambiar_bandas,
+    )
+    if not st.button("Simular"):
+        return
+    try:
+        propuesta = Propuesta(
+            tarifas={(o, d): t for o, d, t in _renglones(tarifas_txt, 3)},
+            margenes=normalizar_margenes(_renglones(margenes_txt, 3)),
+            bandas=[tuple(float(x) for x in b) for b in _renglones(bandas_txt, 3)] if cambiar_bandas else None,
+        )
+        if propuesta.vacia():
+            st.info("No hay cambios que simular.")
+            return
+        for criterio, valor in valores_sin_historial(conn, propuesta.margenes):
+            st.warning(f"Ningún {criterio} '{valor}' en el histórico: ese margen no cambia nada.")
+        with st.spinner("Repreciando el histórico..."):
+            r = simular(conn, propuesta, actual=obtener_motor(DB_PATH))
+    except ValueError as e:
+        st.error(f"Propuesta inválida: {e}")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Cotizaciones", f"{r['filas']:,}", f"{r['filas'] - r['recalculadas']:,} sin precio", delta_color="off")
+    col2.metric("Ingreso actual", f"${r['ingreso_actual']:,.2f}")
+    col3.metric("Ingreso simulado", f"${r['ingreso_simulado']:,.2f}", f"{r['delta']:+,.2f}")
+    st.caption(f"{r['segundos']} s")
+    for tab, dimension in zip(st.tabs(["Por ruta", "Por unidad", "Por cliente"]), ("ruta", "tipo_unidad", "cliente")):
+        tab.dataframe(r[f"por_{dimension}"].head(50).round(2), use_container_width=True, hide_index=True)
+
 # ---------------------
 # UI: Cotizar vía DHL (con session_state)
 # ---------------------
@@ -777,17 +761,41 @@ def cotizar_dhl_api_ui():
     except Exception:
         pass
 
+    # Precio precalculado de la ruta (sin llamar a DHL)
+    conn = conectar()
+    fila = celda(conn, origen_ciudad, destino_ciudad, peso)
+    conn.close()
+    if fila and fila[3] is not None:
+        st.info(f"⚡ Precalculado DHL hasta {fila[0]:g} kg: ${fila[3]:,.2f} MXN ({fila[4]}) · actualizado {fila[5]}")
+    elif fila and fila[1] is not None:
+        st.info(f"⚡ Tarifa manual de lista hasta {fila[0]:g} kg: ${fila[1]:,.2f} MXN · actualizado {fila[2]}")
+
     # --- Acción: cotizar ---
     if st.button("🔎 Cotizar DHL"):
+        carriers = carriers_configurados()
+        if not carriers:
+            st.error("No hay carriers configurados (falta DHL_API_KEY en .env).")
+            return
+        solicitud = SolicitudTarifa(
+            origen_cp, destino_cp, peso,
+            largo=largo, ancho=ancho, alto=alto,
+            origin_city=origen_ciudad, dest_city=destino_ciudad,
+            is_customs_declarable=False
+        )
+        progreso = st.empty()
+
+        def respaldo(sol, carrier):
+            # Circuito abierto: precio de lista de la ruta con tarifas manuales
+            precio = precio_lista(obtener_motor(DB_PATH), origen_ciudad, destino_ciudad, sol.peso_kg)
+            return [oferta_respaldo(precio, carrier, {"origen": origen_ciudad, "destino": destino_ciudad, "peso_kg": sol.peso_kg})]
+
+        def al_llegar(resultado, ofertas):
+            # Cada carrier se muestra en cuanto responde, sin esperar al más lento
+            progreso.info(f"{resultado.carrier}: {len(resultado.ofertas)} opción(es) en {resultado.latencia_s:.1f} s · {len(ofertas)} en total")
+
         try:
-            res = cotizar_dhl(
-                origen_cp, destino_cp, peso,
-                largo=largo, ancho=ancho, alto=alto,
-                origin_city=origen_ciudad, dest_city=destino_ciudad,
-                is_customs_declarable=False
-            )
-            dhl_json = res["json"]
-            ofertas = normalizar_ofertas_dhl(dhl_json)
+            ofertas, errores = cotizar_todos(solicitud, carriers, al_llegar=al_llegar, respaldo=respaldo)
+            progreso.empty()
 
             # Persistimos en session_state para que no se "pierda" al hacer clics
             st.session_state["dhl_inputs"] = {
@@ -800,59 +808,61 @@ def cotizar_dhl_api_ui():
                 "origen_ciudad": origen_ciudad,
                 "destino_ciudad": destino_ciudad,
             }
-            st.session_state["dhl_raw_json"] = dhl_json
-            st.session_state["dhl_ofertas"] = ofertas or []
+            st.session_state["dhl_ofertas"] = ofertas
 
+            if not errores:
+                # CP por ciudad para que la matriz de rutas pueda cotizar DHL en segundo plano
+                conn = conectar()
+                registrar_ciudad_cp(conn, origen_ciudad, origen_cp)
+                registrar_ciudad_cp(conn, destino_ciudad, destino_cp)
+                conn.commit()
+                conn.close()
+
+            for carrier, error in errores.items():
+                st.error(f"Error al cotizar {carrier}: {error}")
+            if any(of.respaldo for of in ofertas):
+                st.warning("⚠️ Se muestra el precio de tarifas manuales como respaldo; no es una tarifa del carrier.")
             if not ofertas:
-                st.warning("DHL no devolvió precios utilizables para estos parámetros.")
-                with st.expander("Ver respuesta completa (debug)"):
-                    st.code(dhl_json, language="json")
+                st.warning("Los carriers no devolvieron precios utilizables para estos parámetros.")
             else:
                 st.success(f"{len(ofertas)} opción(es) encontradas.")
-        except requests.HTTPError as e:
-            st.error(f"HTTPError DHL: {e}")
-            try:
-                st.code(e.response.text, language="json")
-            except Exception:
-                pass
         except Exception as e:
-            st.error(f"Error al cotizar DHL: {e}")
+            st.error(f"Error al cotizar: {e}")
+
+    with st.expander("Diagnóstico de carriers"):
+        st.json({
+            **estadisticas_auth(),
+            "cache_tarifas": CACHE_TARIFAS.estadisticas(),
+            "single_flight": VUELOS_CARRIERS.estadisticas(),
+            "proteccion": estadisticas_protecciones(),
+        })
 
     # --- Render de resultados si existen en session_state ---
     ofertas = st.session_state.get("dhl_ofertas", [])
     if ofertas:
         # Lista expandible de ofertas
         for of in ofertas:
-            titulo = f"{of['productName']} — {of['totalPrice']} {of['currency']} | Transit days (estimado): {of.get('etd_days', 'N/D')}"
+            titulo = f"{of.carrier} {of.productName} — {of.totalPrice} {of.currency} | Transit days (estimado): {'N/D' if of.etd_days is None else of.etd_days}{' · 💾 caché' if of.cached else ''}"
             with st.expander(titulo, expanded=False):
-                raw = of.get("raw", of)  # si no guardaste raw, muestra dict simple
-                st.json(raw)
+                # El JSON original se pide solo al abrir (no vive en session_state)
+                st.json(obtener_detalle(of.raw_id) or asdict(of))
 
         st.markdown("### Elige oferta para registrar en la BD")
         idx = st.selectbox(
             "Oferta",
             options=list(range(len(ofertas))),
-            format_func=lambda i: f"{ofertas[i]['productName']} - {ofertas[i]['totalPrice']} {ofertas[i]['currency']}"
+            format_func=lambda i: f"{ofertas[i].carrier} {ofertas[i].productName} - {ofertas[i].totalPrice} {ofertas[i].currency}"
         )
 
         if st.button("💾 Registrar oferta DHL"):
             try:
-                conn = sqlite3.connect(DB_PATH)
+                conn = conectar()
                 c = conn.cursor()
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS ofertas (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        id_cotizacion INTEGER,
-                        proveedor TEXT,
-                        precio_ofertado REAL,
-                        mensaje TEXT,
-                        fecha TEXT
-                    )
-                """)
                 df_cots = pd.read_sql_query("""
                     SELECT id, cliente, origen, destino, precio_total, fecha
                     FROM cotizaciones
                     ORDER BY fecha DESC
+                    LIMIT 1
                 """, conn)
 
                 if df_cots.empty:
@@ -861,13 +871,14 @@ def cotizar_dhl_api_ui():
                     # Por ahora: asociar a la más reciente
                     cot_id = int(df_cots.iloc[0]["id"])
                     sel = ofertas[idx]
-                    msg = f"DHL {sel['productName']} • ETA: {sel.get('etd_days', 'N/D')}"
+                    carrier = sel.carrier
+                    msg = f"{carrier} {sel.productName} • ETA: {'N/D' if sel.etd_days is None else sel.etd_days}"
                     c.execute("""
                         INSERT INTO ofertas (id_cotizacion, proveedor, precio_ofertado, mensaje, fecha)
                         VALUES (?, ?, ?, ?, DATE('now'))
-                    """, (cot_id, "DHL", float(sel["totalPrice"]), msg))
+                    """, (cot_id, carrier, float(sel.totalPrice), msg))
                     conn.commit()
-                    st.success(f"Oferta de DHL registrada en la cotización #{cot_id}.")
+                    st.success(f"Oferta de {carrier} registrada en la cotización #{cot_id}.")
             except Exception as ex:
                 st.error(f"No se pudo registrar la oferta: {ex}")
             finally:
@@ -876,6 +887,29 @@ def cotizar_dhl_api_ui():
                 except:
                     pass
 
+# ---------------------
+# UI: Performance (solo administradores)
+# ---------------------
+def performance_admin():
+    # El portal no tiene login propio: pide un usuario con rol admin, el mismo
+    # que abre el panel de administrador en app/
+    if st.session_state.get("rol") != "admin":
+        st.info("🔐 Página solo para administradores.")
+        correo = st.text_input("Correo", key="performance_correo")
+        contraseña = st.text_input("Contraseña", type="password", key="performance_contraseña")
+        if st.button("Ingresar"):
+            conn = conectar()
+            fila = conn.execute(
+                "SELECT correo, rol FROM usuarios WHERE correo = ? AND contraseña = ?", (correo, contraseña)
+            ).fetchone()
+            conn.close()
+            if fila and fila[1] == "admin":
+                st.session_state.usuario, st.session_state.rol = fila
+                st.rerun()
+            st.error("❌ Se requiere un usuario administrador")
+        return
+    mostrar_performance()
+
 # --------------------------------
 # SideBar y enrutamiento de páginas
 # --------------------------------
@@ -885,54 +919,63 @@ menu = st.sidebar.radio(
     [
         "Dashboard", "Cotizaciones", "Pricing", "Proveedores", "Clientes",
         "Seguimiento", "Live Tracking", "Dashboard KPI",
-        "Visualizaciones Avanzadas", "Alertas en Tiempo Real", "Pricing Inteligente"
+        "Visualizaciones Avanzadas", "Alertas en Tiempo Real", "Pricing Inteligente",
+        "Performance"
     ]
 )
 
-if menu == "Dashboard":
-    st.title("📊 Dashboard General")
-    st.write("Resumen de movimientos actuales, programados y entregados recientemente.")
-
-elif menu == "Cotizaciones":
-    st.title("💼 Cotizaciones")
-    opcion = st.selectbox("Selecciona una opción", ["Nueva Cotización (Manual)", "Cotizar vía API (DHL)", "Pendientes por Asignar", "Cotizaciones Asignadas"])
-
-    if opcion == "Nueva Cotización (Manual)":
-        nueva_cotizacion_manual()
-    elif opcion == "Cotizar vía API (DHL)":
-        cotizar_dhl_api_ui()
-    elif opcion == "Pendientes por Asignar":
-        cotizaciones_pendientes()
-    elif opcion == "Cotizaciones Asignadas":
-        cotizaciones_asignadas()
-
-elif menu == "Pricing":
-    st.title("📈 Pricing EON")
-    pricing_module()
-
-elif menu == "Proveedores":
-    st.title("🚛 Gestión de Proveedores")
-    st.write("Alta, baja y ofertas recibidas.")
-
-elif menu == "Clientes":
-    st.title("🧑‍💼 Gestión de Clientes")
-    st.write("Alta de clientes, historial de cotizaciones.")
-
-elif menu == "Seguimiento":
-    st.title("🔎 Seguimiento de Envíos")
-    st.write("Buscar estado de movimientos por Cotización ID.")
-
-elif menu == "Live Tracking":
-    live_tracking()
-
-elif menu == "Dashboard KPI":
-    dashboard_kpi()
-
-elif menu == "Visualizaciones Avanzadas":
-    visualizaciones_avanzadas()
-
-elif menu == "Alertas en Tiempo Real":
-    dashboard_alertas()
-
-elif menu == "Pricing Inteligente":
-    pricing_module()
\ No newline at end of file
+with medir_pagina("portal", menu) as medicion:
+    if menu == "Dashboard":
+        st.title("📊 Dashboard General")
+        st.write("Resumen de movimientos actuales, programados y entregados recientemente.")
+
+    elif menu == "Cotizaciones":
+        st.title("💼 Cotizaciones")
+        opcion = st.selectbox("Selecciona una opción", ["Nueva Cotización (Manual)", "Cotización por Lote (CSV)", "Cotizar vía API (DHL)", "Pendientes por Asignar", "Cotizaciones Asignadas"])
+        medicion.pagina = f"{menu} / {opcion}"
+
+        if opcion == "Nueva Cotización (Manual)":
+            nueva_cotizacion_manual()
+        elif opcion == "Cotización por Lote (CSV)":
+            cotizacion_por_lote()
+        elif opcion == "Cotizar vía API (DHL)":
+            cotizar_dhl_api_ui()
+        elif opcion == "Pendientes por Asignar":
+            cotizaciones_pendientes()
+        elif opcion == "Cotizaciones Asignadas":
+            cotizaciones_asignadas()
+
+    elif menu == "Pricing":
+        st.title("📈 Pricing EON")
+        pricing_module()
+
+    elif menu == "Proveedores":
+        st.title("🚛 Gestión de Proveedores")
+        st.write("Alta, baja y ofertas recibidas.")
+
+    elif menu == "Clientes":
+        st.title("🧑‍💼 Gestión de Clientes")
+        st.write("Alta de clientes, historial de cotizaciones.")
+
+    elif menu == "Seguimiento":
+        st.title("🔎 Seguimiento de Envíos")
+        st.write("Buscar estado de movimientos por Cotización ID.")
+
+    elif menu == "Live Tracking":
+        live_tracking()
+
+    elif menu == "Dashboard KPI":
+        dashboard_kpi()
+
+    elif menu == "Visualizaciones Avanzadas":
+        visualizaciones_avanzadas()
+
+    elif menu == "Alertas en Tiempo Real":
+        dashboard_alertas()
+
+    elif menu == "Pricing Inteligente":
+        pricing_module()
+
+    elif menu == "Performance":
+        st.title("⏱️ Performance")
+        performance_admin()
@@ -0,0 +1,47 @@
+# metricas/pagina.py
+import json
+
+import pandas as pd
+import streamlit as st
+
+from metricas.registro import METRICAS_PUERTO, REGISTRO
+
+
+def mostrar_performance():
+    """Página "Performance": ejecuciones recientes por página, histogramas y exportación."""
+    st.subheader("⏱️ Performance")
+    st.caption(f"Métricas de este proceso desde que arrancó · últimas {REGISTRO.recientes.maxlen} ejecuciones de página"
+               + (f" · Prometheus en :{METRICAS_PUERTO}/metrics" if METRICAS_PUERTO else ""))
+
+    recientes = pd.DataFrame([m.a_dict() for m in list(REGISTRO.recientes)])
+    if recientes.empty:
+        st.info("Aún no hay ejecuciones medidas.")
+    else:
+        por_pagina = recientes.groupby(["app", "pagina"]).agg(
+            ejecuciones=("segundos", "size"),
+            p50_s=("segundos", "median"),
+            p95_s=("segundos", lambda s: s.quantile(0.95)),
+            sql_consultas=("sql_n", "mean"),
+            sql_s=("sql_s", "mean"),
+            dataframe_kb=("df_bytes", lambda s: s.mean() / 1024),
+            pdf_s=("pdf_s", "mean"),
+            correo_s=("correo_s", "mean"),
+        ).sort_values("p95_s", ascending=False)
+        st.markdown("**Por página** (promedios por ejecución)")
+        st.dataframe(por_pagina.round(4), use_container_width=True)
+
+        with st.expander("Ejecuciones recientes"):
+            st.dataframe(recientes.iloc[::-1].round(4), use_container_width=True, hide_index=True)
+
+    resumen = pd.DataFrame(REGISTRO.resumen())
+    if not resumen.empty:
+        st.markdown("**Histogramas** (p50/p95 aproximados al límite del bucket)")
+        st.dataframe(resumen.round(4), use_container_width=True, hide_index=True)
+
+    col_prom, col_json, col_reiniciar = st.columns(3)
+    col_prom.download_button("⬇️ Prometheus", REGISTRO.a_prometheus(), file_name="metricas.prom", mime="text/plain")
+    col_json.download_button("⬇️ JSON", json.dumps(REGISTRO.a_json(), default=str, indent=2),
+                             file_name="metricas.json", mime="application/json")
+    if col_reiniciar.button("🔄 Reiniciar métricas"):
+        REGISTRO.reiniciar()
+        st.rerun()
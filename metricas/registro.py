@@ -0,0 +1,308 @@
+# metricas/registro.py
+"""
+Instrumentación en proceso del portal y de la app: histogramas de duración
+(páginas, SQL, intentos a DHL, PDF, correo) y contadores, sin dependencias.
+Lo que ocurre dentro de `medir_pagina` se acumula además en esa ejecución de la
+página (consultas SQL, bytes cargados en DataFrames, PDF, correo), así se ve en
+qué se fue el tiempo de un rerun lento.
+
+Se exporta en texto de Prometheus o JSON (página "Performance") y, con
+METRICAS_PUERTO, en http://<host>:<puerto>/metrics para que Prometheus la lea.
+El endpoint no tiene autenticación: escucha en METRICAS_HOST (127.0.0.1 por
+defecto); 0.0.0.0 solo si la red ya restringe quién llega a ese puerto.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICAS_RECIENTES = int(os.getenv("METRICAS_RECIENTES", "200"))
+METRICAS_PUERTO = int(os.getenv("METRICAS_PUERTO", "0"))     # 0 = sin endpoint /metrics
+METRICAS_HOST = os.getenv("METRICAS_HOST", "127.0.0.1")     # interfaz del endpoint (sin autenticación)
+
+BUCKETS_S = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BUCKETS_BYTES = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histograma:
+    __slots__ = ("buckets", "conteos", "suma", "n", "maximo")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.conteos = [0] * len(buckets)
+        self.suma = 0.0
+        self.n = 0
+        self.maximo = 0.0
+
+    def observar(self, valor: float):
+        self.suma += valor
+        self.n += 1
+        self.maximo = max(self.maximo, valor)
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.conteos[i] += 1
+                break
+
+    def percentil(self, p: float) -> float | None:
+        """Límite del bucket que contiene el percentil p (0-1); el máximo si cae fuera."""
+        if not self.n:
+            return None
+        objetivo, acumulado = p * self.n, 0
+        for limite, conteo in zip(self.buckets, self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+
+class Medicion:
+    """Lo acumulado durante una ejecución de página."""
+    __slots__ = ("app", "pagina", "inicio", "segundos", "sql_n", "sql_s", "df_n", "df_bytes", "pdf_s", "correo_s")
+
+    def __init__(self, app: str, pagina: str):
+        self.app, self.pagina = app, pagina
+        self.inicio = datetime.now().isoformat(timespec="seconds")
+        self.segundos = self.sql_s = self.pdf_s = self.correo_s = 0.0
+        self.sql_n = self.df_n = self.df_bytes = 0
+
+    def a_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class Registro:
+    def __init__(self, recientes: int = METRICAS_RECIENTES):
+        self._lock = threading.Lock()
+        self._histogramas: dict[tuple, Histograma] = {}
+        self._contadores: dict[tuple, float] = {}
+        self._ayuda: dict[str, str] = {}
+        self.recientes: deque[Medicion] = deque(maxlen=recientes)
+
+    def observar(self, nombre: str, valor: float, buckets=BUCKETS_S, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            h = self._histogramas.get(clave)
+            if h is None:
+                h = self._histogramas[clave] = Histograma(buckets)
+            h.observar(valor)
+
+    def sumar(self, nombre: str, valor: float = 1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    def describir(self, nombre: str, ayuda: str):
+        self._ayuda[nombre] = ayuda
+
+    def reiniciar(self):
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+            self.recientes.clear()
+
+    # --- exportación ---
+    def resumen(self) -> list[dict]:
+        """Una fila por histograma y etiquetas: n, promedio, p50, p95, máximo."""
+        with self._lock:
+            filas = []
+            for (nombre, etiquetas), h in sorted(self._histogramas.items()):
+                filas.append({
+                    "metrica": nombre, **dict(etiquetas),
+                    "n": h.n, "total": h.suma, "promedio": h.suma / h.n if h.n else None,
+                    "p50": h.percentil(0.5), "p95": h.percentil(0.95), "max": h.maximo,
+                })
+            return filas
+
+    def a_json(self) -> dict:
+        with self._lock:
+            contadores = [
+                {"metrica": nombre, **dict(etiquetas), "valor": valor}
+                for (nombre, etiquetas), valor in sorted(self._contadores.items())
+            ]
+            recientes = [m.a_dict() for m in self.recientes]
+        return {
+            "generado_en": datetime.now().isoformat(timespec="seconds"),
+            "histogramas": self.resumen(),
+            "contadores": contadores,
+            "paginas_recientes": recientes,
+        }
+
+    def a_prometheus(self) -> str:
+        def etiquetas_txt(etiquetas, extra=()):
+            pares = [*etiquetas, *extra]
+            if not pares:
+                return ""
+            return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+        lineas, vistos = [], set()
+        with self._lock:
+            for (nombre, etiquetas), h in sorted(self._histogramas.items()):
+                if nombre not in vistos:
+                    vistos.add(nombre)
+                    if nombre in self._ayuda:
+                        lineas.append(f"# HELP {nombre} {self._ayuda[nombre]}")
+                    lineas.append(f"# TYPE {nombre} histogram")
+                acumulado = 0
+                for limite, conteo in zip(h.buckets, h.conteos):
+                    acumulado += conteo
+                    lineas.append(f"{nombre}_bucket{etiquetas_txt(etiquetas, [('le', f'{limite:g}')])} {acumulado}")
+                lineas.append(f"{nombre}_bucket{etiquetas_txt(etiquetas, [('le', '+Inf')])} {h.n}")
+                lineas.append(f"{nombre}_sum{etiquetas_txt(etiquetas)} {h.suma:.6f}")
+                lineas.append(f"{nombre}_count{etiquetas_txt(etiquetas)} {h.n}")
+            for (nombre, etiquetas), valor in sorted(self._contadores.items()):
+                if nombre not in vistos:
+                    vistos.add(nombre)
+                    if nombre in self._ayuda:
+                        lineas.append(f"# HELP {nombre} {self._ayuda[nombre]}")
+                    lineas.append(f"# TYPE {nombre} counter")
+                lineas.append(f"{nombre}{etiquetas_txt(etiquetas)} {valor:g}")
+        return "\n".join(lineas) + "\n"
+
+
+REGISTRO = Registro()
+REGISTRO.describir("eon_pagina_segundos", "Tiempo de pared de una ejecución de página")
+REGISTRO.describir("eon_pagina_sql_consultas", "Sentencias SQL por ejecución de página")
+REGISTRO.describir("eon_pagina_dataframe_bytes", "Bytes cargados en DataFrames por ejecución de página")
+REGISTRO.describir("eon_sql_segundos", "Duración del execute de cada sentencia SQL (los fetch cuentan solo en la página)")
+REGISTRO.describir("eon_dhl_intento_segundos", "Latencia de cada petición HTTP a DHL /rates")
+REGISTRO.describir("eon_pdf_segundos", "Duración de obtener un PDF (render o caché)")
+REGISTRO.describir("eon_correo_segundos", "Duración de enviar un correo por SMTP")
+
+_actual: contextvars.ContextVar[Medicion | None] = contextvars.ContextVar("medicion_pagina", default=None)
+
+
+def medicion_actual() -> Medicion | None:
+    return _actual.get()
+
+
+@contextmanager
+def medir_pagina(app: str, pagina: str):
+    """Mide una ejecución de página; la Medicion se puede renombrar (p.ej. con la subopción elegida)."""
+    medicion = Medicion(app, pagina)
+    token = _actual.set(medicion)
+    t0 = time.perf_counter()
+    try:
+        yield medicion
+    finally:
+        # También con st.rerun()/st.stop(), que salen por excepción
+        medicion.segundos = time.perf_counter() - t0
+        _actual.reset(token)
+        etiquetas = {"app": medicion.app, "pagina": medicion.pagina}
+        REGISTRO.observar("eon_pagina_segundos", medicion.segundos, **etiquetas)
+        REGISTRO.observar("eon_pagina_sql_consultas", medicion.sql_n, buckets=(1, 5, 10, 25, 50, 100, 250, 1000), **etiquetas)
+        REGISTRO.observar("eon_pagina_dataframe_bytes", medicion.df_bytes, buckets=BUCKETS_BYTES, **etiquetas)
+        REGISTRO.recientes.append(medicion)
+
+
+def registrar_sql(segundos: float, consultas: int = 0):
+    """`consultas` cuenta sentencias nuevas; los fetch solo suman tiempo."""
+    if consultas:
+        REGISTRO.observar("eon_sql_segundos", segundos)
+    medicion = _actual.get()
+    if medicion is not None:
+        medicion.sql_n += consultas
+        medicion.sql_s += segundos
+
+
+def registrar_dataframe(df):
+    bytes_df = int(df.memory_usage(deep=True).sum())
+    REGISTRO.sumar("eon_dataframe_bytes_total", bytes_df)
+    medicion = _actual.get()
+    if medicion is not None:
+        medicion.df_n += 1
+        medicion.df_bytes += bytes_df
+    return df
+
+
+def registrar_duracion(metrica: str, segundos: float, campo: str | None = None, **etiquetas):
+    """Observa `segundos` en `metrica`; con `campo` (pdf_s, correo_s) los suma a la página actual."""
+    REGISTRO.observar(metrica, segundos, **etiquetas)
+    medicion = _actual.get()
+    if campo and medicion is not None:
+        setattr(medicion, campo, getattr(medicion, campo) + segundos)
+
+
+@contextmanager
+def cronometro(metrica: str, campo: str | None = None, **etiquetas):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_duracion(metrica, time.perf_counter() - t0, campo, **etiquetas)
+
+
+# -----------------------------
+# DataFrames: pandas.read_sql_query
+# -----------------------------
+_instalado = False
+
+
+def instalar_pandas():
+    """Envuelve pd.read_sql_query / pd.read_sql para contar los bytes de cada DataFrame (una vez por proceso)."""
+    global _instalado
+    if _instalado:
+        return
+    import pandas as pd
+
+    def envolver(original):
+        def lectura(*args, **kwargs):
+            resultado = original(*args, **kwargs)
+            if isinstance(resultado, pd.DataFrame):
+                registrar_dataframe(resultado)
+            return resultado
+        lectura.__wrapped__ = original
+        return lectura
+
+    pd.read_sql_query = envolver(pd.read_sql_query)
+    pd.read_sql = envolver(pd.read_sql)
+    _instalado = True
+
+
+# -----------------------------
+# Endpoint /metrics
+# -----------------------------
+class _Manejador(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            cuerpo, tipo = json.dumps(REGISTRO.a_json(), default=str).encode(), "application/json"
+        elif self.path.startswith("/metrics"):
+            cuerpo, tipo = REGISTRO.a_prometheus().encode(), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+_servidor_lock = threading.Lock()
+_servidor: ThreadingHTTPServer | None = None
+
+
+def iniciar_servidor(puerto: int = METRICAS_PUERTO, host: str = METRICAS_HOST):
+    """Un servidor /metrics por proceso si METRICAS_PUERTO está definido."""
+    global _servidor
+    if puerto <= 0:
+        return None
+    with _servidor_lock:
+        if _servidor is None:
+            try:
+                _servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+            except OSError as e:
+                print("❌ Error al abrir el puerto de métricas:", e)
+                return None
+            threading.Thread(target=_servidor.serve_forever, name="metricas", daemon=True).start()
+    return _servidor
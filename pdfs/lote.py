@@ -0,0 +1,160 @@
+# pdfs/lote.py
+"""
+Exportación masiva de PDF de cotizaciones a un ZIP (auditorías de fin de mes).
+Lee las cotizaciones por páginas con los filtros de "Ver cotizaciones", renderiza
+la plantilla "app" en un pool de procesos por lotes y escribe cada PDF al ZIP en
+cuanto llega: en memoria solo quedan los lotes en vuelo, no el ZIP completo.
+
+    python -m pdfs.lote --desde 2024-01-01 --hasta 2024-01-31 --salida auditoria.zip [--db eon.db]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db.conexion import DB_PATH, conectar
+from db.consultas import FiltroCotizaciones, pagina_cotizaciones, where_cotizaciones
+from pdfs.plantillas import PLANTILLAS
+from pdfs.servicio import PDF_WORKERS
+
+PDF_LOTE = int(os.getenv("PDF_LOTE", "50"))     # cotizaciones por tarea del pool
+
+COLUMNAS = (
+    "id, cotizacion_id, cliente, origen, destino, distancia_km, peso_kg, tipo_unidad, "
+    "descripcion_paquete, precio_total, fecha, estatus_url"
+)
+
+
+def datos_pdf(fila: dict) -> dict:
+    """Fila de cotizaciones -> datos de la plantilla "app" (los mismos que arma cotizar_envio)."""
+    cotizacion_id = fila.get("cotizacion_id") or str(fila["id"])
+    return {
+        "cotizacion_id": cotizacion_id,
+        "fecha": fila.get("fecha") or "",
+        "origen": fila.get("origen") or "",
+        "destino": fila.get("destino") or "",
+        "distancia": fila.get("distancia_km") or 0,
+        "peso": fila.get("peso_kg") or 0,
+        "descripcion_paquete": fila.get("descripcion_paquete") or "",
+        "tipo_unidad": fila.get("tipo_unidad") or "",
+        "precio_total": fila.get("precio_total") or 0,
+        "cliente": fila.get("cliente") or "",
+        "estatus_url": fila.get("estatus_url") or f"https://eonlogisticgroup.com/estatus/{cotizacion_id}",
+    }
+
+
+def nombre_pdf(fila: dict) -> str:
+    return f"{str(fila.get('fecha') or 'sin_fecha')[:7]}/cotizacion_{fila['id']}.pdf"
+
+
+def _renderizar_lote(filas: list[dict]) -> list[tuple]:
+    # Corre en el pool: [(nombre, bytes | None, error | None)]
+    fn, _ = PLANTILLAS["app"]
+    salida = []
+    for fila in filas:
+        try:
+            salida.append((nombre_pdf(fila), fn(datos_pdf(fila)), None))
+        except Exception as e:
+            salida.append((nombre_pdf(fila), None, f"{type(e).__name__}: {e}"))
+    return salida
+
+
+def contar_cotizaciones(conn, filtro: FiltroCotizaciones) -> int:
+    where, params = where_cotizaciones(filtro)
+    return conn.execute(f"SELECT COUNT(*) FROM cotizaciones WHERE {where}", params).fetchone()[0]
+
+
+def lotes_cotizaciones(conn, filtro: FiltroCotizaciones, tamano: int = PDF_LOTE):
+    """Lotes de filas (dicts con tipos de Python) en el orden del listado, por paginación por llave."""
+    cursor = None
+    while True:
+        df, cursor = pagina_cotizaciones(conn, COLUMNAS, filtro, cursor, tamano)
+        if not df.empty:
+            yield df.astype(object).where(df.notna(), None).to_dict("records")
+        if cursor is None:
+            break
+
+
+def exportar_zip(conn, filtro: FiltroCotizaciones, destino, workers: int = PDF_WORKERS,
+                 tamano_lote: int = PDF_LOTE, compresion: int = zipfile.ZIP_DEFLATED, al_avanzar=None) -> dict:
+    """
+    Escribe en `destino` (ruta o archivo binario) un ZIP con un PDF por cotización
+    del filtro. al_avanzar(hechos) se llama tras cada lote. Los PDF que fallan van
+    listados en errores.txt dentro del mismo ZIP.
+    """
+    inicio = time.perf_counter()
+    hechos, errores = 0, []
+    pool = None
+    if workers > 0:
+        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        with zipfile.ZipFile(destino, "w", compression=compresion) as zf:
+            def escribir(resultado):
+                nonlocal hechos
+                for nombre, contenido, error in resultado:
+                    if error:
+                        errores.append(f"{nombre}: {error}")
+                    else:
+                        zf.writestr(nombre, contenido)
+                hechos += len(resultado)
+                if al_avanzar:
+                    al_avanzar(hechos)
+
+            # Ventana acotada de lotes en vuelo: el ZIP se escribe en orden y la
+            # memoria no crece con el número de cotizaciones
+            en_vuelo = deque()
+            for filas in lotes_cotizaciones(conn, filtro, tamano_lote):
+                if pool is None:
+                    escribir(_renderizar_lote(filas))
+                    continue
+                en_vuelo.append(pool.submit(_renderizar_lote, filas))
+                if len(en_vuelo) >= 2 * workers:
+                    escribir(en_vuelo.popleft().result())
+            while en_vuelo:
+                escribir(en_vuelo.popleft().result())
+
+            if errores:
+                zf.writestr("errores.txt", "\n".join(errores))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    return {
+        "pdfs": hechos - len(errores),
+        "errores": len(errores),
+        "segundos": round(time.perf_counter() - inicio, 2),
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Exporta a un ZIP los PDF de las cotizaciones de un rango")
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--salida", required=True)
+    ap.add_argument("--desde", type=date.fromisoformat)
+    ap.add_argument("--hasta", type=date.fromisoformat)
+    ap.add_argument("--cliente", help="parte del nombre del cliente")
+    ap.add_argument("--unidad", action="append", default=[], help="tipo de unidad (repetible)")
+    ap.add_argument("--workers", type=int, default=PDF_WORKERS)
+    args = ap.parse_args()
+
+    filtro = FiltroCotizaciones(cliente_contiene=args.cliente, tipos_unidad=args.unidad,
+                                desde=args.desde, hasta=args.hasta)
+    conn = conectar(args.db)
+    try:
+        total = contar_cotizaciones(conn, filtro)
+        print(f"{total} cotizaciones")
+        resultado = exportar_zip(conn, filtro, args.salida, args.workers,
+                                 al_avanzar=lambda n: print(f"\r{n}/{total}", end="", flush=True))
+        print()
+        print(resultado)
+    finally:
+        conn.close()
@@ -0,0 +1,105 @@
+# pdfs/plantillas.py
+"""
+Plantillas de PDF de cotización. Cada una recibe el dict de datos y devuelve los
+bytes del PDF; corren en los procesos de pdfs/servicio.py. Cualquier cambio al
+diseño debe subir su versión en PLANTILLAS: la versión forma parte de la llave
+de la caché, así los PDF viejos no se vuelven a servir.
+"""
+import zlib
+
+import qrcode
+from fpdf import FPDF
+
+
+class PDFMemoria(FPDF):
+    """FPDF 1.7 solo lee imágenes de archivo; imagen_memoria registra una imagen PIL sin tocar disco."""
+
+    def imagen_memoria(self, nombre: str, imagen, x=None, y=None, w=0, h=0):
+        if nombre not in self.images:
+            # Escala de grises de 1 bit: mismo empaquetado de filas en PIL ("1") y en PDF
+            imagen = imagen.convert("1")
+            self.images[nombre] = {
+                "i": len(self.images) + 1,
+                "w": imagen.width, "h": imagen.height,
+                "cs": "DeviceGray", "bpc": 1, "f": "FlateDecode",
+                "data": zlib.compress(imagen.tobytes()),
+                "pal": "", "trns": "",
+            }
+        self.image(nombre, x=x, y=y, w=w, h=h, type="png")
+
+
+def cotizacion_portal(datos: dict) -> bytes:
+    """PDF del portal de operaciones (proveedor opcional, sin QR)."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+
+    pdf.cell(0, 10, "Cotización de Envío - Eon Logistics", ln=True, align="C")
+    pdf.ln(10)
+
+    pdf.cell(0, 10, f"Cliente: {datos['cliente']}", ln=True)
+    if datos.get("proveedor_asignado"):  # pásalo vacío si quieres ocultarlo
+        pdf.cell(0, 10, f"Proveedor Asignado: {datos['proveedor_asignado']}", ln=True)
+
+    pdf.cell(0, 10, f"Origen: {datos['origen']}", ln=True)
+    pdf.cell(0, 10, f"Destino: {datos['destino']}", ln=True)
+    pdf.cell(0, 10, f"Tipo de unidad: {datos['tipo_unidad']}", ln=True)
+    pdf.cell(0, 10, f"Peso: {datos['peso_kg']} kg", ln=True)
+    pdf.multi_cell(0, 10, f"Descripción: {datos['descripcion_paquete']}")
+    pdf.cell(0, 10, f"Precio total: ${datos['precio_total']:,.2f}", ln=True)
+    pdf.cell(0, 10, f"Fecha: {datos['fecha']}", ln=True)
+
+    seguimiento_url = f"https://eonlogisticgroup.com/estatus/{datos['cotizacion_id']}"
+    pdf.ln(10)
+    pdf.set_text_color(0, 0, 255)
+    pdf.cell(0, 10, f"Seguimiento en línea: {seguimiento_url}", ln=True, link=seguimiento_url)
+    pdf.set_text_color(0, 0, 0)
+
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def cotizacion_app(datos: dict) -> bytes:
+    """PDF de la app de clientes (distancia y QR de seguimiento si hay estatus_url)."""
+    pdf = PDFMemoria()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+
+    # Encabezado
+    pdf.set_font("Arial", style="B", size=14)
+    pdf.cell(0, 10, "Cotización de Envío - Eon Logistics", ln=True, align="C")
+    pdf.set_font("Arial", size=12)
+    pdf.ln(5)
+
+    # Datos del cliente
+    pdf.cell(0, 10, f"Cliente: {datos['cliente']}", ln=True)
+    pdf.cell(0, 10, f"Fecha: {datos['fecha']}", ln=True)
+    pdf.cell(0, 10, f"Origen: {datos['origen']}", ln=True)
+    pdf.cell(0, 10, f"Destino: {datos['destino']}", ln=True)
+    pdf.cell(0, 10, f"Distancia: {datos['distancia']} km", ln=True)
+    pdf.cell(0, 10, f"Peso: {datos['peso']} kg", ln=True)
+    pdf.cell(0, 10, f"Tipo de unidad: {datos['tipo_unidad']}", ln=True)
+    pdf.multi_cell(0, 10, f"Descripción: {datos['descripcion_paquete']}")
+    pdf.cell(0, 10, f"Precio total: ${datos['precio_total']:,.2f}", ln=True)
+    pdf.ln(10)
+
+    # URL de seguimiento
+    if "estatus_url" in datos:
+        pdf.set_text_color(0, 0, 255)
+        pdf.cell(0, 10, "Seguimiento en línea:", ln=True)
+        pdf.cell(0, 10, datos["estatus_url"], ln=True, link=datos["estatus_url"])
+        pdf.set_text_color(0, 0, 0)
+        pdf.ln(5)
+
+        # QR en memoria, directo al PDF
+        qr = qrcode.make(datos["estatus_url"]).get_image()
+        pdf.imagen_memoria(f"qr_{datos['cotizacion_id']}", qr, x=80, y=pdf.get_y(), w=50)
+        pdf.ln(60)
+
+    return pdf.output(dest="S").encode("latin-1")
+
+
+# nombre -> (función, versión)
+PLANTILLAS = {
+    "portal": (cotizacion_portal, 1),
+    "app": (cotizacion_app, 2),
+}
@@ -0,0 +1,250 @@
+# pdfs/servicio.py
+"""
+Generación de PDF fuera del hilo de Streamlit: un pool de procesos renderiza las
+plantillas de pdfs/plantillas.py y guarda cada resultado en una caché direccionada
+por contenido (hash de plantilla + versión + datos). Una cotización sin cambios
+nunca se vuelve a renderizar; peticiones iguales simultáneas esperan el mismo render.
+`contenido` devuelve los bytes (descargas y adjuntos de correo no tocan disco);
+`ruta` es para quien necesita un archivo.
+
+    PDF_WORKERS=0   renderiza en el mismo proceso (sin pool)
+    PDF_DISCO=0     caché solo en memoria (PDF_MEMORIA_MAX documentos por proceso)
+    PDF_DISCO_MAX_MB / PDF_DISCO_MAX_ARCHIVOS   topes de la carpeta; se borran los menos usados
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from metricas.registro import registrar_duracion
+from pdfs.plantillas import PLANTILLAS
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR") or os.path.join(ROOT_DIR, "app", "cotizaciones_pdf", "cache")
+PDF_TIMEOUT_S = float(os.getenv("PDF_TIMEOUT_S", "60"))
+PDF_DISCO = os.getenv("PDF_DISCO", "1").lower() not in ("0", "false", "no")
+PDF_MEMORIA_MAX = int(os.getenv("PDF_MEMORIA_MAX", "200"))
+PDF_DISCO_MAX_MB = float(os.getenv("PDF_DISCO_MAX_MB", "500"))
+PDF_DISCO_MAX_ARCHIVOS = int(os.getenv("PDF_DISCO_MAX_ARCHIVOS", "20000"))
+PDF_PODAR_CADA = 100    # renders entre podas de la carpeta (la primera, al primer render)
+
+
+def clave_pdf(plantilla: str, datos: dict) -> str:
+    _, version = PLANTILLAS[plantilla]
+    crudo = json.dumps([plantilla, version, datos], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(crudo.encode()).hexdigest()[:32]
+
+
+def _renderizar(plantilla: str, datos: dict, ruta: str | None) -> bytes:
+    # Corre en el proceso del pool. Con ruta escribe a un temporal y lo publica de
+    # golpe, así nadie lee un PDF a medias desde la caché
+    fn, _ = PLANTILLAS[plantilla]
+    contenido = fn(datos)
+    if ruta is not None:
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as f:
+            f.write(contenido)
+        os.replace(temporal, ruta)
+    return contenido
+
+
+def _tocar(ruta: str):
+    # mtime = último uso: la poda de la carpeta borra primero lo que nadie pidió
+    try:
+        os.utime(ruta)
+    except OSError:
+        pass
+
+
+class ServicioPDF:
+    def __init__(self, workers: int = PDF_WORKERS, carpeta: str | None = PDF_CACHE_DIR if PDF_DISCO else None,
+                 memoria_max: int = PDF_MEMORIA_MAX):
+        self.workers = workers
+        self.carpeta = carpeta
+        self.memoria_max = memoria_max
+        self._pool: ProcessPoolExecutor | None = None
+        self._en_vuelo: dict[str, Future] = {}
+        self._memoria: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0       # servidos de la caché
+        self.renders = 0        # renders reales
+        self.coalescidos = 0    # esperaron un render ajeno en curso
+        self.podados = 0        # archivos borrados de la carpeta por los topes
+
+    def _enviar(self, plantilla, datos, ruta) -> Future:
+        if self.workers <= 0:
+            futuro = Future()
+            try:
+                futuro.set_result(_renderizar(plantilla, datos, ruta))
+            except Exception as e:
+                futuro.set_exception(e)
+            return futuro
+        for _ in range(2):
+            if self._pool is None:
+                # spawn: Streamlit corre hilos y fork podría heredar locks tomados
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                return self._pool.submit(_renderizar, plantilla, datos, ruta)
+            except BrokenProcessPool:
+                # Un worker murió: se descarta el pool y se crea otro
+                self._pool = None
+        raise RuntimeError("No se pudo iniciar el pool de PDF")
+
+    def _ruta_cache(self, clave: str) -> str | None:
+        return os.path.join(self.carpeta, f"{clave}.pdf") if self.carpeta else None
+
+    def _guardar_memoria(self, clave: str, contenido: bytes):
+        with self._lock:
+            self._memoria[clave] = contenido
+            self._memoria.move_to_end(clave)
+            while len(self._memoria) > self.memoria_max:
+                self._memoria.popitem(last=False)
+
+    def en_cache(self, plantilla: str, datos: dict) -> bytes | None:
+        """Bytes del PDF si ya está renderizado (memoria o disco); nunca renderiza."""
+        clave = clave_pdf(plantilla, datos)
+        with self._lock:
+            contenido = self._memoria.get(clave)
+            if contenido is not None:
+                self._memoria.move_to_end(clave)
+                return contenido
+        ruta = self._ruta_cache(clave)
+        if ruta is None or not os.path.exists(ruta):
+            return None
+        with open(ruta, "rb") as f:
+            contenido = f.read()
+        _tocar(ruta)
+        self._guardar_memoria(clave, contenido)
+        return contenido
+
+    def contenido(self, plantilla: str, datos: dict) -> bytes:
+        """Bytes del PDF; lo renderiza en el pool solo si no está en caché."""
+        t0 = time.perf_counter()
+        en_cache = self.en_cache(plantilla, datos)
+        if en_cache is not None:
+            self.aciertos += 1
+            registrar_duracion("eon_pdf_segundos", time.perf_counter() - t0, "pdf_s", plantilla=plantilla, origen="cache")
+            return en_cache
+
+        clave = clave_pdf(plantilla, datos)
+        ruta = self._ruta_cache(clave)
+        if ruta is not None:
+            os.makedirs(self.carpeta, exist_ok=True)
+        with self._lock:
+            futuro = self._en_vuelo.get(clave)
+            if futuro is None:
+                futuro = self._enviar(plantilla, datos, ruta)
+                self._en_vuelo[clave] = futuro
+                self.renders += 1
+                origen = "render"
+                podar = ruta is not None and self.renders % PDF_PODAR_CADA == 1
+            else:
+                self.coalescidos += 1
+                origen = "coalescido"
+        if origen == "render":
+            # Fuera del lock: sin pool el futuro ya está resuelto y el callback corre aquí mismo
+            futuro.add_done_callback(lambda _: self._terminar(clave))
+        contenido = futuro.result(timeout=PDF_TIMEOUT_S)
+        self._guardar_memoria(clave, contenido)
+        if origen == "render" and podar:
+            self.podar_disco()
+        registrar_duracion("eon_pdf_segundos", time.perf_counter() - t0, "pdf_s", plantilla=plantilla, origen=origen)
+        return contenido
+
+    def ruta(self, plantilla: str, datos: dict) -> str:
+        """Ruta del PDF en la caché de disco (requiere PDF_DISCO)."""
+        if self.carpeta is None:
+            raise RuntimeError("Caché de PDF sin disco (PDF_DISCO=0): usa contenido()")
+        ruta = self._ruta_cache(clave_pdf(plantilla, datos))
+        if not os.path.exists(ruta):
+            self.contenido(plantilla, datos)
+        else:
+            self.aciertos += 1
+            _tocar(ruta)
+        return ruta
+
+    def podar_disco(self, max_mb: float = PDF_DISCO_MAX_MB, max_archivos: int = PDF_DISCO_MAX_ARCHIVOS) -> int:
+        """
+        Borra de la carpeta los PDF usados hace más tiempo (mtime, que se renueva en
+        cada acierto) hasta quedar bajo ambos topes. Devuelve cuántos borró.
+        """
+        if self.carpeta is None or not os.path.isdir(self.carpeta):
+            return 0
+        archivos = []
+        with os.scandir(self.carpeta) as entradas:
+            for e in entradas:
+                if not e.name.endswith(".pdf"):
+                    continue
+                try:
+                    info = e.stat()
+                except FileNotFoundError:
+                    continue
+                archivos.append((info.st_mtime, info.st_size, e.path))
+        archivos.sort(reverse=True)
+        total, borrados, tope = 0, 0, max_mb * 1024 * 1024
+        for i, (_, tamano, ruta) in enumerate(archivos):
+            total += tamano
+            if i >= max_archivos or total > tope:
+                try:
+                    os.remove(ruta)
+                    borrados += 1
+                except FileNotFoundError:
+                    pass
+        self.podados += borrados
+        return borrados
+
+    def _terminar(self, clave):
+        with self._lock:
+            self._en_vuelo.pop(clave, None)
+
+    def estadisticas(self) -> dict:
+        return {
+            "aciertos": self.aciertos,
+            "renders": self.renders,
+            "coalescidos": self.coalescidos,
+            "en_vuelo": len(self._en_vuelo),
+            "en_memoria": len(self._memoria),
+            "podados": self.podados,
+            "disco": self.carpeta is not None,
+            "workers": self.workers,
+        }
+
+
+SERVICIO_PDF = ServicioPDF()
+
+
+def pdf_cotizacion(plantilla: str, datos: dict, ruta_destino: str | None = None) -> str:
+    """
+    Ruta del PDF de `datos` con la plantilla dada. Con ruta_destino lo deja con ese
+    nombre y devuelve esa ruta: enlace duro a la caché si hay disco, si no se escribe.
+    """
+    if SERVICIO_PDF.carpeta is None:
+        if ruta_destino is None:
+            raise RuntimeError("Caché de PDF sin disco (PDF_DISCO=0): pasa ruta_destino o usa contenido()")
+        os.makedirs(os.path.dirname(ruta_destino) or ".", exist_ok=True)
+        with open(ruta_destino, "wb") as f:
+            f.write(SERVICIO_PDF.contenido(plantilla, datos))
+        return ruta_destino
+
+    ruta = SERVICIO_PDF.ruta(plantilla, datos)
+    if ruta_destino is None:
+        return ruta
+    os.makedirs(os.path.dirname(ruta_destino) or ".", exist_ok=True)
+    if os.path.exists(ruta_destino) and os.path.samefile(ruta, ruta_destino):
+        return ruta_destino
+    temporal = f"{ruta_destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(ruta, temporal)
+    except OSError:
+        # Otro disco o sin soporte de enlaces: copia
+        shutil.copyfile(ruta, temporal)
+    os.replace(temporal, ruta_destino)
+    return ruta_destino
@@ -0,0 +1,198 @@
+# pricing/bandas.py
+"""
+Bandas de margen por peso (margenes_peso): validación al escribir e índice en
+memoria para buscar el margen de uno o muchos pesos con np.searchsorted.
+
+Una tabla válida tiene rangos [rango_min, rango_max] con extremos inclusivos que
+no se traslapan. Las bases anteriores a la validación pueden traer traslapes: el
+índice los resuelve como la consulta original (`? BETWEEN rango_min AND rango_max`
+sobre la fila de menor id) y `traslapes` dice cuántos hay para avisarlo en Pricing.
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from db.consultas import FiltroCotizaciones, where_cotizaciones
+
+
+class BandasInvalidas(ValueError):
+    """La tabla de bandas propuesta tiene rangos inválidos o traslapados."""
+
+    def __init__(self, errores: list[str]):
+        super().__init__("; ".join(errores))
+        self.errores = errores
+
+
+def _fmt(banda) -> str:
+    lo, hi, m = banda
+    return f"[{lo:g}, {hi:g}] kg → {m:g}%"
+
+
+def validar_bandas(bandas) -> list[tuple]:
+    """
+    [(rango_min, rango_max, margen_porcentaje)] ordenadas por rango_min, o
+    BandasInvalidas con todos los problemas encontrados.
+    """
+    errores, limpias = [], []
+    for lo, hi, m in bandas:
+        if lo is None or hi is None or m is None or any(pd.isna(x) for x in (lo, hi, m)):
+            errores.append(f"Rango incompleto: {lo}, {hi}, {m}")
+            continue
+        lo, hi, m = float(lo), float(hi), float(m)
+        if lo < 0 or hi < lo:
+            errores.append(f"Rango inválido {_fmt((lo, hi, m))}: el mínimo debe ser ≥ 0 y ≤ máximo")
+            continue
+        limpias.append((lo, hi, m))
+    limpias.sort()
+    for anterior, banda in zip(limpias, limpias[1:]):
+        # Extremos inclusivos: [0, 10] y [10, 20] se traslapan en 10 kg
+        if banda[0] <= anterior[1]:
+            errores.append(f"{_fmt(banda)} se traslapa con {_fmt(anterior)}")
+    if errores:
+        raise BandasInvalidas(errores)
+    return limpias
+
+
+class TablaBandas:
+    """Intervalos disjuntos ordenados; `buscar` y `buscar_muchos` devuelven el margen (%) o None/NaN."""
+
+    def __init__(self, bandas):
+        # bandas: [(rango_min, rango_max, margen)] disjuntas (ver validar_bandas)
+        bandas = sorted(bandas)
+        self.minimos = np.array([b[0] for b in bandas], dtype=float)
+        self.maximos = np.array([b[1] for b in bandas], dtype=float)
+        self.margenes = np.array([b[2] for b in bandas], dtype=float)
+        self.traslapes = 0
+
+    @classmethod
+    def desde_filas(cls, filas) -> "TablaBandas":
+        """
+        Filas (id, rango_min, rango_max, margen) tal como están en la base. Si se
+        traslapan, cada peso conserva el margen de la fila de menor id: las filas
+        posteriores se recortan a los huecos que dejan las anteriores.
+        """
+        asignadas, traslapes = [], 0
+        for _, lo, hi, m in sorted(filas, key=lambda f: f[0]):
+            if lo is None or hi is None or m is None or lo > hi:
+                continue
+            piezas = [(float(lo), float(hi))]
+            for a, b, _ in asignadas:
+                siguientes = []
+                for x, y in piezas:
+                    if y < a or x > b:
+                        siguientes.append((x, y))
+                        continue
+                    if x < a:
+                        siguientes.append((x, np.nextafter(a, -np.inf)))
+                    if y > b:
+                        siguientes.append((np.nextafter(b, np.inf), y))
+                if siguientes != piezas:
+                    traslapes += 1
+                piezas = siguientes
+            asignadas.extend((x, y, float(m)) for x, y in piezas)
+        tabla = cls(asignadas)
+        tabla.traslapes = traslapes
+        return tabla
+
+    @classmethod
+    def desde_db(cls, conn: sqlite3.Connection) -> "TablaBandas":
+        return cls.desde_filas(
+            conn.execute("SELECT id, rango_min, rango_max, margen_porcentaje FROM margenes_peso ORDER BY id").fetchall()
+        )
+
+    def buscar(self, peso: float):
+        i = int(np.searchsorted(self.minimos, peso, side="right")) - 1
+        if i < 0 or peso > self.maximos[i]:
+            return None
+        return float(self.margenes[i])
+
+    def buscar_muchos(self, pesos) -> np.ndarray:
+        """Versión vectorizada de `buscar`; NaN donde no hay banda."""
+        pesos = np.asarray(pesos, dtype=float)
+        if self.minimos.size == 0:
+            return np.full(pesos.shape, np.nan)
+        i = np.searchsorted(self.minimos, pesos, side="right") - 1
+        i_ok = np.maximum(i, 0)
+        dentro = (i >= 0) & (pesos <= self.maximos[i_ok])
+        return np.where(dentro, self.margenes[i_ok], np.nan)
+
+    def __len__(self):
+        return int(self.minimos.size)
+
+
+# -----------------------------
+# Escritura (Pricing)
+# -----------------------------
+def leer_bandas(conn: sqlite3.Connection) -> pd.DataFrame:
+    return pd.read_sql_query(
+        "SELECT id, rango_min, rango_max, margen_porcentaje FROM margenes_peso ORDER BY rango_min, id", conn
+    )
+
+
+def agregar_banda(conn: sqlite3.Connection, rango_min: float, rango_max: float, margen: float):
+    """
+    Inserta una banda si la tabla sigue siendo válida; si no, BandasInvalidas.
+    Lectura, validación e INSERT van en una transacción BEGIN IMMEDIATE (dos
+    administradores a la vez no pueden dejar bandas traslapadas); hace commit.
+    """
+    nueva = (rango_min, rango_max, margen)
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        actuales = c.execute("SELECT rango_min, rango_max, margen_porcentaje FROM margenes_peso").fetchall()
+        try:
+            validar_bandas(actuales)
+        except BandasInvalidas:
+            # Tabla heredada con traslapes: al menos que la nueva no choque con ninguna
+            validar_bandas([nueva])
+            choques = [b for b in actuales if not (rango_max < b[0] or rango_min > b[1])]
+            if choques:
+                raise BandasInvalidas([f"{_fmt(nueva)} se traslapa con {_fmt(b)}" for b in choques])
+        else:
+            validar_bandas(actuales + [nueva])
+        c.execute(
+            "INSERT INTO margenes_peso (rango_min, rango_max, margen_porcentaje) VALUES (?, ?, ?)", nueva
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def reemplazar_bandas(conn: sqlite3.Connection, bandas) -> list[tuple]:
+    """Valida la tabla completa y la deja en lugar de la actual (misma transacción). No hace commit."""
+    bandas = validar_bandas(bandas)
+    conn.execute("DELETE FROM margenes_peso")
+    conn.executemany(
+        "INSERT INTO margenes_peso (rango_min, rango_max, margen_porcentaje) VALUES (?, ?, ?)", bandas
+    )
+    return bandas
+
+
+# -----------------------------
+# Repreciar el histórico
+# -----------------------------
+def repreciar_historial(conn: sqlite3.Connection, propuesta, filtro: FiltroCotizaciones | None = None,
+                        actual: TablaBandas | None = None) -> pd.DataFrame:
+    """
+    Precio de cada cotización del filtro con la tabla `propuesta` en lugar de la
+    actual. Solo cambia el factor de peso: precio_propuesto = precio_total ×
+    (1 + propuesto%) / (1 + actual%). margen_peso_* es NaN donde el peso no cae en
+    ninguna banda de esa tabla (y entonces precio_propuesto también).
+    """
+    propuesta = propuesta if isinstance(propuesta, TablaBandas) else TablaBandas(validar_bandas(propuesta))
+    if actual is None:
+        actual = TablaBandas.desde_db(conn)
+    where, params = where_cotizaciones(filtro or FiltroCotizaciones())
+    df = pd.read_sql_query(
+        f"SELECT id, peso_kg, precio_total FROM cotizaciones /* recorrido completo */ WHERE {where} AND peso_kg IS NOT NULL",
+        conn, params=params,
+    )
+    pesos = df["peso_kg"].to_numpy(dtype=float)
+    df["margen_peso_actual"] = actual.buscar_muchos(pesos)
+    df["margen_peso_propuesto"] = propuesta.buscar_muchos(pesos)
+    df["precio_propuesto"] = (
+        df["precio_total"] * (1 + df["margen_peso_propuesto"] / 100) / (1 + df["margen_peso_actual"] / 100)
+    )
+    return df
@@ -0,0 +1,124 @@
+# pricing/batch.py
+import sqlite3
+import uuid
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from pricing.engine import (
+    MOTIVO_SIN_MARGEN,
+    MOTIVO_SIN_MARGEN_PESO,
+    MOTIVO_SIN_TARIFA,
+    MotorPrecios,
+    obtener_motor,
+)
+from pricing.ofertas import generar_ofertas_automaticas
+
+COLUMNAS_REQUERIDAS = ["origen", "destino", "tipo_unidad", "peso_kg"]
+
+
+def leer_envios(fuente) -> pd.DataFrame:
+    """Acepta un DataFrame, una ruta o un archivo (p.ej. st.file_uploader) con CSV."""
+    df = fuente.copy() if isinstance(fuente, pd.DataFrame) else pd.read_csv(fuente)
+    df.columns = [str(c).strip() for c in df.columns]
+    if "peso_kg" not in df.columns and "peso" in df.columns:
+        df = df.rename(columns={"peso": "peso_kg"})
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el lote: {', '.join(faltantes)}")
+    for col in ("cliente", "descripcion_paquete"):
+        if col not in df.columns:
+            df[col] = None
+    df["peso_kg"] = pd.to_numeric(df["peso_kg"], errors="coerce")
+    return df.reset_index(drop=True)
+
+
+def cotizar_lote(fuente, db_path: str = None, motor: MotorPrecios = None) -> pd.DataFrame:
+    """
+    Calcula precio_total para todos los envíos con joins vectorizados.
+    Devuelve el lote con columnas tarifa_base, margen, margen_peso, precio_total
+    y motivo (None si se pudo cotizar; si no, sin_tarifa / sin_margen / sin_margen_peso).
+    """
+    if motor is None:
+        motor = obtener_motor(db_path)
+    df = leer_envios(fuente)
+
+    # 1) Tarifa base por ruta (join contra tarifas)
+    tarifas = pd.DataFrame(
+        [(o, d, t) for (o, d), t in motor.tarifas.items()],
+        columns=["origen", "destino", "tarifa_base"],
+    )
+    df = df.merge(tarifas, on=["origen", "destino"], how="left")
+
+    # 2) Margen: cliente > unidad > general
+    def _por_criterio(criterio):
+        return {v: m for (cr, v), m in motor.margenes.items() if cr == criterio}
+
+    margen = df["cliente"].map(_por_criterio("cliente")).astype(float)
+    margen = margen.fillna(df["tipo_unidad"].map(_por_criterio("unidad")).astype(float))
+    general = motor.margenes.get(("general", "General"))
+    if general is not None:
+        margen = margen.fillna(general)
+    df["margen"] = margen
+
+    # 3) Margen por peso (searchsorted sobre las bandas)
+    df["margen_peso"] = motor.bandas.buscar_muchos(df["peso_kg"].to_numpy())
+
+    # 4) Precio y motivo de falla por fila
+    df["precio_total"] = (
+        df["tarifa_base"] * df["peso_kg"] * (1 + df["margen"] / 100) * (1 + df["margen_peso"] / 100)
+    )
+    df["motivo"] = np.select(
+        [df["tarifa_base"].isna(), df["margen"].isna(), df["margen_peso"].isna()],
+        [MOTIVO_SIN_TARIFA, MOTIVO_SIN_MARGEN, MOTIVO_SIN_MARGEN_PESO],
+        default="",
+    )
+    df["motivo"] = df["motivo"].replace("", None)
+    return df
+
+
+def guardar_lote(conn: sqlite3.Connection, cotizado: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    """
+    Inserta en una sola transacción las filas cotizadas (motivo vacío) en
+    cotizaciones junto con sus ofertas automáticas de proveedores_rutas.
+    Devuelve (filas guardadas con id y cotizacion_id, número de ofertas generadas).
+    """
+    ok = cotizado[cotizado["motivo"].isna()].copy()
+    if ok.empty:
+        return ok, 0
+
+    hoy = str(date.today())
+    ok["cotizacion_id"] = [str(uuid.uuid4())[:8] for _ in range(len(ok))]
+    ok["estatus_url"] = "https://eonlogisticgroup.com/estatus/" + ok["cotizacion_id"]
+    filas = list(zip(
+        ok["cotizacion_id"], ok["cliente"], ok["origen"], ok["destino"], ok["peso_kg"].astype(float),
+        ok["descripcion_paquete"], ok["tipo_unidad"], ok["precio_total"].astype(float),
+        [hoy] * len(ok), ok["estatus_url"],
+    ))
+
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        id_previo = c.execute("SELECT COALESCE(MAX(id), 0) FROM cotizaciones").fetchone()[0]
+        c.executemany("""
+            INSERT INTO cotizaciones (
+                cotizacion_id, cliente, origen, destino, distancia_km, peso_kg,
+                descripcion_paquete, tipo_unidad, precio_total, fecha, estatus_url
+            ) VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, ?, ?)
+        """, filas)
+        # executemany inserta en orden: los id nuevos van por posición (cotizacion_id
+        # son 8 hex aleatorios y pueden repetirse dentro de un lote grande)
+        ids = pd.read_sql_query(
+            "SELECT id FROM cotizaciones WHERE id > ? ORDER BY id", conn, params=(id_previo,)
+        )
+        ok = ok.reset_index(drop=True)
+        ok["id"] = ids["id"].to_numpy()
+
+        # Ofertas automáticas de todo el lote en una sola sentencia
+        n_ofertas = generar_ofertas_automaticas(conn, id_previo + 1, int(ids["id"].max()))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return ok, n_ofertas
@@ -0,0 +1,118 @@
+# pricing/engine.py
+import os
+import sqlite3
+import threading
+import time
+
+from db.conexion import conectar
+from pricing.bandas import TablaBandas
+
+# Segundos que un snapshot puede vivir sin recargarse. Cubre escrituras hechas
+# desde otro proceso (p.ej. el portal cambia tarifas y la app de clientes cotiza).
+PRICING_TTL_S = float(os.getenv("PRICING_TTL_S", "300"))
+
+MOTIVO_SIN_TARIFA = "sin_tarifa"
+MOTIVO_SIN_MARGEN = "sin_margen"
+MOTIVO_SIN_MARGEN_PESO = "sin_margen_peso"
+
+
+class PrecioNoDisponible(LookupError):
+    """Falta una tarifa o un margen para calcular el precio."""
+
+    def __init__(self, motivo: str, mensaje: str):
+        super().__init__(mensaje)
+        self.motivo = motivo
+
+
+class MotorPrecios:
+    """Snapshot en memoria de tarifas, margenes y margenes_peso."""
+
+    def __init__(self, tarifas: dict, margenes: dict, bandas: list):
+        # bandas: filas (id, rango_min, rango_max, margen) de margenes_peso
+        self.tarifas = tarifas      # {(origen, destino): tarifa_base}
+        self.margenes = margenes    # {(criterio, valor): margen_porcentaje}
+        self.bandas = TablaBandas.desde_filas(bandas)
+        self.cargado_en = time.monotonic()
+
+    @classmethod
+    def desde_db(cls, conn: sqlite3.Connection) -> "MotorPrecios":
+        c = conn.cursor()
+        c.execute("SELECT origen, destino, tarifa_base FROM tarifas")
+        tarifas = {(o, d): t for o, d, t in c.fetchall() if t is not None}
+        c.execute("SELECT criterio, valor, margen_porcentaje FROM margenes")
+        margenes = {(cr, v): m for cr, v, m in c.fetchall() if m is not None}
+        c.execute("SELECT id, rango_min, rango_max, margen_porcentaje FROM margenes_peso ORDER BY id")
+        bandas = c.fetchall()
+        return cls(tarifas, margenes, bandas)
+
+    def tarifa_base(self, origen, destino):
+        return self.tarifas.get((origen, destino))
+
+    def margen(self, cliente, tipo_unidad):
+        # Prioridad: cliente > unidad > general
+        for clave in (("cliente", cliente), ("unidad", tipo_unidad), ("general", "General")):
+            if clave in self.margenes:
+                return self.margenes[clave]
+        return None
+
+    def margen_peso(self, peso):
+        return self.bandas.buscar(float(peso))
+
+    def cotizar(self, origen, destino, tipo_unidad, peso, cliente=None) -> float:
+        """Precio = tarifa_base * peso * (1 + margen%) * (1 + margen_peso%)."""
+        tarifa_base = self.tarifa_base(origen, destino)
+        if tarifa_base is None:
+            raise PrecioNoDisponible(
+                MOTIVO_SIN_TARIFA,
+                "No se encontró una tarifa base para esta ruta. Configúrala en el módulo de Pricing.",
+            )
+        margen = self.margen(cliente, tipo_unidad)
+        if margen is None:
+            raise PrecioNoDisponible(
+                MOTIVO_SIN_MARGEN,
+                f"No se encontró un margen de utilidad para la unidad: {tipo_unidad}. Configúralo en el módulo de Pricing.",
+            )
+        margen_peso = self.margen_peso(peso)
+        if margen_peso is None:
+            raise PrecioNoDisponible(
+                MOTIVO_SIN_MARGEN_PESO,
+                f"No se encontró un margen de utilidad para el peso: {peso} kg. Configúralo en el módulo de Pricing.",
+            )
+        return tarifa_base * peso * (1 + margen / 100) * (1 + margen_peso / 100)
+
+
+# ------------------------------------------
+# Cache por proceso (un snapshot por archivo)
+# ------------------------------------------
+_lock = threading.Lock()
+_motores: dict[str, MotorPrecios] = {}
+
+
+def obtener_motor(db_path: str) -> MotorPrecios:
+    db_path = os.path.abspath(db_path)
+    motor = _motores.get(db_path)
+    if motor is not None and time.monotonic() - motor.cargado_en < PRICING_TTL_S:
+        return motor
+    with _lock:
+        motor = _motores.get(db_path)
+        if motor is None or time.monotonic() - motor.cargado_en >= PRICING_TTL_S:
+            conn = conectar(db_path)
+            try:
+                motor = MotorPrecios.desde_db(conn)
+            finally:
+                conn.close()
+            _motores[db_path] = motor
+    return motor
+
+
+def invalidar_motor(db_path: str | None = None):
+    """Descarta el snapshot; llamar después de escribir tarifas o márgenes."""
+    with _lock:
+        if db_path is None:
+            _motores.clear()
+        else:
+            _motores.pop(os.path.abspath(db_path), None)
+
+
+def cotizar(db_path: str, origen, destino, tipo_unidad, peso, cliente=None) -> float:
+    return obtener_motor(db_path).cotizar(origen, destino, tipo_unidad, peso, cliente=cliente)
@@ -0,0 +1,220 @@
+# pricing/matriz.py
+"""
+Matriz de precios precalculados: rutas más cotizadas × bandas de peso estándar,
+con el precio de lista de tarifas manuales (ver precio_lista) y la mejor tarifa
+DHL de cada celda y la hora en que se calculó cada una. Nueva Cotización y Cotizar vía API la leen para
+mostrar precios al instante; un hilo en segundo plano la mantiene al día.
+
+    python -m pricing.matriz [--db eon.db] [--rutas 200] [--sin-dhl]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from carriers.base import SolicitudTarifa
+from carriers.cotizador import carriers_configurados
+from carriers.dhl_client import CarrierDHL
+from db.conexion import DB_PATH, conectar
+from pricing.engine import MotorPrecios, PrecioNoDisponible
+
+MATRIZ_RUTAS = int(os.getenv("MATRIZ_RUTAS", "200"))
+MATRIZ_INTERVALO_S = float(os.getenv("MATRIZ_INTERVALO_S", "3600"))   # 0 = sin hilo de fondo
+MATRIZ_CONCURRENCIA_DHL = int(os.getenv("MATRIZ_CONCURRENCIA_DHL", "4"))
+
+BANDAS_KG = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+# DHL Express: paquetería, hasta 70 kg por pieza
+BANDAS_DHL_KG = tuple(b for b in BANDAS_KG if b <= 70)
+
+_UPSERT_TARIFA = """
+    INSERT INTO matriz_rutas (origen, destino, peso_kg, precio_tarifa, motivo_tarifa, tarifa_en)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (origen, destino, peso_kg) DO UPDATE SET
+        precio_tarifa = excluded.precio_tarifa,
+        motivo_tarifa = excluded.motivo_tarifa,
+        tarifa_en = excluded.tarifa_en
+"""
+# Si DHL falla se conserva el último precio bueno (dhl_en dice qué tan viejo es)
+_UPSERT_DHL = """
+    INSERT INTO matriz_rutas (origen, destino, peso_kg, precio_dhl, producto_dhl, error_dhl, dhl_en)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (origen, destino, peso_kg) DO UPDATE SET
+        precio_dhl = COALESCE(excluded.precio_dhl, precio_dhl),
+        producto_dhl = COALESCE(excluded.producto_dhl, producto_dhl),
+        error_dhl = excluded.error_dhl,
+        dhl_en = COALESCE(excluded.dhl_en, dhl_en)
+"""
+
+
+def _ahora() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def rutas_frecuentes(conn, limite: int = MATRIZ_RUTAS) -> list[tuple]:
+    """[(origen, destino, cotizaciones)] de las rutas más cotizadas."""
+    return conn.execute("""
+        SELECT origen, destino, COUNT(*) AS n
+        FROM cotizaciones
+        WHERE origen IS NOT NULL AND origen != '' AND destino IS NOT NULL AND destino != ''
+        GROUP BY origen, destino
+        ORDER BY n DESC
+        LIMIT ?
+    """, (limite,)).fetchall()
+
+
+def registrar_ciudad_cp(conn, ciudad: str, cp: str):
+    """Recuerda el CP usado para una ciudad en una cotización DHL. No hace commit."""
+    if ciudad and cp:
+        conn.execute("""
+            INSERT INTO ciudades_cp (ciudad, cp, actualizado_en) VALUES (?, ?, ?)
+            ON CONFLICT (ciudad) DO UPDATE SET cp = excluded.cp, actualizado_en = excluded.actualizado_en
+        """, (ciudad.strip(), str(cp).strip(), _ahora()))
+
+
+def precio_lista(motor: MotorPrecios, origen: str, destino: str, peso: float) -> float:
+    """
+    Precio de lista de la ruta (sin cliente ni unidad): con el margen general o,
+    si no hay, con el menor margen por unidad ("desde"). Nueva Cotización muestra
+    el precio con la unidad y el cliente del formulario, no este.
+    """
+    unidad = None
+    if ("general", "General") not in motor.margenes:
+        por_unidad = {v: m for (cr, v), m in motor.margenes.items() if cr == "unidad"}
+        unidad = min(por_unidad, key=por_unidad.get) if por_unidad else None
+    return motor.cotizar(origen, destino, unidad, peso)
+
+
+def _filas_tarifa(motor: MotorPrecios, rutas) -> list[tuple]:
+    filas, ahora = [], _ahora()
+    for origen, destino, _ in rutas:
+        for peso in BANDAS_KG:
+            try:
+                filas.append((origen, destino, peso, precio_lista(motor, origen, destino, peso), None, ahora))
+            except PrecioNoDisponible as e:
+                filas.append((origen, destino, peso, None, e.motivo, ahora))
+    return filas
+
+
+async def _filas_dhl(celdas, carrier: CarrierDHL, concurrencia: int) -> list[tuple]:
+    limite = asyncio.Semaphore(concurrencia)
+
+    async def una(origen, destino, peso, cp_origen, cp_destino):
+        solicitud = SolicitudTarifa(cp_origen, cp_destino, peso, origin_city=origen, dest_city=destino,
+                                    is_customs_declarable=False)
+        async with limite:
+            try:
+                ofertas = await asyncio.wait_for(carrier.cotizar(solicitud), carrier.timeout_s)
+            except Exception as e:
+                return (origen, destino, peso, None, None, str(e)[:300] or type(e).__name__, None)
+        if not ofertas:
+            return (origen, destino, peso, None, None, "sin ofertas", None)
+        mejor = min(ofertas, key=lambda of: of.totalPrice)
+        return (origen, destino, peso, mejor.totalPrice, mejor.productName, None, _ahora())
+
+    return await asyncio.gather(*(una(*c) for c in celdas))
+
+
+def recalcular_matriz(db_path: str = DB_PATH, limite: int = MATRIZ_RUTAS, con_dhl: bool = True) -> dict:
+    inicio = time.perf_counter()
+    conn = conectar(db_path)
+    try:
+        rutas = rutas_frecuentes(conn, limite)
+        # Snapshot propio: no espera el TTL del motor compartido
+        filas_tarifa = _filas_tarifa(MotorPrecios.desde_db(conn), rutas)
+        conn.executemany(_UPSERT_TARIFA, filas_tarifa)
+        conn.commit()
+
+        filas_dhl = []
+        if con_dhl and carriers_configurados():
+            cps = dict(conn.execute("SELECT ciudad, cp FROM ciudades_cp").fetchall())
+            celdas = [
+                (origen, destino, peso, cps[origen], cps[destino])
+                for origen, destino, _ in rutas if origen in cps and destino in cps
+                for peso in BANDAS_DHL_KG
+            ]
+            if celdas:
+                filas_dhl = asyncio.run(_filas_dhl(celdas, CarrierDHL(), MATRIZ_CONCURRENCIA_DHL))
+                conn.executemany(_UPSERT_DHL, filas_dhl)
+                conn.commit()
+    finally:
+        conn.close()
+    return {
+        "rutas": len(rutas),
+        "celdas_tarifa": sum(1 for f in filas_tarifa if f[3] is not None),
+        "celdas_dhl": sum(1 for f in filas_dhl if f[3] is not None),
+        "errores_dhl": sum(1 for f in filas_dhl if f[5]),
+        "segundos": round(time.perf_counter() - inicio, 2),
+        "terminado_en": _ahora(),
+    }
+
+
+# -----------------------------
+# Lecturas para la UI
+# -----------------------------
+def precios_ruta(conn, origen: str, destino: str):
+    """Filas de la matriz para una ruta, por banda de peso."""
+    return conn.execute("""
+        SELECT peso_kg, precio_tarifa, motivo_tarifa, tarifa_en, precio_dhl, producto_dhl, dhl_en
+        FROM matriz_rutas
+        WHERE origen = ? AND destino = ?
+        ORDER BY peso_kg
+    """, (origen, destino)).fetchall()
+
+
+def celda(conn, origen: str, destino: str, peso: float):
+    """La banda más chica que cubre `peso` (precio tope para ese peso), o None."""
+    return conn.execute("""
+        SELECT peso_kg, precio_tarifa, tarifa_en, precio_dhl, producto_dhl, dhl_en
+        FROM matriz_rutas
+        WHERE origen = ? AND destino = ? AND peso_kg >= ?
+        ORDER BY peso_kg
+        LIMIT 1
+    """, (origen, destino, peso)).fetchone()
+
+
+# -----------------------------
+# Recalculo en segundo plano
+# -----------------------------
+_lock = threading.Lock()
+_hilo: threading.Thread | None = None
+ultimo_recalculo: dict = {}
+
+
+def iniciar_recalculo_periodico(db_path: str = DB_PATH, intervalo_s: float = MATRIZ_INTERVALO_S):
+    """Un hilo daemon por proceso: recalcula al arrancar y luego cada intervalo_s."""
+    global _hilo
+    if intervalo_s <= 0:
+        return None
+    with _lock:
+        if _hilo is not None and _hilo.is_alive():
+            return _hilo
+
+        def ciclo():
+            while True:
+                try:
+                    ultimo_recalculo.update(recalcular_matriz(db_path))
+                except Exception as e:
+                    print("❌ Error al recalcular la matriz de rutas:", e)
+                time.sleep(intervalo_s)
+
+        _hilo = threading.Thread(target=ciclo, name="matriz-rutas", daemon=True)
+        _hilo.start()
+    return _hilo
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Recalcula la matriz de precios por ruta frecuente")
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--rutas", type=int, default=MATRIZ_RUTAS)
+    ap.add_argument("--sin-dhl", action="store_true", help="solo precios de tarifas manuales")
+    args = ap.parse_args()
+    from db.migraciones import asegurar_esquema
+    asegurar_esquema(args.db)
+    print(recalcular_matriz(args.db, args.rutas, con_dhl=not args.sin_dhl))
@@ -0,0 +1,28 @@
+# pricing/ofertas.py
+import sqlite3
+from datetime import datetime
+
+# Una sola sentencia para todas las ofertas automáticas de un rango de cotizaciones:
+# join cotizaciones × proveedores_rutas (usa idx_proveedores_rutas_ruta).
+SQL_OFERTAS_AUTOMATICAS = """
+    INSERT INTO ofertas (id_cotizacion, proveedor, precio_ofertado, mensaje, fecha)
+    SELECT c.id, pr.proveedor, c.precio_total * pr.factor_precio,
+           'Oferta automática generada para ' || pr.proveedor, ?
+    FROM cotizaciones c
+    JOIN proveedores_rutas pr
+      ON pr.origen = c.origen AND pr.destino = c.destino AND pr.tipo_unidad = c.tipo_unidad
+    WHERE c.id BETWEEN ? AND ?
+"""
+
+
+def generar_ofertas_automaticas(conn: sqlite3.Connection, id_desde: int, id_hasta: int | None = None) -> int:
+    """
+    Inserta las ofertas automáticas para las cotizaciones con id en [id_desde, id_hasta].
+    No hace commit: corre dentro de la transacción de quien inserta las cotizaciones.
+    Devuelve cuántas ofertas se generaron.
+    """
+    if id_hasta is None:
+        id_hasta = id_desde
+    hoy = datetime.now().strftime("%Y-%m-%d")
+    cur = conn.execute(SQL_OFERTAS_AUTOMATICAS, (hoy, id_desde, id_hasta))
+    return cur.rowcount
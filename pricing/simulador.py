@@ -0,0 +1,220 @@
+# pricing/simulador.py
+"""
+Simulador what-if: cuánto habría cambiado el ingreso del histórico con otras
+tarifas, margenes o margenes_peso. Lee cotizaciones por lotes (memoria acotada
+sin importar el tamaño de la tabla), reprecia cada lote con operaciones
+vectorizadas y acumula el delta por ruta, tipo de unidad y cliente.
+
+Cada componente del precio (tarifa_base × peso × (1 + margen%) × (1 + margen_peso%))
+se compara entre el snapshot actual y la propuesta, y el precio guardado se
+escala por ese cociente: cotizaciones que se ajustaron a mano o vinieron de DHL
+conservan su diferencia con la fórmula. Si la propuesta no toca un componente,
+ese componente no se evalúa.
+
+    python -m pricing.simulador propuesta.json [--db eon.db] [--desde 2024-01-01]
+
+propuesta.json: {"tarifas": [["Monterrey", "CDMX", 12.5]], "margenes": [["unidad", "Tráiler", 18]],
+                 "bandas": [[0, 100, 5], [100.01, 5000, 2]]}
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db.conexion import DB_PATH, conectar
+from db.consultas import FiltroCotizaciones, where_cotizaciones
+from pricing.bandas import TablaBandas, validar_bandas
+from pricing.engine import MotorPrecios, obtener_motor
+
+SIMULADOR_LOTE = int(os.getenv("SIMULADOR_LOTE", "200000"))   # filas por lectura
+
+DIMENSIONES = ("ruta", "tipo_unidad", "cliente")
+
+# criterio de margenes → consulta de existencia en cotizaciones (general aplica a todas)
+CRITERIOS = {
+    "cliente": "SELECT EXISTS (SELECT 1 FROM cotizaciones WHERE cliente = ?)",
+    "unidad": "SELECT EXISTS (SELECT 1 FROM cotizaciones WHERE tipo_unidad = ?)",
+    "general": None,
+}
+
+
+def normalizar_margenes(filas) -> dict:
+    """
+    {(criterio, valor): margen} desde renglones (criterio, valor, margen). El
+    criterio va en minúsculas y debe estar en CRITERIOS; "general" siempre queda
+    como ("general", "General"), la clave que busca MotorPrecios.margen.
+    """
+    margenes, errores = {}, []
+    for cr, v, m in filas:
+        criterio = str(cr).strip().lower()
+        if criterio not in CRITERIOS:
+            errores.append(f"criterio '{cr}' no válido (cliente, unidad o general)")
+            continue
+        margenes[(criterio, "General" if criterio == "general" else str(v).strip())] = float(m)
+    if errores:
+        raise ValueError("; ".join(errores))
+    return margenes
+
+
+def valores_sin_historial(conn, margenes: dict) -> list[tuple]:
+    """(criterio, valor) de cliente/unidad que no aparecen en ninguna cotización: no cambian nada."""
+    faltantes = []
+    for criterio, valor in margenes:
+        sql = CRITERIOS[criterio]
+        if sql and not conn.execute(sql, (valor,)).fetchone()[0]:
+            faltantes.append((criterio, valor))
+    return faltantes
+
+
+@dataclass
+class Propuesta:
+    """Cambios sobre el snapshot actual; lo que no se menciona queda igual."""
+    tarifas: dict = field(default_factory=dict)     # {(origen, destino): tarifa_base}
+    margenes: dict = field(default_factory=dict)    # {(criterio, valor): margen_porcentaje}
+    bandas: list | None = None                      # tabla completa de margenes_peso, o None
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "Propuesta":
+        return cls(
+            tarifas={(o, d): float(t) for o, d, t in datos.get("tarifas") or []},
+            margenes=normalizar_margenes(datos.get("margenes") or []),
+            bandas=[tuple(b) for b in datos["bandas"]] if datos.get("bandas") is not None else None,
+        )
+
+    def vacia(self) -> bool:
+        return not self.tarifas and not self.margenes and self.bandas is None
+
+
+def _ruta(origen, destino) -> str:
+    # Mismo formato que la dimensión "ruta" de db/agregados.py
+    return f"{origen} → {destino}"
+
+
+def _margenes_por_criterio(margenes: dict, criterio: str) -> dict:
+    return {v: m for (cr, v), m in margenes.items() if cr == criterio}
+
+
+def _margen(lote: pd.DataFrame, margenes: dict) -> np.ndarray:
+    # Prioridad: cliente > unidad > general (como MotorPrecios.margen)
+    margen = lote["cliente"].map(_margenes_por_criterio(margenes, "cliente")).astype(float)
+    margen = margen.fillna(lote["tipo_unidad"].map(_margenes_por_criterio(margenes, "unidad")).astype(float))
+    general = margenes.get(("general", "General"))
+    if general is not None:
+        margen = margen.fillna(general)
+    return margen.to_numpy()
+
+
+class _Simulacion:
+    def __init__(self, actual: MotorPrecios, propuesta: Propuesta):
+        self.propuesta = propuesta
+        self.tarifas_actuales = {_ruta(o, d): t for (o, d), t in actual.tarifas.items()}
+        self.tarifas_nuevas = {**self.tarifas_actuales, **{_ruta(o, d): t for (o, d), t in propuesta.tarifas.items()}}
+        self.margenes_actuales = actual.margenes
+        self.margenes_nuevos = {**actual.margenes, **propuesta.margenes}
+        self.bandas_actuales = actual.bandas
+        self.bandas_nuevas = TablaBandas(validar_bandas(propuesta.bandas)) if propuesta.bandas is not None else None
+
+    def factor(self, lote: pd.DataFrame) -> np.ndarray:
+        """Cociente precio_propuesto / precio_actual por fila; NaN si algún componente falta."""
+        factor = np.ones(len(lote))
+        if self.propuesta.tarifas:
+            factor *= (lote["ruta"].map(self.tarifas_nuevas).to_numpy(dtype=float)
+                       / lote["ruta"].map(self.tarifas_actuales).to_numpy(dtype=float))
+        if self.propuesta.margenes:
+            factor *= (1 + _margen(lote, self.margenes_nuevos) / 100) / (1 + _margen(lote, self.margenes_actuales) / 100)
+        if self.bandas_nuevas is not None:
+            pesos = lote["peso_kg"].to_numpy(dtype=float)
+            factor *= ((1 + self.bandas_nuevas.buscar_muchos(pesos) / 100)
+                       / (1 + self.bandas_actuales.buscar_muchos(pesos) / 100))
+        # Tarifa actual en 0: el cociente no dice nada del precio nuevo
+        factor[~np.isfinite(factor)] = np.nan
+        return factor
+
+
+def simular(conn, propuesta: Propuesta, filtro: FiltroCotizaciones | None = None,
+            actual: MotorPrecios | None = None, lote: int = SIMULADOR_LOTE) -> dict:
+    """
+    Reprecia las cotizaciones del filtro con la propuesta. Devuelve totales
+    (filas, recalculadas, ingreso_actual, ingreso_simulado, delta) y un DataFrame
+    por dimensión (por_ruta, por_tipo_unidad, por_cliente) ordenado por |delta|.
+    Las filas que no se pueden repreciar (sin tarifa o banda en alguna de las dos
+    tablas) cuentan con su precio actual en ambos ingresos.
+    """
+    inicio = time.perf_counter()
+    if actual is None:
+        actual = MotorPrecios.desde_db(conn)
+    sim = _Simulacion(actual, propuesta)
+    where, params = where_cotizaciones(filtro or FiltroCotizaciones())
+    sql = f"""
+        SELECT origen || ' → ' || destino AS ruta, tipo_unidad, cliente, peso_kg, precio_total
+        FROM cotizaciones /* recorrido completo */
+        WHERE {where} AND precio_total IS NOT NULL
+    """
+    columnas = ["cotizaciones", "sin_precio", "ingreso_actual", "ingreso_simulado"]
+    acumulados = {d: None for d in DIMENSIONES}
+    filas = recalculadas = 0
+    for df in pd.read_sql_query(sql, conn, params=params, chunksize=lote):
+        factor = sim.factor(df)
+        ok = ~np.isnan(factor)
+        precio = df["precio_total"].to_numpy(dtype=float)
+        df["cotizaciones"] = 1
+        df["sin_precio"] = (~ok).astype(int)
+        df["ingreso_actual"] = precio
+        df["ingreso_simulado"] = np.where(ok, precio * factor, precio)
+        filas += len(df)
+        recalculadas += int(ok.sum())
+        for d in DIMENSIONES:
+            parcial = df.groupby(df[d].fillna(""), sort=False)[columnas].sum()
+            acumulados[d] = parcial if acumulados[d] is None else acumulados[d].add(parcial, fill_value=0)
+
+    resultado = {"filas": filas, "recalculadas": recalculadas}
+    for d in DIMENSIONES:
+        tabla = acumulados[d]
+        if tabla is None:
+            tabla = pd.DataFrame(columns=columnas)
+        tabla = tabla.rename_axis(d).reset_index()
+        tabla["delta"] = tabla["ingreso_simulado"] - tabla["ingreso_actual"]
+        tabla["delta_pct"] = tabla["delta"] / tabla["ingreso_actual"].where(tabla["ingreso_actual"] != 0) * 100
+        resultado[f"por_{d}"] = tabla.sort_values("delta", key=np.abs, ascending=False, ignore_index=True)
+    por_ruta = resultado["por_ruta"]
+    resultado["ingreso_actual"] = float(por_ruta["ingreso_actual"].sum())
+    resultado["ingreso_simulado"] = float(por_ruta["ingreso_simulado"].sum())
+    resultado["delta"] = resultado["ingreso_simulado"] - resultado["ingreso_actual"]
+    resultado["segundos"] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Simula el ingreso del histórico con otras tarifas o márgenes")
+    ap.add_argument("propuesta", help="JSON con tarifas, margenes y/o bandas")
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--desde", type=date.fromisoformat)
+    ap.add_argument("--hasta", type=date.fromisoformat)
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    with open(args.propuesta, encoding="utf-8") as f:
+        propuesta = Propuesta.desde_dict(json.load(f))
+    conn = conectar(args.db)
+    try:
+        for criterio, valor in valores_sin_historial(conn, propuesta.margenes):
+            print(f"⚠️ Ningún {criterio} '{valor}' en el histórico: ese margen no cambia nada")
+        r = simular(conn, propuesta, FiltroCotizaciones(desde=args.desde, hasta=args.hasta),
+                    actual=obtener_motor(args.db))
+    finally:
+        conn.close()
+    print(f"{r['filas']:,} cotizaciones ({r['recalculadas']:,} recalculadas) en {r['segundos']} s")
+    print(f"Ingreso actual ${r['ingreso_actual']:,.2f} → simulado ${r['ingreso_simulado']:,.2f} ({r['delta']:+,.2f})")
+    for d in DIMENSIONES:
+        print(f"\nPor {d}:")
+        print(r[f"por_{d}"].head(args.top).to_string(index=False))